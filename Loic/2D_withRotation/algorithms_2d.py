@@ -1,44 +1,108 @@
 import math
+from branch_and_bound import branch_and_bound_2d
+from load_index import LoadOrder
+from placement import Placement
+from shape_array import ROTATIONS, TRIANGLE, ShapeArray, rotation_index
 from shapes import Circle, Rectangle, IsoscelesTriangle
+from shelf_index import PersistentShelfIndex
+from spatial_index import SpatialIndex
 
 def check_collision(shape, placed_shapes):
+    # Avec un index, seules les formes proches sont testées
+    if isinstance(placed_shapes, SpatialIndex):
+        return placed_shapes.collides(shape)
     for other in placed_shapes:
         if shape.intersects(other):
             return True
     return False
 
+def slide_left(shape, placed_shapes, min_x=0):
+    """Move a non-colliding shape left as far as it goes without collision"""
+    w, _ = shape.get_bounding_box()
+    start = shape.x
+    # Rien à gagner si un petit pas vers la gauche touche déjà
+    shape.x = max(min_x, start - w / 64)
+    if shape.x >= start or check_collision(shape, placed_shapes):
+        shape.x = start
+        return
+    # Dichotomie entre une position libre et une position en collision,
+    # sur au plus une largeur de forme, à 1/256 de largeur près
+    free, blocked = shape.x, max(min_x, start - w)
+    shape.x = blocked
+    if not check_collision(shape, placed_shapes):
+        return
+    while free - blocked > w / 256:
+        middle = (free + blocked) / 2
+        shape.x = middle
+        if check_collision(shape, placed_shapes):
+            blocked = middle
+        else:
+            free = middle
+    shape.x = free
+
 def ffdh(shapes, container_width, container_height):
-    sorted_shapes = sorted(shapes, key=lambda s: max(s.get_bounding_box()), reverse=True)
+    """First-Fit Decreasing Height, returns the shelves as lists of Placement
+
+    Sizes, positions and rotations are read and written in a ShapeArray:
+    the shapes given are left as they are, and a Shape object is only
+    built for the collision tests of each item.
+    """
+    store = ShapeArray.from_shapes(shapes)
+    order = store.sort_order("max_side")
     
     shelves = []  # Format: (height, shapes_list, y)
     current_y = 0
-    placed_shapes = []
+    # Grille de cellules larges de deux formes moyennes, jamais plus larges
+    # que le conteneur : sur une bande étroite, une cellule plus large que
+    # la bande mettrait toutes les formes dans la même colonne
+    cell_size = 1
+    if order:
+        widths, heights = store.bounding_boxes()
+        mean_side = sum(map(max, widths, heights)) / len(order)
+        cell_size = min(2 * mean_side, container_width, container_height) or 1
+    placed_shapes = SpatialIndex(cell_size)
+    # Hauteur et largeur utilisée de chaque étagère, indexées pour ne pas
+    # parcourir toutes les étagères à chaque forme
+    index = PersistentShelfIndex()
 
-    for shape in sorted_shapes:
+    for item in order:
+        shape = store.shape(item)
         placed = False
         
         # Essayer toutes les rotations
-        for rotation in [0, math.pi/2, math.pi]:
+        for rotation in range(len(ROTATIONS)):
             if placed:
                 break
                 
-            shape.rotation = rotation
-            w, h = shape.get_bounding_box()
+            shape.rotation = ROTATIONS[rotation]
+            w, h = store.bounding_box(item, rotation)
 
-            # Chercher dans les étagères existantes
-            for shelf in shelves:
-                shelf_height, shelf_shapes, shelf_y = shelf  # Décomposer les 3 éléments
-                shelf_width_used = sum(s.get_bounding_box()[0] for s in shelf_shapes)
+            # Chercher dans les étagères existantes, la suivante en cas de collision
+            i = index.find(w, h, container_width)
+            while i != -1:
+                shelf_height, shelf_shapes, shelf_y = shelves[i]  # Décomposer les 3 éléments
+                shape.x = index[i][1]
+                shape.y = shelf_y
                 
-                if shelf_height >= h and shelf_width_used + w <= container_width:
-                    shape.x = shelf_width_used
-                    shape.y = shelf_y
-                    
-                    if not check_collision(shape, placed_shapes):
-                        shelf_shapes.append(shape)
-                        placed_shapes.append(shape)
-                        placed = True
-                        break
+                if not check_collision(shape, placed_shapes):
+                    used = shape.x
+                    slide_left(shape, placed_shapes)
+                    if store.kinds[item] == TRIANGLE and rotation == 0:
+                        # Pointe en bas, le triangle peut s'emboîter avec le précédent
+                        x_up = shape.x
+                        shape.rotation = math.pi
+                        shape.x = used
+                        slide_left(shape, placed_shapes)
+                        if shape.x >= x_up:
+                            shape.rotation = 0
+                            shape.x = x_up
+                    shelf_shapes.append(_record(store, item, shape))
+                    placed_shapes.insert(shape)
+                    # Une forme glissée peut finir avant le bord droit de l'étagère
+                    index.set(i, shelf_height, max(used, shape.x + w), None)
+                    placed = True
+                    break
+                i = index.find(w, h, container_width, i + 1)
             
             if placed:
                 break
@@ -50,44 +114,50 @@ def ffdh(shapes, container_width, container_height):
                     shape.y = current_y
                     
                     if not check_collision(shape, placed_shapes):
-                        new_shelf = (h, [shape], current_y)
+                        new_shelf = (h, [_record(store, item, shape)], current_y)
                         shelves.append(new_shelf)
-                        placed_shapes.append(shape)
+                        placed_shapes.insert(shape)
+                        index.set(len(shelves) - 1, h, w, None)
                         current_y += h
                         placed = True
                         break
 
-    print("\n=== RESULT FROM ALGORITHM ===")
-    for i, shelf in enumerate(shelves):
-        shelf_height, shelf_shapes, shelf_y = shelf
-        print(f"Shelf {i+1} (height={shelf_height}, y={shelf_y}):")
-        for shape in shelf_shapes:
-            bbox = shape.get_bounding_box()
-            print(f"  {type(shape).__name__} at ({shape.x},{shape.y}) "
-                  f"size={bbox[0]}x{bbox[1]} rotation={shape.rotation}")
-
     return [shelf[1] for shelf in shelves]
 
 
+def _record(store, item, shape):
+    """Write the position of a placed shape back to the store, return its Placement"""
+    store.xs[item] = shape.x
+    store.ys[item] = shape.y
+    store.rotations[item] = rotation_index(shape.rotation)
+    return Placement.from_store(store, item)
+
+
 def nfdh(shapes, container_width, container_height):
-    """Next-Fit Decreasing Height algorithm"""
-    sorted_shapes = sorted(shapes, key=lambda s: max(s.get_bounding_box()), reverse=True)
+    """Next-Fit Decreasing Height algorithm, returns the shelves as lists of Placement
+
+    Only the columns of a ShapeArray are used, no shape is copied or
+    modified.
+    """
+    store = ShapeArray.from_shapes(shapes)
+    order = store.sort_order("max_side")
+    xs, ys, rotations = store.xs, store.ys, store.rotations
     
     shelves = []
     current_shelf = []
     current_y = 0
     current_shelf_height = 0
+    shelf_width_used = 0
     
-    for shape in sorted_shapes:
-        w, h = shape.get_bounding_box()
+    for item in order:
+        w, h = store.bounding_box(item)
         
         # Try to place in current shelf
-        shelf_width_used = sum(s[0] for s in current_shelf)
-        
         if shelf_width_used + w <= container_width and current_shelf_height >= h:
-            shape.x = shelf_width_used
-            shape.y = current_y
-            current_shelf.append((w, h, shape))
+            xs[item] = shelf_width_used
+            ys[item] = current_y
+            current_shelf.append(Placement.from_store(store, item))
+            shelf_width_used += w
         else:
             # Start new shelf
             current_y += current_shelf_height
@@ -100,9 +170,8 @@ def nfdh(shapes, container_width, container_height):
             best_rotation = None
             best_area = float('inf')
             
-            for rotation in [0, math.pi/2, math.pi]:
-                shape.rotation = rotation
-                w, h = shape.get_bounding_box()
+            for rotation in range(len(ROTATIONS)):
+                w, h = store.bounding_box(item, rotation)
                 
                 if w <= container_width and current_y + h <= container_height:
                     area = w * h
@@ -111,105 +180,64 @@ def nfdh(shapes, container_width, container_height):
                         best_rotation = rotation
             
             if best_rotation is not None:
-                shape.rotation = best_rotation
-                w, h = shape.get_bounding_box()
-                shape.x = 0
-                shape.y = current_y
-                current_shelf = [(w, h, shape)]
+                rotations[item] = best_rotation
+                w, h = store.bounding_box(item)
+                xs[item] = 0
+                ys[item] = current_y
+                current_shelf = [Placement.from_store(store, item)]
                 shelves.append(current_shelf)
                 current_shelf_height = h
+                shelf_width_used = w
     
     return shelves
 
 
 def best_fit(items, bin_capacity):
     bins = []
+    loads = []
+    # Bins that cannot take even the smallest item are left out of the index
+    order = LoadOrder()
+    smallest = min(items, default=0)
     for item in items:
-        best_bin = None
-        min_space = bin_capacity
-        for bin in bins:
-            space = bin_capacity - (sum(bin) + item)
-            if 0 <= space < min_space:
-                min_space = space
-                best_bin = bin
-        
-        if best_bin is not None:
-            best_bin.append(item)
+        best_bin = order.find(item, bin_capacity)
+        if best_bin != -1:
+            order.remove(best_bin, loads[best_bin])
+            bins[best_bin].append(item)
+            loads[best_bin] += item
         else:
+            best_bin = len(bins)
             bins.append([item])
+            loads.append(item)
+        if loads[best_bin] + smallest <= bin_capacity:
+            order.add(best_bin, loads[best_bin])
     return bins
 
 
-def brute_force_2d(rectangles, container_width, container_height, max_time=10):
-    """Brute-force approach with time limit"""
-    import time
-    from itertools import permutations
-    
-    start_time = time.time()
-    best_placement = []
-    best_area = 0
-    
-    # Try different orders
-    for i, perm in enumerate(permutations(rectangles)):
-        if time.time() - start_time > max_time:
-            break
-        
-        current_placement = []
-        free_spaces = [(0, 0, container_width, container_height)]
-        placed_area = 0
-        
-        for rect in perm:
-            w, h = rect
-            placed = False
-            
-            for j, space in enumerate(free_spaces):
-                if w <= space[2] and h <= space[3]:
-                    # Place without rotation
-                    current_placement.append((space[0], space[1], w, h))
-                    placed_area += w * h
-                    placed = True
-                    
-                    # Split remaining space
-                    remaining_width = space[2] - w
-                    remaining_height = space[3] - h
-                    
-                    if remaining_width > 0 and remaining_height > 0:
-                        if remaining_width > remaining_height:
-                            free_spaces.append((space[0] + w, space[1], remaining_width, h))
-                            free_spaces.append((space[0], space[1] + h, space[2], remaining_height))
-                        else:
-                            free_spaces.append((space[0], space[1] + h, w, remaining_height))
-                            free_spaces.append((space[0] + w, space[1], remaining_width, space[3]))
-                    
-                    del free_spaces[j]
-                    break
-                
-                elif h <= space[2] and w <= space[3]:
-                    # Place with rotation
-                    current_placement.append((space[0], space[1], h, w))
-                    placed_area += w * h
-                    placed = True
-                    
-                    # Split remaining space
-                    remaining_width = space[2] - h
-                    remaining_height = space[3] - w
-                    
-                    if remaining_width > 0 and remaining_height > 0:
-                        if remaining_width > remaining_height:
-                            free_spaces.append((space[0] + h, space[1], remaining_width, w))
-                            free_spaces.append((space[0], space[1] + w, space[2], remaining_height))
-                        else:
-                            free_spaces.append((space[0], space[1] + w, h, remaining_height))
-                            free_spaces.append((space[0] + h, space[1], remaining_width, space[3]))
-                    
-                    del free_spaces[j]
-                    break
-            
-            if not placed:
-                break
-        
-        if placed_area > best_area:
-            best_area = placed_area
-            best_placement = current_placement
-    
-    return [best_placement] if best_placement else []
\ No newline at end of file
+def brute_force_2d(shapes, container_width, container_height, max_time=10, workers=None,
+                   progress=None, cancel=None):
+    """Best packing of the shapes' bounding boxes found by branch_and_bound_2d
+
+    Returns one shelf of Placement, the shapes given are not modified.
+    `progress` is called with the shelves of each better packing found;
+    `cancel` stops the search early (see branch_and_bound_2d).
+    """
+    # Boîtes des formes non tournées
+    rectangles = []
+    for shape in shapes:
+        w, h = shape.get_bounding_box()
+        rectangles.append((h, w) if rotation_index(shape.rotation) == 1 else (w, h))
+    report = None
+    if progress is not None:
+        report = lambda best: progress(_place(shapes, rectangles, best))
+    result = branch_and_bound_2d(rectangles, container_width, container_height, max_time,
+                                 workers=workers, progress=report, cancel=cancel)
+    return _place(shapes, rectangles, result)
+
+
+def _place(shapes, rectangles, result):
+    placed = []
+    for (x, y, w, h), i in zip(result["placement"], result["indices"]):
+        # Boîte placée couchée : rotation d'un quart de tour
+        rotation = 0 if (w, h) == rectangles[i] else math.pi/2
+        placed.append(Placement(i, type(shapes[i]).__name__, x, y, rotation, w, h))
+    return [placed] if placed else []
@@ -0,0 +1,150 @@
+"""Headless batch runner of the shape algorithms: pack instances read from files or stdin, write NDJSON
+
+Examples:
+    python cli.py ffdh shapes.ndjson --width 200 --height 100
+    cat instance.json | python cli.py brute_force_2d --format json --option max_time=5
+
+An instance is a JSON object with "shapes", "width" and "height", and
+an optional "id"; the command-line values fill in what it leaves out.
+A shape is a list [kind, dimensions...] or an object with a "kind":
+["Rectangle", width, height], ["Circle", radius] or
+["IsoscelesTriangle", base, height], the height of a triangle being
+optional (equilateral). A JSON file holds one instance or a list of
+them, an NDJSON file one per line.
+
+Each instance gives one output line, in input order, with its id, the
+algorithm, the container width and height, its "shelves" of placements
+[item, kind, x, y, rotation, width, height] and the time taken, or its
+error. withoutRotation/export.py draws these records.
+
+This is the counterpart of withoutRotation/cli.py for this folder: the
+two folders are run as separate scripts, so it cannot register these
+algorithms itself.
+"""
+import argparse
+import json
+import sys
+import time
+
+from algorithms_2d import brute_force_2d, ffdh, nfdh
+from shapes import Circle, IsoscelesTriangle, Rectangle
+
+ALGORITHMS = {"nfdh": nfdh, "ffdh": ffdh, "brute_force_2d": brute_force_2d}
+
+# Constructor and dimension names of each kind
+SHAPES = {
+    "Rectangle": (Rectangle, ("width", "height")),
+    "Circle": (Circle, ("radius",)),
+    "IsoscelesTriangle": (IsoscelesTriangle, ("base", "height")),
+}
+
+FORMATS = ("json", "ndjson")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a shape packing algorithm on batches of instances")
+    parser.add_argument("algorithm", choices=sorted(ALGORITHMS))
+    parser.add_argument("files", nargs="*", help="input files, '-' or nothing for stdin")
+    parser.add_argument("--format", choices=FORMATS,
+                        help="input format (default: json for a .json file, ndjson otherwise)")
+    parser.add_argument("--width", type=float, help="container width")
+    parser.add_argument("--height", type=float, help="container height")
+    parser.add_argument("--option", action="append", default=[], metavar="KEY=VALUE",
+                        help="keyword argument of the algorithm, VALUE read as JSON if it parses")
+    parser.add_argument("--output", help="output file (default: stdout)")
+    args = parser.parse_intermixed_args(argv)
+
+    options = {}
+    for option in args.option:
+        key, sep, value = option.partition("=")
+        if not sep:
+            parser.error(f"Expected KEY=VALUE, got {option}")
+        try:
+            options[key] = json.loads(value)
+        except ValueError:
+            options[key] = value
+    defaults = {"width": args.width, "height": args.height}
+
+    output = sys.stdout if args.output is None else open(args.output, "w")
+    failed = False
+    try:
+        for path in args.files or ["-"]:
+            fmt = args.format or ("json" if path.lower().endswith(".json") else "ndjson")
+            stream = sys.stdin if path == "-" else open(path)
+            try:
+                for instance in read_instances(stream, fmt, defaults):
+                    record = solve(args.algorithm, instance, options)
+                    failed = failed or "error" in record
+                    output.write(json.dumps(record) + "\n")
+                    output.flush()
+            finally:
+                if stream is not sys.stdin:
+                    stream.close()
+    except (OSError, ValueError) as error:
+        # Unreadable input: the records already written stay valid
+        print(f"{parser.prog}: {error}", file=sys.stderr)
+        return 2
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return 1 if failed else 0
+
+
+def solve(algorithm, instance, options):
+    """Output record of one instance; errors are reported in it, not raised"""
+    record = {"id": instance.get("id"), "algorithm": algorithm}
+    try:
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown algorithm: {algorithm}")
+        if instance.get("width") is None or instance.get("height") is None:
+            raise ValueError("Missing container width or height")
+        shapes = [parse_shape(shape) for shape in instance["shapes"]]
+        record["width"], record["height"] = instance["width"], instance["height"]
+        start = time.perf_counter()
+        shelves = ALGORITHMS[algorithm](shapes, instance["width"], instance["height"], **options)
+        record["time"] = time.perf_counter() - start
+    except Exception as error:
+        record["error"] = f"{type(error).__name__}: {error}"
+        return record
+    # Placements are named tuples, written as JSON lists
+    record["shelves"] = [list(map(list, shelf)) for shelf in shelves]
+    return record
+
+
+def parse_shape(shape):
+    """Shape object of a [kind, dimensions...] list or a {"kind": ...} object"""
+    if isinstance(shape, dict):
+        kind = shape.get("kind")
+        if kind not in SHAPES:
+            raise ValueError(f"Unknown shape kind: {kind}")
+        cls, names = SHAPES[kind]
+        return cls(*(shape[name] for name in names if name in shape))
+    kind, *dimensions = shape
+    if kind not in SHAPES:
+        raise ValueError(f"Unknown shape kind: {kind}")
+    cls, names = SHAPES[kind]
+    if not 1 <= len(dimensions) <= len(names):
+        raise ValueError(f"{kind} takes {len(names)} dimensions, got {len(dimensions)}")
+    return cls(*dimensions)
+
+
+def read_instances(stream, fmt, defaults=None):
+    """Yield the instances of an open text stream, missing fields taken from `defaults`"""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format: {fmt}")
+    if fmt == "json":
+        data = json.load(stream)
+        instances = data if isinstance(data, list) else [data]
+    else:
+        instances = (json.loads(line) for line in stream if line.strip())
+    for number, instance in enumerate(instances):
+        for key, value in (defaults or {}).items():
+            if instance.get(key) is None and value is not None:
+                instance[key] = value
+        if instance.get("id") is None:
+            instance["id"] = number
+        yield instance
+
+
+if __name__ == "__main__":
+    sys.exit(main())
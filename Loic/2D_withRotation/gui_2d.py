@@ -1,11 +1,16 @@
-import math
+import queue
+import threading
 import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import ttk, messagebox, scrolledtext
 from algorithms_2d import nfdh, ffdh, best_fit, brute_force_2d
-from visualization import draw_packing
+from visualization import PackingRenderer
 import random
 from shapes import Circle, Rectangle, IsoscelesTriangle
 
+# Intervalle de relève de la file de progression, en millisecondes
+POLL_INTERVAL = 50
+
 class Packing2DApp(tk.Tk):
     def __init__(self):
         super().__init__()
@@ -17,8 +22,18 @@ class Packing2DApp(tk.Tk):
         self.rectangles = []
         self.container_size = (0, 0)
         
+        # Les algorithmes tournent dans un thread, la fenêtre reste réactive
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.running = None
+        self.running_container = None
+        # Nombre de formes de la liste donnée à l'algorithme en cours
+        self.running_count = 0
+        self.cancel_event = None
+        self.progress_queue = None
+        
         self.create_widgets()
         self.style_ui()
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
     
     def style_ui(self):
         self.style = ttk.Style()
@@ -105,12 +120,20 @@ class Packing2DApp(tk.Tk):
         algo_frame = ttk.LabelFrame(main_frame, text="Algorithms", padding=10)
         algo_frame.grid(row=1, column=1, rowspan=3, sticky="nsew")
         
-        ttk.Button(algo_frame, text="NFDH", command=lambda: self.run_algorithm("NFDH"), style="Primary.TButton").grid(row=0, column=0, pady=5, sticky="we")
-        ttk.Button(algo_frame, text="FFDH", command=lambda: self.run_algorithm("FFDH"), style="Primary.TButton").grid(row=1, column=0, pady=5, sticky="we")
-        ttk.Button(algo_frame, text="Best-Fit", command=lambda: self.run_algorithm("Best-Fit"), style="Primary.TButton").grid(row=2, column=0, pady=5, sticky="we")
-        ttk.Button(algo_frame, text="Brute-Force", command=lambda: self.run_algorithm("Brute-Force"), style="Secondary.TButton").grid(row=3, column=0, pady=5, sticky="we")
+        self.algorithm_buttons = []
+        for row, (name, style) in enumerate([("NFDH", "Primary.TButton"), ("FFDH", "Primary.TButton"),
+                                             ("Best-Fit", "Primary.TButton"), ("Brute-Force", "Secondary.TButton")]):
+            button = ttk.Button(algo_frame, text=name, command=lambda name=name: self.run_algorithm(name), style=style)
+            button.grid(row=row, column=0, pady=5, sticky="we")
+            self.algorithm_buttons.append(button)
+        
+        self.cancel_button = ttk.Button(algo_frame, text="Cancel", command=self.cancel_algorithm, state="disabled")
+        self.cancel_button.grid(row=4, column=0, pady=5, sticky="we")
         
-        ttk.Button(algo_frame, text="Generate Random", command=self.generate_random).grid(row=4, column=0, pady=10, sticky="we")
+        self.status_label = ttk.Label(algo_frame, text="")
+        self.status_label.grid(row=5, column=0, pady=5, sticky="we")
+        
+        ttk.Button(algo_frame, text="Generate Random", command=self.generate_random).grid(row=6, column=0, pady=10, sticky="we")
         
         # Zone de résultats et visualisation
         result_frame = ttk.LabelFrame(main_frame, text="Results & Visualization", padding=10)
@@ -124,6 +147,8 @@ class Packing2DApp(tk.Tk):
         
         self.canvas = tk.Canvas(self.canvas_frame, bg="white")
         self.canvas.pack(fill=tk.BOTH, expand=True)
+        # Garde les items du canevas d'un dessin à l'autre et suit le redimensionnement
+        self.renderer = PackingRenderer(self.canvas)
         
         # Configuration du redimensionnement
         main_frame.columnconfigure(0, weight=1)
@@ -224,55 +249,108 @@ class Packing2DApp(tk.Tk):
         self.update_rect_list()
     
     def run_algorithm(self, algorithm_name):
+        if self.running is not None:
+            return
         try:
             container_w = int(self.container_width_entry.get())
             container_h = int(self.container_height_entry.get())
             
             if not self.rectangles:
                 raise ValueError("Please add at least one rectangle")
-            
-            self.result_text.delete(1.0, tk.END)
-            self.result_text.insert(tk.END, f"Running {algorithm_name} algorithm...\n")
-            self.result_text.insert(tk.END, f"Container size: {container_w}x{container_h}\n")
-            self.result_text.insert(tk.END, f"Rectangles to pack: {len(self.rectangles)}\n\n")
-            
-
-            
-            if algorithm_name == "NFDH":
-                shelves = nfdh(self.rectangles, container_w, container_h)
-            elif algorithm_name == "FFDH":
-                shelves = ffdh(self.rectangles, container_w, container_h)
-            elif algorithm_name == "Best-Fit":
-                shelves = best_fit(self.rectangles, container_w, container_h)
-            elif algorithm_name == "Brute-Force":
-                shelves = brute_force_2d(self.rectangles, container_w, container_h)
-            
-            # Calcul des statistiques
-            total_area = container_w * container_h
-            packed_rects = [shape for shelf in shelves for shape in shelf]
-
-            used_area = 0
-            for shelf in shelves:
-                for shape in shelf:  # Correction ici
-                    if isinstance(shape, Circle):
-                        used_area += math.pi * shape.radius ** 2
-                    elif isinstance(shape, IsoscelesTriangle):
-                        used_area += shape.base * shape.height
-                    elif isinstance(shape, Rectangle):
-                        used_area += shape.width * shape.height
-
-            efficiency = (used_area / total_area) * 100
-            
-            self.result_text.insert(tk.END, f"\nResults:\n")
-            self.result_text.insert(tk.END, f"- Packed rectangles: {len(packed_rects)}/{len(self.rectangles)}\n")
-            self.result_text.insert(tk.END, f"- Space utilization: {efficiency:.2f}%\n")
-            
-            # Visualisation
-            self.canvas.delete("all")
-            draw_packing(self.canvas, shelves, container_w, container_h)
-        
         except ValueError as e:
             messagebox.showerror("Input Error", str(e))
+            return
+        
+        self.result_text.delete(1.0, tk.END)
+        self.result_text.insert(tk.END, f"Running {algorithm_name} algorithm...\n")
+        self.result_text.insert(tk.END, f"Container size: {container_w}x{container_h}\n")
+        self.result_text.insert(tk.END, f"Rectangles to pack: {len(self.rectangles)}\n\n")
+        self.renderer.clear()
+        
+        self.cancel_event = threading.Event()
+        self.progress_queue = queue.Queue()
+        self.running = self.executor.submit(self.solve, algorithm_name, list(self.rectangles),
+                                            container_w, container_h, self.progress_queue, self.cancel_event)
+        self.running_container = (container_w, container_h)
+        self.running_count = len(self.rectangles)
+        self.set_running(True)
+        self.after(POLL_INTERVAL, self.poll_progress)
+    
+    def solve(self, algorithm_name, shapes, container_w, container_h, progress_queue, cancel_event):
+        """Run in the worker thread: no Tk call here, only the queue"""
+        def progress(shelves):
+            progress_queue.put(shelves)
+        
+        if algorithm_name == "NFDH":
+            return nfdh(shapes, container_w, container_h)
+        elif algorithm_name == "FFDH":
+            return ffdh(shapes, container_w, container_h)
+        elif algorithm_name == "Best-Fit":
+            return best_fit(shapes, container_w, container_h)
+        elif algorithm_name == "Brute-Force":
+            return brute_force_2d(shapes, container_w, container_h, progress=progress, cancel=cancel_event)
+    
+    def poll_progress(self):
+        # Seule la dernière solution de la file est dessinée
+        shelves = None
+        while True:
+            try:
+                shelves = self.progress_queue.get_nowait()
+            except queue.Empty:
+                break
+        container_w, container_h = self.running_container
+        if shelves is not None:
+            efficiency = self.used_area(shelves) / (container_w * container_h) * 100
+            self.status_label.config(text=f"Best so far: {efficiency:.2f}%")
+            self.renderer.draw(shelves, container_w, container_h)
+        
+        if not self.running.done():
+            self.after(POLL_INTERVAL, self.poll_progress)
+            return
+        future = self.running
+        self.running = None
+        self.set_running(False)
+        try:
+            shelves = future.result()
+        except Exception as e:
+            messagebox.showerror("Algorithm Error", str(e))
+            return
+        if self.cancel_event.is_set():
+            self.result_text.insert(tk.END, "Cancelled, best packing found so far:\n")
+        self.show_results(shelves, container_w, container_h, self.running_count)
+    
+    def used_area(self, shelves):
+        return sum(placement.area() for shelf in shelves for placement in shelf)
+    
+    def show_results(self, shelves, container_w, container_h, count):
+        # Calcul des statistiques
+        total_area = container_w * container_h
+        packed_rects = [placement for shelf in shelves for placement in shelf]
+        efficiency = (self.used_area(shelves) / total_area) * 100
+        
+        self.result_text.insert(tk.END, f"\nResults:\n")
+        self.result_text.insert(tk.END, f"- Packed rectangles: {len(packed_rects)}/{count}\n")
+        self.result_text.insert(tk.END, f"- Space utilization: {efficiency:.2f}%\n")
+        
+        # Visualisation
+        self.renderer.draw(shelves, container_w, container_h)
+    
+    def cancel_algorithm(self):
+        if self.running is not None:
+            self.cancel_event.set()
+            self.status_label.config(text="Cancelling...")
+    
+    def set_running(self, running):
+        for button in self.algorithm_buttons:
+            button.config(state="disabled" if running else "normal")
+        self.cancel_button.config(state="normal" if running else "disabled")
+        self.status_label.config(text="Running..." if running else "")
+    
+    def on_close(self):
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.destroy()
             
     def update_dimension_labels(self, event=None):
         shape_type = self.shape_type.get()
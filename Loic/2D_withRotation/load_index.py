@@ -0,0 +1,114 @@
+"""Bin indexes of the Best-Fit and Worst-Fit algorithms
+
+The same file is vendored in withoutRotation and 2D_withRotation, which
+are run as separate script folders; withoutRotation/tests/test_vendored.py
+fails as soon as the two copies differ, so a fix goes to both.
+"""
+from bisect import bisect_left, bisect_right, insort
+from heapq import heapify, heappop, heappush
+from math import inf
+
+
+class LoadOrder:
+    """Bins sorted by (load, -index), used to find the fullest bin an item fits in.
+
+    find() gives the bin the linear best-fit loop would pick, floats
+    included: the fullest bin that fits, the oldest one when rounding
+    gives several bins the same remaining space.
+    """
+
+    def __init__(self):
+        self.order = []
+
+    def __len__(self):
+        return len(self.order)
+
+    def add(self, index, load):
+        insort(self.order, (load, -index))
+
+    def remove(self, index, load):
+        del self.order[bisect_left(self.order, (load, -index))]
+
+    def find(self, item, capacity):
+        """Return the index of the fullest bin that can take `item`, or -1"""
+        order = self.order
+        # Successor query on the threshold, then nudged for float rounding
+        lo = bisect_right(order, (capacity - item, inf))
+        while lo < len(order) and order[lo][0] + item <= capacity:
+            lo = bisect_right(order, (order[lo][0], inf))
+        while lo > 0 and order[lo - 1][0] + item > capacity:
+            lo = bisect_left(order, (order[lo - 1][0], -inf))
+        if lo == 0:
+            return -1
+        load = order[lo - 1][0]
+        min_space = capacity - (load + item)
+        # As in the loop, a bin left with the whole capacity is not a fit
+        if min_space >= capacity:
+            return -1
+        best = -order[lo - 1][1]
+        # Rounding can give a lighter (older) bin the same space
+        start = bisect_left(order, (load, -inf))
+        while start > 0:
+            load, neg_index = order[start - 1]
+            if capacity - (load + item) != min_space:
+                break
+            best = min(best, -neg_index)
+            start = bisect_left(order, (load, -inf))
+        return best
+
+
+class LoadHeap:
+    """Min-heap of the distinct bin loads, used to find the emptiest bin an item fits in.
+
+    Each load has a min-heap of the bins at that load, so the top is the
+    emptiest bin, oldest first. find() gives the bin the linear
+    worst-fit loop would pick, floats included. A load whose bins all
+    left stays in the heap until it reaches the top, or until there are
+    twice as many loads as bins.
+    """
+
+    def __init__(self):
+        self.heap = []
+        self.groups = {}
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def add(self, index, load):
+        group = self.groups.get(load)
+        if group is None:
+            self.groups[load] = [index]
+            heappush(self.heap, load)
+        else:
+            heappush(group, index)
+        self.count += 1
+
+    def remove(self, index, load):
+        group = self.groups[load]
+        if group[0] == index:
+            heappop(group)
+        else:
+            group.remove(index)
+            heapify(group)
+        self.count -= 1
+        if len(self.groups) > 2 * self.count + 16:
+            self.groups = {load: group for load, group in self.groups.items() if group}
+            self.heap = list(self.groups)
+            heapify(self.heap)
+
+    def find(self, item, capacity):
+        """Return the index of the emptiest bin that can take `item`, or -1"""
+        heap, groups = self.heap, self.groups
+        while heap and not groups[heap[0]]:
+            del groups[heappop(heap)]
+        if not heap or heap[0] + item > capacity:
+            return -1
+        max_space = capacity - (heap[0] + item)
+        # Rounding can give a slightly heavier load the same space
+        tied = [heappop(heap)]
+        while heap and capacity - (heap[0] + item) == max_space:
+            tied.append(heappop(heap))
+        for load in tied:
+            heappush(heap, load)
+        return min(groups[load][0] for load in tied if groups[load])
@@ -0,0 +1,64 @@
+import math
+from collections import namedtuple
+
+from shape_array import KIND_NAMES, ROTATIONS, rotation_index
+from shapes import Circle, Rectangle, IsoscelesTriangle
+from vertices import triangle_polygon
+
+
+class Placement(namedtuple("Placement", "item kind x y rotation width height")):
+    """Where one shape of a packing went, in container units
+
+    `item` is the index of the shape in the list given to the algorithm,
+    `kind` its class name, `rotation` the rotation in radians (0, π/2
+    or π) and width, height those of its bounding box once rotated.
+    Placements are tuples: the algorithms never hand out the shapes they
+    were given, so a result can be kept, drawn at any scale, scored or
+    exported as often as needed.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def of(cls, item, shape):
+        """Placement of a positioned shape"""
+        w, h = shape.get_bounding_box()
+        return cls(item, type(shape).__name__, shape.x, shape.y, shape.rotation, w, h)
+
+    @classmethod
+    def from_store(cls, store, i):
+        """Placement of entry i of a ShapeArray, the item being its index"""
+        w, h = store.bounding_box(i)
+        return cls(i, KIND_NAMES[store.kinds[i]], store.xs[i], store.ys[i],
+                   ROTATIONS[store.rotations[i]], w, h)
+
+    @property
+    def bbox(self):
+        return (self.x, self.y, self.width, self.height)
+
+    def polygon(self):
+        """Vertices of the shape (y pointing down), None for a circle"""
+        x, y, w, h = self.bbox
+        if self.kind == "Circle":
+            return None
+        if self.kind == "Rectangle":
+            return [(x, y), (x + w, y), (x + w, y + h), (x, y + h)]
+        return triangle_polygon(x, y, w, h, rotation_index(self.rotation))
+
+    def area(self):
+        if self.kind == "Circle":
+            return math.pi * (self.width / 2) ** 2
+        if self.kind == "IsoscelesTriangle":
+            return self.width * self.height / 2
+        return self.width * self.height
+
+    def to_shape(self):
+        """A new Shape object at this placement"""
+        r = rotation_index(self.rotation)
+        # Dimensions before rotation
+        w, h = (self.height, self.width) if r == 1 else (self.width, self.height)
+        if self.kind == "Circle":
+            return Circle(w / 2, self.x, self.y, ROTATIONS[r])
+        if self.kind == "Rectangle":
+            return Rectangle(w, h, self.x, self.y, ROTATIONS[r])
+        return IsoscelesTriangle(w, h, self.x, self.y, ROTATIONS[r])
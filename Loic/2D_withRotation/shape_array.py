@@ -0,0 +1,112 @@
+import math
+from array import array
+
+from shapes import Circle, Rectangle, IsoscelesTriangle
+
+CIRCLE, RECTANGLE, TRIANGLE = 0, 1, 2
+KINDS = {Circle: CIRCLE, Rectangle: RECTANGLE, IsoscelesTriangle: TRIANGLE}
+# Class name of each kind, as Placement.kind gives it
+KIND_NAMES = {kind: cls.__name__ for cls, kind in KINDS.items()}
+
+# Rotations are stored by index, so no float comparison with math.pi is needed
+ROTATIONS = (0, math.pi / 2, math.pi)
+
+
+class ShapeArray:
+    """Columnar store of shapes: one typed array per attribute instead of one object per shape
+
+    Each shape takes 34 bytes (kind, width, height, x, y, rotation index).
+    Width and height are those of the unrotated bounding box: diameter
+    for a circle, width and height for a rectangle, base and height for
+    a triangle. A rotation index of 1 (π/2) swaps them.
+    """
+
+    def __init__(self):
+        self.kinds = array("b")
+        self.widths = array("d")
+        self.heights = array("d")
+        self.xs = array("d")
+        self.ys = array("d")
+        self.rotations = array("b")
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def append(self, kind, width, height, x=0, y=0, rotation=0):
+        self.kinds.append(kind)
+        self.widths.append(width)
+        self.heights.append(height)
+        self.xs.append(x)
+        self.ys.append(y)
+        self.rotations.append(rotation)
+
+    @classmethod
+    def from_shapes(cls, shapes):
+        store = cls()
+        for shape in shapes:
+            kind = KINDS[type(shape)]
+            if kind == CIRCLE:
+                width = height = 2 * shape.radius
+            elif kind == RECTANGLE:
+                width, height = shape.width, shape.height
+            else:
+                width, height = shape.base, shape.height
+            store.append(kind, width, height, shape.x, shape.y, rotation_index(shape.rotation))
+        return store
+
+    def shape(self, i):
+        """Build the Shape object for entry i"""
+        kind = self.kinds[i]
+        x, y = self.xs[i], self.ys[i]
+        rotation = ROTATIONS[self.rotations[i]]
+        if kind == CIRCLE:
+            return Circle(self.widths[i] / 2, x, y, rotation)
+        if kind == RECTANGLE:
+            return Rectangle(self.widths[i], self.heights[i], x, y, rotation)
+        return IsoscelesTriangle(self.widths[i], self.heights[i], x, y, rotation)
+
+    def to_shapes(self):
+        return [self.shape(i) for i in range(len(self))]
+
+    def update_shapes(self, shapes):
+        """Copy positions and rotations back onto the objects the store was built from"""
+        for shape, x, y, r in zip(shapes, self.xs, self.ys, self.rotations):
+            shape.x = x
+            shape.y = y
+            shape.rotation = ROTATIONS[r]
+
+    def bounding_box(self, i, rotation=None):
+        """Bounding box width and height of entry i, at a rotation index or its own"""
+        if rotation is None:
+            rotation = self.rotations[i]
+        if rotation == 1:
+            return self.heights[i], self.widths[i]
+        return self.widths[i], self.heights[i]
+
+    def bounding_boxes(self):
+        """Bounding box widths and heights of all shapes, as two arrays"""
+        widths = array("d", [h if r == 1 else w
+                             for w, h, r in zip(self.widths, self.heights, self.rotations)])
+        heights = array("d", [w if r == 1 else h
+                              for w, h, r in zip(self.widths, self.heights, self.rotations)])
+        return widths, heights
+
+    def sort_order(self, key="max_side"):
+        """Indices of the shapes by decreasing bounding box `key` (max_side, height, width, area)"""
+        widths, heights = self.bounding_boxes()
+        if key == "max_side":
+            values = list(map(max, widths, heights))
+        elif key == "height":
+            values = heights
+        elif key == "width":
+            values = widths
+        elif key == "area":
+            values = [w * h for w, h in zip(widths, heights)]
+        else:
+            raise ValueError(f"Unknown sort key: {key}")
+        return sorted(range(len(values)), key=values.__getitem__, reverse=True)
+
+
+def rotation_index(rotation):
+    """Index in ROTATIONS of a rotation in radians"""
+    return round(rotation / (math.pi / 2)) % len(ROTATIONS)
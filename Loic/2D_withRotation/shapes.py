@@ -1,5 +1,7 @@
 import math
 
+from vertices import triangle_polygon
+
 class Shape:
     def __init__(self, x=0, y=0, rotation=0):
         self.x = x
@@ -19,13 +21,24 @@ class Shape:
         raise NotImplementedError
     
     def intersects(self, other):
+        """True if the interiors overlap (touching shapes do not intersect)"""
         x1, y1 = self.x, self.y
         w1, h1 = self.get_bounding_box()
         
         x2, y2 = other.x, other.y
         w2, h2 = other.get_bounding_box()
         
-        return not (x1 + w1 <= x2 or x2 + w2 <= x1 or y1 + h1 <= y2 or y2 + h2 <= y1)
+        # Broad phase: disjoint bounding boxes cannot intersect
+        if x1 + w1 <= x2 or x2 + w2 <= x1 or y1 + h1 <= y2 or y2 + h2 <= y1:
+            return False
+        
+        if isinstance(self, Circle) and isinstance(other, Circle):
+            return circles_intersect(self, other)
+        if isinstance(self, Circle):
+            return circle_polygon_intersect(self, other.get_polygon())
+        if isinstance(other, Circle):
+            return circle_polygon_intersect(other, self.get_polygon())
+        return polygons_intersect(self.get_polygon(), other.get_polygon())
 
 class Circle(Shape):
     def __init__(self, radius, x=0, y=0, rotation=0):
@@ -44,15 +57,6 @@ class Circle(Shape):
         y1 = self.y + 2 * self.radius * scale
         canvas.create_oval(x0, y0, x1, y1, outline="black", fill="lightblue", width=1)
 
-    def intersects(self, other):
-        x1, y1 = self.x, self.y
-        w1, h1 = self.get_bounding_box()
-        
-        x2, y2 = other.x, other.y
-        w2, h2 = other.get_bounding_box()
-        
-        return not (x1 + w1 <= x2 or x2 + w2 <= x1 or y1 + h1 <= y2 or y2 + h2 <= y1)
-
 
 class Rectangle(Shape):
     def __init__(self, width, height, x=0, y=0, rotation=0):
@@ -66,6 +70,14 @@ class Rectangle(Shape):
         else:  # π/2 rotation
             return (self.height, self.width)
     
+    def get_polygon(self, scale=1):
+        """Vertices of the shape, in canvas coordinates"""
+        w, h = self.get_bounding_box()
+        w *= scale
+        h *= scale
+        return [(self.x, self.y), (self.x + w, self.y),
+                (self.x + w, self.y + h), (self.x, self.y + h)]
+    
     def draw(self, canvas, scale=1):
         if self.rotation == 0 or self.rotation == math.pi:
             w = self.width * scale
@@ -80,15 +92,6 @@ class Rectangle(Shape):
             outline="black", fill="lightgreen", width=1
         )
 
-    def intersects(self, other):
-        x1, y1 = self.x, self.y
-        w1, h1 = self.get_bounding_box()
-        
-        x2, y2 = other.x, other.y
-        w2, h2 = other.get_bounding_box()
-        
-        return not (x1 + w1 <= x2 or x2 + w2 <= x1 or y1 + h1 <= y2 or y2 + h2 <= y1)
-
 
 class IsoscelesTriangle(Shape):
     def __init__(self, base, height=None, x=0, y=0, rotation=0):
@@ -102,33 +105,88 @@ class IsoscelesTriangle(Shape):
         else:  # π/2 rotation
             return (self.height, self.base)
     
-    def draw(self, canvas, scale=1):
+    def get_polygon(self, scale=1):
+        """Vertices of the shape, in canvas coordinates (y pointing down)"""
+        w, h = self.get_bounding_box()
         if self.rotation == 0:
-            points = [
-                self.x, self.y + self.height * scale,
-                self.x + self.base * scale, self.y + self.height * scale,
-                self.x + (self.base * scale) / 2, self.y
-            ]
+            quarter = 0  # Pointe en haut
         elif self.rotation == math.pi/2:
-            points = [
-                self.x, self.y + (self.height * scale) / 2,
-                self.x + self.height * scale, self.y,
-                self.x + self.height * scale, self.y + self.base * scale
-            ]
-        elif self.rotation == math.pi:
-            points = [
-                self.x, self.y,
-                self.x + self.base * scale, self.y,
-                self.x + (self.base * scale) / 2, self.y + self.height * scale
-            ]
-        
+            quarter = 1  # Pointe à gauche, la base verticale à droite
+        else:
+            quarter = 2  # Pointe en bas
+        return triangle_polygon(self.x, self.y, w * scale, h * scale, quarter)
+    
+    def draw(self, canvas, scale=1):
+        points = [coord for vertex in self.get_polygon(scale) for coord in vertex]
         canvas.create_polygon(points, outline="black", fill="pink", width=1)
-        
-    def intersects(self, other):
-        x1, y1 = self.x, self.y
-        w1, h1 = self.get_bounding_box()
-        
-        x2, y2 = other.x, other.y
-        w2, h2 = other.get_bounding_box()
-        
-        return not (x1 + w1 <= x2 or x2 + w2 <= x1 or y1 + h1 <= y2 or y2 + h2 <= y1)
+
+
+# Tolerance so that shapes touching along an edge are not counted as overlapping
+EPSILON = 1e-9
+
+
+def circles_intersect(a, b):
+    dx = (a.x + a.radius) - (b.x + b.radius)
+    dy = (a.y + a.radius) - (b.y + b.radius)
+    reach = a.radius + b.radius - EPSILON
+    return reach > 0 and dx * dx + dy * dy < reach * reach
+
+
+def circle_polygon_intersect(circle, polygon):
+    cx = circle.x + circle.radius
+    cy = circle.y + circle.radius
+    reach = circle.radius - EPSILON
+    if reach <= 0:
+        return False
+    if _point_in_polygon(cx, cy, polygon):
+        return True
+    # Otherwise the circle must cross an edge
+    for i in range(len(polygon)):
+        x1, y1 = polygon[i]
+        x2, y2 = polygon[(i + 1) % len(polygon)]
+        dx, dy = x2 - x1, y2 - y1
+        length = dx * dx + dy * dy
+        t = 0 if length == 0 else max(0, min(1, ((cx - x1) * dx + (cy - y1) * dy) / length))
+        px, py = x1 + t * dx - cx, y1 + t * dy - cy
+        if px * px + py * py < reach * reach:
+            return True
+    return False
+
+
+def polygons_intersect(a, b):
+    """Separating axis test for two convex polygons"""
+    for polygon in (a, b):
+        for i in range(len(polygon)):
+            x1, y1 = polygon[i]
+            x2, y2 = polygon[(i + 1) % len(polygon)]
+            # Normal of the edge
+            nx, ny = y1 - y2, x2 - x1
+            scale = math.hypot(nx, ny)
+            if scale == 0:
+                continue
+            min_a, max_a = _project(a, nx, ny)
+            min_b, max_b = _project(b, nx, ny)
+            if max_a <= min_b + EPSILON * scale or max_b <= min_a + EPSILON * scale:
+                return False
+    return True
+
+
+def _project(polygon, nx, ny):
+    values = [x * nx + y * ny for x, y in polygon]
+    return min(values), max(values)
+
+
+def _point_in_polygon(px, py, polygon):
+    # Strictly on the same side of every edge (convex polygon)
+    sign = 0
+    for i in range(len(polygon)):
+        x1, y1 = polygon[i]
+        x2, y2 = polygon[(i + 1) % len(polygon)]
+        cross = (x2 - x1) * (py - y1) - (y2 - y1) * (px - x1)
+        if cross == 0:
+            return False
+        if sign == 0:
+            sign = 1 if cross > 0 else -1
+        elif (cross > 0) != (sign > 0):
+            return False
+    return True
@@ -0,0 +1,190 @@
+class SpatialIndex:
+    """Index of placed shapes by bounding box, to only test nearby shapes for collisions
+
+    Shapes are hashed into the cells of a uniform grid they cover. Shapes
+    much larger than a cell would fill many cells, so they go to an R-tree
+    instead; both are searched by `query`.
+    """
+
+    def __init__(self, cell_size, large_cells=4):
+        self.cell = cell_size
+        # Shapes spanning more cells than this on a side go to the R-tree
+        self.large = large_cells * cell_size
+        self.grid = {}
+        self.rtree = RTree()
+        self.shapes = []
+
+    def __len__(self):
+        return len(self.shapes)
+
+    def __iter__(self):
+        return iter(self.shapes)
+
+    def insert(self, shape):
+        x, y = shape.x, shape.y
+        w, h = shape.get_bounding_box()
+        self.shapes.append(shape)
+        if w > self.large or h > self.large:
+            self.rtree.insert((x, y, x + w, y + h), shape)
+            return
+        for cell in self._cells(x, y, w, h):
+            self.grid.setdefault(cell, []).append(shape)
+
+    def query(self, x, y, w, h):
+        """Yield the shapes whose bounding box overlaps (x, y, w, h), touching excluded"""
+        cell = self.cell
+        x0, y0 = int(x // cell), int(y // cell)
+        x1, y1 = int((x + w) // cell), int((y + h) // cell)
+        if x0 == x1 and y0 == y1:
+            # A single cell holds each shape once
+            candidates = self.grid.get((x0, y0), ())
+        else:
+            cells = self._cells(x, y, w, h)
+            # A query much larger than the occupied area walks the occupied cells
+            if (x1 - x0 + 1) * (y1 - y0 + 1) > len(self.grid):
+                cells = list(self.grid)
+            seen = set()
+            candidates = []
+            for c in cells:
+                for other in self.grid.get(c, ()):
+                    if id(other) not in seen:
+                        seen.add(id(other))
+                        candidates.append(other)
+        for other in candidates:
+            ow, oh = other.get_bounding_box()
+            if other.x < x + w and x < other.x + ow and other.y < y + h and y < other.y + oh:
+                yield other
+        yield from self.rtree.search((x, y, x + w, y + h))
+
+    def collides(self, shape):
+        w, h = shape.get_bounding_box()
+        for other in self.query(shape.x, shape.y, w, h):
+            if shape.intersects(other):
+                return True
+        return False
+
+    def _cells(self, x, y, w, h):
+        cell = self.cell
+        x0 = int(x // cell)
+        y0 = int(y // cell)
+        # The cell of the far edge is included, so float rounding at a
+        # cell boundary cannot hide a neighbour
+        x1 = int((x + w) // cell)
+        y1 = int((y + h) // cell)
+        for i in range(x0, x1 + 1):
+            for j in range(y0, y1 + 1):
+                yield (i, j)
+
+
+class _Node:
+    __slots__ = ("leaf", "boxes", "children")
+
+    def __init__(self, leaf):
+        self.leaf = leaf
+        self.boxes = []
+        self.children = []
+
+
+class RTree:
+    """R-tree (Guttman, linear split) over boxes (x0, y0, x1, y1)"""
+
+    def __init__(self, max_entries=8):
+        self.max_entries = max_entries
+        self.root = _Node(leaf=True)
+
+    def insert(self, box, item):
+        # Descend along the least enlargement, remembering the path
+        path = []
+        node = self.root
+        while not node.leaf:
+            best = min(range(len(node.boxes)),
+                       key=lambda k: (_area(_union(node.boxes[k], box)) - _area(node.boxes[k]),
+                                      _area(node.boxes[k])))
+            path.append((node, best))
+            node = node.children[best]
+        node.boxes.append(box)
+        node.children.append(item)
+
+        # Split overflowing nodes and grow the boxes on the way up
+        split = self._split(node) if len(node.boxes) > self.max_entries else None
+        for parent, k in reversed(path):
+            child = parent.children[k]
+            parent.boxes[k] = _bounds(child.boxes)
+            if split is not None:
+                parent.boxes.append(_bounds(split.boxes))
+                parent.children.append(split)
+            split = self._split(parent) if len(parent.boxes) > self.max_entries else None
+        if split is not None:
+            root = _Node(leaf=False)
+            root.boxes = [_bounds(self.root.boxes), _bounds(split.boxes)]
+            root.children = [self.root, split]
+            self.root = root
+
+    def search(self, box):
+        """Yield the items whose box overlaps `box`, touching excluded"""
+        x0, y0, x1, y1 = box
+        if not self.root.boxes:
+            return
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            for (bx0, by0, bx1, by1), child in zip(node.boxes, node.children):
+                if bx0 < x1 and x0 < bx1 and by0 < y1 and y0 < by1:
+                    if node.leaf:
+                        yield child
+                    else:
+                        stack.append(child)
+
+    def _split(self, node):
+        """Move part of the entries of `node` to a new sibling and return it"""
+        entries = list(zip(node.boxes, node.children))
+        # Seeds: the pair furthest apart along the most spread out axis, the
+        # entry with the highest low side and the one with the lowest high side
+        seeds = None
+        for axis in (0, 1):
+            first = max(range(len(entries)), key=lambda k: entries[k][0][axis])
+            second = min(range(len(entries)), key=lambda k: entries[k][0][axis + 2])
+            lo = min(b[axis] for b, _ in entries)
+            hi = max(b[axis + 2] for b, _ in entries)
+            spread = (entries[first][0][axis] - entries[second][0][axis + 2]) / ((hi - lo) or 1)
+            if first != second and (seeds is None or spread > seeds[0]):
+                seeds = (spread, first, second)
+        if seeds is None:
+            first, second = 0, 1
+        else:
+            _, first, second = seeds
+
+        sibling = _Node(node.leaf)
+        groups = [([entries[first][0]], [entries[first][1]]),
+                  ([entries[second][0]], [entries[second][1]])]
+        bounds = [entries[first][0], entries[second][0]]
+        rest = [e for k, e in enumerate(entries) if k != first and k != second]
+        min_entries = self.max_entries // 2
+        for k, (box, child) in enumerate(rest):
+            left = len(rest) - k
+            if len(groups[0][0]) + left <= min_entries:
+                g = 0
+            elif len(groups[1][0]) + left <= min_entries:
+                g = 1
+            else:
+                growth = [_area(_union(bounds[i], box)) - _area(bounds[i]) for i in (0, 1)]
+                g = 0 if growth[0] <= growth[1] else 1
+            groups[g][0].append(box)
+            groups[g][1].append(child)
+            bounds[g] = _union(bounds[g], box)
+        node.boxes, node.children = groups[0]
+        sibling.boxes, sibling.children = groups[1]
+        return sibling
+
+
+def _area(box):
+    return (box[2] - box[0]) * (box[3] - box[1])
+
+
+def _union(a, b):
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+
+def _bounds(boxes):
+    return (min(b[0] for b in boxes), min(b[1] for b in boxes),
+            max(b[2] for b in boxes), max(b[3] for b in boxes))
@@ -0,0 +1,40 @@
+"""cli.py records of the shape algorithms"""
+import json
+
+import pytest
+
+from cli import main, parse_shape, solve
+from shapes import Circle, IsoscelesTriangle, Rectangle
+
+INSTANCE = {"id": "a", "width": 50, "height": 40,
+            "shapes": [["Rectangle", 10, 5], ["Circle", 4], {"kind": "IsoscelesTriangle", "base": 6},
+                       ["IsoscelesTriangle", 8, 3]]}
+
+
+def test_parse_shape():
+    assert isinstance(parse_shape(["Circle", 2]), Circle)
+    assert isinstance(parse_shape({"kind": "Rectangle", "width": 1, "height": 2}), Rectangle)
+    triangle = parse_shape(["IsoscelesTriangle", 2])
+    assert isinstance(triangle, IsoscelesTriangle) and triangle.height == pytest.approx(3 ** 0.5)
+    with pytest.raises(ValueError):
+        parse_shape(["Hexagon", 1])
+
+
+@pytest.mark.parametrize("algorithm", ["nfdh", "ffdh", "brute_force_2d"])
+def test_records_hold_every_placement(algorithm):
+    options = {"max_time": 1} if algorithm == "brute_force_2d" else {}
+    record = json.loads(json.dumps(solve(algorithm, dict(INSTANCE), options)))
+    assert "error" not in record
+    assert (record["width"], record["height"]) == (50, 40)
+    placements = [p for shelf in record["shelves"] for p in shelf]
+    assert sorted(p[0] for p in placements) == [0, 1, 2, 3]
+    assert {p[1] for p in placements} == {"Rectangle", "Circle", "IsoscelesTriangle"}
+
+
+def test_errors_are_reported(tmp_path, capsys):
+    path = tmp_path / "instances.ndjson"
+    path.write_text(json.dumps(INSTANCE) + "\n" + json.dumps({"shapes": [["Circle", 1]]}) + "\n")
+    assert main(["ffdh", str(path)]) == 1
+    first, second = map(json.loads, capsys.readouterr().out.splitlines())
+    assert first["id"] == "a" and "shelves" in first
+    assert second["error"] == "ValueError: Missing container width or height"
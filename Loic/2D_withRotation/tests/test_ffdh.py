@@ -0,0 +1,47 @@
+"""ffdh on containers far from square"""
+import random
+import time
+
+from algorithms_2d import ffdh
+from shapes import Circle, IsoscelesTriangle, Rectangle
+
+
+def random_shapes(rng, count):
+    shapes = []
+    for _ in range(count):
+        kind = rng.randrange(3)
+        if kind == 0:
+            shapes.append(Rectangle(rng.uniform(1, 20), rng.uniform(1, 20)))
+        elif kind == 1:
+            shapes.append(Circle(rng.uniform(1, 10)))
+        else:
+            shapes.append(IsoscelesTriangle(rng.uniform(1, 20), rng.uniform(1, 20)))
+    return shapes
+
+
+def elapsed(shapes, width, height):
+    start = time.perf_counter()
+    placements = [p for shelf in ffdh(shapes, width, height) for p in shelf]
+    assert len(placements) == len(shapes)
+    return time.perf_counter() - start, placements
+
+
+def test_tall_strip_scales_linearly():
+    # A grid cell wider than the strip put every shape in one column of
+    # cells, and each collision check went through all placed shapes
+    rng = random.Random(0)
+    small, _ = elapsed(random_shapes(rng, 1000), 1000, 10 ** 6)
+    large, _ = elapsed(random_shapes(rng, 8000), 1000, 10 ** 6)
+    # 8 times the shapes: 64 times the time if quadratic
+    assert large < 20 * max(small, 0.01)
+
+
+def test_tall_strip_placements_do_not_overlap():
+    rng = random.Random(1)
+    _, placements = elapsed(random_shapes(rng, 300), 100, 10 ** 6)
+    shapes = [p.to_shape() for p in placements]
+    for p in placements:
+        assert 0 <= p.x and p.x + p.width <= 100 + 1e-9
+    for i, a in enumerate(shapes):
+        for b in shapes[i + 1:]:
+            assert not a.intersects(b)
@@ -1,49 +1,284 @@
-from shapes import Circle
+import math
+import tkinter as tk
+import weakref
+from collections import defaultdict
+
+from placement import Placement
+
+# Canvas item kind and fill of each shape type
+KINDS = {"Circle": ("oval", "lightblue"), "Rectangle": ("rectangle", "lightgreen"),
+         "IsoscelesTriangle": ("polygon", "pink")}
+
+# Side of the raster tiles, in pixels
+TILE = 64
+
+# Above this many shapes with their corner in one tile, they are painted
+# into the tile rather than drawn as canvas items
+DENSE = 256
+
+# Above this many shapes to draw as items, the densest tiles are painted
+# until they are fewer
+MAX_ITEMS = 4096
+
+_renderers = weakref.WeakKeyDictionary()
+
+
+class ViewTransform:
+    """Container units to canvas pixels: scaled, then shifted"""
+
+    def __init__(self, scale, offset_x=0, offset_y=0):
+        self.scale = scale
+        self.offset_x = offset_x
+        self.offset_y = offset_y
+
+    @classmethod
+    def fit(cls, container_width, container_height, width, height, padding=0):
+        """Largest scale showing the container centered in `width` x `height` pixels"""
+        scale = min((width - 2 * padding) / container_width, (height - 2 * padding) / container_height)
+        scale = max(scale, 1e-6)
+        return cls(scale, (width - container_width * scale) / 2, (height - container_height * scale) / 2)
+
+    def point(self, x, y):
+        return (self.offset_x + x * self.scale, self.offset_y + y * self.scale)
+
+    def coords(self, points):
+        """Flat list of canvas coordinates of `points`"""
+        return [coord for x, y in points for coord in self.point(x, y)]
+
+
+class PackingRenderer:
+    """Retained-mode drawing of a packing on a Tk canvas
+
+    draw() keeps the placements, redraw() maps them to the current size
+    of the canvas through a ViewTransform; nothing of the packing is
+    recomputed or modified. The canvas items of the previous drawing
+    are reused (moved with coords(), hidden when not needed) instead of
+    being deleted and created again. Shapes smaller than a pixel,
+    and those of tiles holding more than DENSE of them (or the densest
+    tiles when there are more than MAX_ITEMS in all), are painted into
+    PhotoImage tiles of TILE pixels. A resize of the canvas redraws the
+    same layout at the new scale.
+    """
+
+    def __init__(self, canvas, padding=20):
+        self.canvas = canvas
+        self.padding = padding
+        self.layout = []
+        self.container = None
+        self.size = None
+        self.pending = None
+        self._reset()
+        canvas.bind("<Configure>", self._on_configure, add="+")
+
+    def draw(self, shelves, container_width, container_height):
+        """Show `shelves` (lists of Placement) in a container of the given size"""
+        # Vertices are kept in container units, only the transform changes on a resize
+        self.layout = []
+        for shelf in shelves:
+            for k, placement in enumerate(shelf):
+                if not isinstance(placement, Placement):
+                    # A positioned Shape, as the algorithms used to return
+                    placement = Placement.of(k, placement)
+                self.layout.append((placement, placement.polygon()))
+        self.container = (container_width, container_height) if self.layout else None
+        self.redraw()
+
+    def clear(self):
+        self.layout = []
+        self.container = None
+        self.redraw()
+
+    def redraw(self):
+        canvas = self.canvas
+        if self.pending is not None:
+            canvas.after_cancel(self.pending)
+            self.pending = None
+        if self.frame is not None and not canvas.find_withtag(self.frame):
+            # The items were deleted behind our back (canvas.delete("all"))
+            self._reset()
+        if self.container is None:
+            for kind in self.items:
+                self._hide(kind, 0)
+            self._hide("tiles", 0)
+            for item in (self.frame, self.info):
+                if item is not None:
+                    canvas.itemconfigure(item, state="hidden")
+            return
+
+        width, height = self._canvas_size()
+        self.size = (width, height)
+        container_width, container_height = self.container
+        view = ViewTransform.fit(container_width, container_height, width, height, self.padding)
+        scale = view.scale
+
+        drawn = []
+        counts = defaultdict(int)
+        painted = []
+        for placement, polygon in self.layout:
+            x, y, w, h = placement.bbox
+            # Pixels from the container corner
+            x0, y0 = x * scale, y * scale
+            x1, y1 = (x + w) * scale, (y + h) * scale
+            if x1 - x0 < 1 or y1 - y0 < 1:
+                painted.append((placement, polygon, x0, y0, x1, y1))
+                continue
+            tile = (int(x0 // TILE), int(y0 // TILE))
+            counts[tile] += 1
+            drawn.append((tile, placement, polygon, x0, y0, x1, y1))
+
+        dense = {tile for tile, count in counts.items() if count > DENSE}
+        remaining = len(drawn) - sum(counts[tile] for tile in dense)
+        for tile in sorted(counts, key=counts.get, reverse=True):
+            if remaining <= MAX_ITEMS:
+                break
+            if tile not in dense:
+                dense.add(tile)
+                remaining -= counts[tile]
+
+        used = dict.fromkeys(self.items, 0)
+        for tile, placement, polygon, x0, y0, x1, y1 in drawn:
+            if tile in dense:
+                painted.append((placement, polygon, x0, y0, x1, y1))
+                continue
+            kind, fill = KINDS[placement.kind]
+            if kind == "polygon":
+                coords = view.coords(polygon)
+            else:
+                coords = [view.offset_x + x0, view.offset_y + y0, view.offset_x + x1, view.offset_y + y1]
+            pool = self.items[kind]
+            if used[kind] < len(pool):
+                item = pool[used[kind]]
+                canvas.coords(item, *coords)
+                canvas.itemconfigure(item, state="normal")
+            else:
+                create = getattr(canvas, "create_" + kind)
+                pool.append(create(*coords, outline="black", fill=fill, width=1, tags="packing"))
+            used[kind] += 1
+        for kind, count in used.items():
+            self._hide(kind, count)
+        self._paint(painted, view, math.ceil(container_width * scale), math.ceil(container_height * scale))
+
+        offset_x, offset_y = view.offset_x, view.offset_y
+        frame = (offset_x, offset_y) + view.point(container_width, container_height)
+        if self.frame is None:
+            self.frame = canvas.create_rectangle(*frame, outline="black", width=2, tags="container")
+            self.info = canvas.create_text(offset_x + 10, offset_y + 10, anchor="nw", fill="black",
+                                           tags="info")
+        else:
+            canvas.coords(self.frame, *frame)
+            canvas.coords(self.info, offset_x + 10, offset_y + 10)
+            canvas.itemconfigure(self.frame, state="normal")
+        canvas.itemconfigure(self.info, text=f"Container: {container_width}×{container_height}",
+                             state="normal")
+        canvas.tag_lower("packing_tile")
+        canvas.tag_raise(self.frame)
+        canvas.tag_raise(self.info)
+
+    def _paint(self, painted, view, width, height):
+        """Paint the shapes of `painted` into the tiles they cover"""
+        pixels = {}
+        for placement, polygon, x0, y0, x1, y1 in painted:
+            # PhotoImage data takes color names as the canvas items do
+            color = KINDS[placement.kind][1]
+            left = min(int(x0), width - 1)
+            top = min(int(y0), height - 1)
+            right = min(max(left + 1, math.ceil(x1)), width)
+            bottom = min(max(top + 1, math.ceil(y1)), height)
+            inside = _inside(placement, polygon, view.scale)
+            spans = []
+            for py in range(top, bottom):
+                row = [px for px in range(left, right) if inside(px + 0.5, py + 0.5)]
+                if row:
+                    spans.append((py, row[0], row[-1] + 1))
+            if not spans:
+                # Smaller than a pixel: still shown, as one
+                spans = [(top, left, left + 1)]
+            for py, a, b in spans:
+                ty = py // TILE
+                for tx in range(a // TILE, (b - 1) // TILE + 1):
+                    rows = pixels.get((tx, ty))
+                    if rows is None:
+                        tile_width = min(TILE, width - tx * TILE)
+                        tile_height = min(TILE, height - ty * TILE)
+                        rows = pixels[(tx, ty)] = [["#ffffff"] * tile_width for _ in range(tile_height)]
+                    row = rows[py - ty * TILE]
+                    start = max(a - tx * TILE, 0)
+                    end = min(b - tx * TILE, len(row))
+                    row[start:end] = [color] * (end - start)
+
+        canvas = self.canvas
+        for k, ((tx, ty), rows) in enumerate(pixels.items()):
+            if k == len(self.tiles):
+                self.images.append(tk.PhotoImage(master=canvas))
+                self.tiles.append(canvas.create_image(0, 0, anchor="nw", image=self.images[k],
+                                                      tags=("packing", "packing_tile")))
+            image = self.images[k]
+            image.configure(width=len(rows[0]), height=len(rows))
+            image.put(" ".join("{" + " ".join(row) + "}" for row in rows), to=(0, 0))
+            canvas.coords(self.tiles[k], view.offset_x + tx * TILE, view.offset_y + ty * TILE)
+            canvas.itemconfigure(self.tiles[k], state="normal")
+        self._hide("tiles", len(pixels))
+
+    def _hide(self, name, used):
+        # Only the items shown by the previous drawing need hiding
+        pool = self.tiles if name == "tiles" else self.items[name]
+        for item in pool[used:self.shown.get(name, len(pool))]:
+            self.canvas.itemconfigure(item, state="hidden")
+        self.shown[name] = used
+
+    def _reset(self):
+        self.items = {"oval": [], "rectangle": [], "polygon": []}
+        self.tiles = []
+        self.images = []
+        self.frame = None
+        self.info = None
+        self.shown = {}
+
+    def _canvas_size(self):
+        width, height = self.canvas.winfo_width(), self.canvas.winfo_height()
+        # Not mapped yet
+        if width <= 1 or height <= 1:
+            width, height = self.canvas.winfo_reqwidth(), self.canvas.winfo_reqheight()
+        return width, height
+
+    def _on_configure(self, event):
+        if self.container is None or (event.width, event.height) == self.size:
+            return
+        # A resize sends many events, the drawing is redone once they stop
+        if self.pending is None:
+            self.pending = self.canvas.after_idle(self.redraw)
+
+
+def _inside(placement, polygon, scale):
+    """Test of a point, in pixels from the container corner, against the placed shape"""
+    if placement.kind == "Circle":
+        r = placement.width / 2 * scale
+        cx, cy = placement.x * scale + r, placement.y * scale + r
+        return lambda px, py: (px - cx) ** 2 + (py - cy) ** 2 <= r * r
+    if placement.kind == "IsoscelesTriangle":
+        polygon = [(px * scale, py * scale) for px, py in polygon]
+
+        def inside(px, py):
+            signs = set()
+            for i in range(3):
+                (x1, y1), (x2, y2) = polygon[i], polygon[(i + 1) % 3]
+                cross = (x2 - x1) * (py - y1) - (y2 - y1) * (px - x1)
+                if cross:
+                    signs.add(cross > 0)
+            return len(signs) < 2
+        return inside
+    return lambda px, py: True
+
 
 def draw_packing(canvas, shelves, container_width, container_height, padding=20):
-    """Draw the packing result on the canvas with proper scaling and centering"""
-    canvas.delete("all")
-    
-    if not shelves:
-        return
-    
-    canvas_width = canvas.winfo_width()
-    canvas_height = canvas.winfo_height()
-    
-    available_width = canvas_width - 2 * padding
-    available_height = canvas_height - 2 * padding
-    
-    scale_x = available_width / container_width
-    scale_y = available_height / container_height
-    scale = min(scale_x, scale_y)
-    
-    offset_x = (canvas_width - container_width * scale) / 2
-    offset_y = (canvas_height - container_height * scale) / 2
-    
-    canvas.create_rectangle(
-        offset_x, 
-        offset_y,
-        offset_x + container_width * scale,
-        offset_y + container_height * scale,
-        outline="black", width=2, tags="container"
-    )
-    
-    for shelf in shelves:
-        for (shape) in shelf:
-            shape.x = offset_x + shape.x * scale
-            shape.y = offset_y + shape.y * scale
-            
-            original_scale = scale
-            if isinstance(shape, Circle):
-                original_scale = scale
-            
-            shape.draw(canvas, original_scale)
-    
-    canvas.create_text(
-        offset_x + 10, 
-        offset_y + 10,
-        text=f"Container: {container_width}×{container_height}",
-        anchor="nw", 
-        fill="black",
-        tags="info"
-    )
\ No newline at end of file
+    """Draw the packing result on the canvas with proper scaling and centering
+
+    The items of the previous drawing on this canvas are reused, see
+    PackingRenderer; the placements are not modified.
+    """
+    renderer = _renderers.get(canvas)
+    if renderer is None:
+        renderer = _renderers[canvas] = PackingRenderer(canvas, padding)
+    renderer.padding = padding
+    renderer.draw(shelves, container_width, container_height)
+    return renderer
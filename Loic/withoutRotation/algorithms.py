@@ -1,60 +1,448 @@
-def first_fit(items, bin_capacity):
+from bisect import bisect_left, bisect_right
+from math import ceil
+
+from load_index import LoadHeap, LoadOrder
+from segment_tree import LoadTree
+
+def first_fit(items, bin_capacity, assignment=None):
+    """First-Fit; `assignment`, if given, receives the bin index of each item"""
     bins = []
+    # Bins not opened yet have a zero load, so the leftmost slot that
+    # accepts the item is either an open bin or the next one to open.
+    loads = LoadTree(len(items))
     for item in items:
-        placed = False
-        for bin in bins:
-            if sum(bin) + item <= bin_capacity:
-                bin.append(item)
-                placed = True
-                break
-        if not placed:
+        index = loads.find(item, bin_capacity)
+        if index == -1:
+            index = len(bins)
+        if index == len(bins):
             bins.append([item])
+        else:
+            bins[index].append(item)
+        loads.add(index, item)
+        if assignment is not None:
+            assignment.append(index)
     return bins
 
-def best_fit(items, bin_capacity):
+def best_fit(items, bin_capacity, assignment=None):
+    """Best-Fit; `assignment`, if given, receives the bin index of each item"""
     bins = []
+    loads = []
+    # Bins that cannot take even the smallest item are left out of the index
+    order = LoadOrder()
+    smallest = min(items, default=0)
     for item in items:
-        best_bin = None
-        min_space = bin_capacity
-        for bin in bins:
-            space = bin_capacity - (sum(bin) + item)
-            if 0 <= space < min_space:
-                min_space = space
-                best_bin = bin
-        
-        if best_bin is not None:
-            best_bin.append(item)
+        best_bin = order.find(item, bin_capacity)
+        if best_bin != -1:
+            order.remove(best_bin, loads[best_bin])
+            bins[best_bin].append(item)
+            loads[best_bin] += item
         else:
+            best_bin = len(bins)
             bins.append([item])
+            loads.append(item)
+        if loads[best_bin] + smallest <= bin_capacity:
+            order.add(best_bin, loads[best_bin])
+        if assignment is not None:
+            assignment.append(best_bin)
     return bins
 
-def worst_fit(items, bin_capacity):
+def worst_fit(items, bin_capacity, assignment=None):
+    """Worst-Fit; `assignment`, if given, receives the bin index of each item"""
     bins = []
+    loads = []
+    heap = LoadHeap()
     for item in items:
-        max_space = -1
-        worst_bin = None
-        for bin in bins:
-            space = bin_capacity - (sum(bin) + item)
-            if space > max_space and space >= 0:
-                max_space = space
-                worst_bin = bin
-        
-        if worst_bin is not None:
-            worst_bin.append(item)
+        index = heap.find(item, bin_capacity)
+        if index != -1:
+            heap.remove(index, loads[index])
+            bins[index].append(item)
+            loads[index] += item
         else:
+            index = len(bins)
             bins.append([item])
+            loads.append(item)
+        heap.add(index, loads[index])
+        if assignment is not None:
+            assignment.append(index)
     return bins
 
-def brute_force(items, bin_capacity):
-    from itertools import permutations
+def lower_bound(items, bin_capacity):
+    """Martello-Toth L2 lower bound on the number of bins (includes L1)"""
+    sizes = sorted(items)
+    n = len(sizes)
+    # prefix[i] = sum of the i smallest sizes
+    prefix = [0]
+    for s in sizes:
+        prefix.append(prefix[-1] + s)
+    bound = _ceil(prefix[n] / bin_capacity)
+    half = bin_capacity / 2
+    above_half = bisect_right(sizes, half)
+    # alpha = 0 plus every distinct small size
+    for alpha in {0, *sizes[:above_half]}:
+        small = bisect_left(sizes, alpha)
+        big = bisect_right(sizes, bin_capacity - alpha)
+        medium = big - above_half
+        free = medium * bin_capacity - (prefix[big] - prefix[above_half])
+        small_sum = prefix[above_half] - prefix[small]
+        bound = max(bound, n - above_half + max(0, _ceil((small_sum - free) / bin_capacity)))
+    return bound
+
+def _ceil(value):
+    # Tolerate the rounding of float sums such as 0.1 + 0.2
+    return ceil(value - 1e-9)
+
+def brute_force(items, bin_capacity, max_time=None, workers=None, progress=None, cancel=None,
+                stats=None):
+    """Exact solver (branch-and-bound), returns the bins of an optimal packing
+
+    Two complete searches look for a packing with as many bins as the
+    current lower bound (L2 at first):
+    - bin completion: bins are filled one at a time, each with the largest
+      item left and an undominated set of the others, fullest first; the
+      known waste allowance cuts most completions;
+    - item by item: items in decreasing order go into the fullest bin they
+      fit first, with identical items kept in order and exact fits forced.
+    Each one is much faster than the other on some instances, so they are
+    written as generators and run in turn for short time slices. A search
+    that ends without a packing proves the bound can be raised by one.
+    With `max_time` (seconds) the best packing found so far is returned
+    when the time is up. With `workers` > 1 the searches run in that many
+    processes (see _parallel_search). `progress`, if given, is called
+    with the best bins and the lower bound each time one of them
+    changes; setting `cancel` (a threading.Event or anything with
+    is_set()) stops the search like the deadline does. `stats`, if given
+    (a dict), receives the lower bound proved ("bound") and whether the
+    packing returned is proved optimal ("complete"), as in
+    branch_and_bound_2d.
+    """
+    import sys
+    import time
+    
+    # Oversized items get a bin of their own, like in the heuristics; all
+    # the items are sorted, so the order given does not change the result
+    items = sorted(items, reverse=True)
+    oversized = [[item] for item in items if item > bin_capacity]
+    sizes = [item for item in items if item <= bin_capacity]
+    if not sizes:
+        if stats is not None:
+            stats.update(bound=len(oversized), complete=True)
+        return oversized
+    
+    best_bins = first_fit(sizes, bin_capacity)
+    other = best_fit(sizes, bin_capacity)
+    if len(other) < len(best_bins):
+        best_bins = other
+    lower = lower_bound(sizes, bin_capacity)
+    
+    report = None
+    if progress is not None:
+        report = lambda bins, lower: progress(bins + oversized, lower + len(oversized))
+        report(best_bins, lower)
+    deadline = None if max_time is None else time.time() + max_time
+    if workers is not None and workers > 1:
+        bins, lower = _parallel_search(sizes, bin_capacity, lower, best_bins, deadline, workers,
+                                       report, cancel)
+    else:
+        by_completion, by_item = _searches(sizes, bin_capacity)
+        # Resuming a generator goes down the whole chain of nested searches
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(max(limit, 2 * len(sizes) + 100))
+        try:
+            bins, lower = _alternate(by_completion, by_item, lower, best_bins, deadline,
+                                     report, cancel)
+        finally:
+            sys.setrecursionlimit(limit)
+    if stats is not None:
+        # Stopped by the deadline or `cancel`, the bound is still below the packing
+        stats.update(bound=lower + len(oversized), complete=len(bins) <= lower)
+    return bins + oversized
+
+def _searches(sizes, bin_capacity):
+    """The two complete searches of brute_force, as generator functions of the target"""
+    n = len(sizes)
+    total = sum(sizes)
+    remaining = [0] * (n + 1)
+    for i in range(n - 1, -1, -1):
+        remaining[i] = remaining[i + 1] + sizes[i]
+    values = sorted(set(sizes), reverse=True)
+    counts = dict.fromkeys(values, 0)
+    for size in sizes:
+        counts[size] += 1
+    visited = [0]
+    
+    def by_completion(target, shard=None):
+        bins = []
+        
+        def completions(space, min_fill):
+            """Undominated sets of remaining items that fit in `space`"""
+            available = [(v, counts[v]) for v in values if counts[v] and v <= space]
+            reach = [0] * (len(available) + 1)
+            for k in range(len(available) - 1, -1, -1):
+                v, c = available[k]
+                reach[k] = reach[k + 1] + v * c
+            found = []
+            chosen = []
+            
+            def extend(k, fill):
+                # Skip the values that no longer fit
+                while k < len(available) and fill + available[k][0] > space:
+                    k += 1
+                if k == len(available) or fill + reach[k] < min_fill:
+                    if fill >= min_fill and _undominated(chosen, space - fill, available):
+                        found.append((fill, chosen[:]))
+                    return
+                v, c = available[k]
+                most = 0
+                while most < c and fill + v * (most + 1) <= space:
+                    most += 1
+                # Larger multiplicities first, then skip the value
+                for m in range(most, -1, -1):
+                    chosen.extend([v] * m)
+                    extend(k + 1, fill + v * m)
+                    del chosen[len(chosen) - m:]
+            
+            extend(0, 0)
+            found.sort(key=lambda f: -f[0])
+            return found
+        
+        def fill_bins(left, waste, allowed):
+            if not left:
+                return True
+            visited[0] += 1
+            if visited[0] % 64 == 0:
+                yield
+            rest = [v for v in values for _ in range(counts[v])]
+            if len(bins) + lower_bound(rest, bin_capacity) > target:
+                return False
+            
+            first = rest[0]
+            counts[first] -= 1
+            space = bin_capacity - first
+            options = completions(space, space - (allowed - waste))
+            if shard is not None and not bins:
+                # Only this shard's share of the completions of the first bin
+                options = options[shard[0]::shard[1]]
+            for fill, chosen in options:
+                for v in chosen:
+                    counts[v] -= 1
+                bins.append([first] + chosen)
+                done = yield from fill_bins(left - 1 - len(chosen), waste + space - fill, allowed)
+                for v in chosen:
+                    counts[v] += 1
+                if done:
+                    counts[first] += 1
+                    return True
+                bins.pop()
+            counts[first] += 1
+            return False
+        
+        try:
+            if (yield from fill_bins(n, 0, target * bin_capacity - total)):
+                return bins
+        finally:
+            # Leave the counts whole when the search is dropped halfway
+            for size in sizes:
+                counts[size] = 0
+            for size in sizes:
+                counts[size] += 1
+        return None
+    
+    def by_item(target):
+        loads = []
+        assignment = [0] * n
+        
+        def place(i, previous_load):
+            if i == n:
+                return True
+            visited[0] += 1
+            if visited[0] % 64 == 0:
+                yield
+            # Space that no remaining item can use is lost
+            free = sum(bin_capacity - load for load in loads if bin_capacity - load >= sizes[-1])
+            if len(loads) + _ceil((remaining[i] - free) / bin_capacity) > target:
+                return False
+            
+            item = sizes[i]
+            same_as_previous = i > 0 and sizes[i - 1] == item
+            previous_bin = assignment[i - 1] if same_as_previous else -1
+            tried = set()
+            for b in sorted(range(len(loads)), key=lambda b: -loads[b]):
+                load = loads[b]
+                if load + item > bin_capacity or load in tried:
+                    continue
+                # Identical items go into bins in decreasing order of load
+                if same_as_previous and b != previous_bin and load > previous_load:
+                    continue
+                tried.add(load)
+                loads[b] += item
+                assignment[i] = b
+                if (yield from place(i + 1, previous_load if b == previous_bin else load)):
+                    return True
+                loads[b] = load
+                if load + item == bin_capacity:
+                    # An exact fit is never worse than any other choice
+                    return False
+            if len(loads) < target:
+                loads.append(item)
+                assignment[i] = len(loads) - 1
+                if (yield from place(i + 1, 0)):
+                    return True
+                loads.pop()
+            return False
+        
+        if not (yield from place(0, 0)):
+            return None
+        bins = [[] for _ in loads]
+        for size, b in zip(sizes, assignment):
+            bins[b].append(size)
+        return bins
+    
+    return by_completion, by_item
+
+def _alternate(by_completion, by_item, lower, best_bins, deadline, progress=None, cancel=None):
+    """Run both searches in turn for `lower`, `lower + 1`, ... bins, return (bins, lower bound)"""
+    import time
     
-    min_bins = len(items)  
+    while lower < len(best_bins):
+        searches = [by_completion(lower), by_item(lower)]
+        try:
+            while True:
+                for search in searches:
+                    end = time.time() + 0.05
+                    while time.time() < end:
+                        next(search)
+                if deadline is not None and time.time() > deadline:
+                    return best_bins, lower
+                if cancel is not None and cancel.is_set():
+                    return best_bins, lower
+        except StopIteration as stop:
+            if stop.value is not None:
+                if progress is not None:
+                    progress(stop.value, lower)
+                return stop.value, lower
+            # The whole tree was searched: `lower` bins are not enough
+            lower += 1
+            if progress is not None:
+                progress(best_bins, lower)
+        finally:
+            for search in searches:
+                search.close()
+    return best_bins, lower
+
+def _parallel_search(sizes, bin_capacity, lower, best_bins, deadline, workers,
+                     progress=None, cancel=None):
+    """brute_force over a process pool, returns (bins, lower bound)
+
+    For each number of bins from `lower` to the best known minus one, the
+    bin completion search is split in shards by the completions of its
+    first bin, and the item by item search runs whole next to them. A
+    target is proved too small when every shard (or the item search)
+    ends without a packing. The smallest packing found so far is shared
+    between the workers, which drop any search for at least that many
+    bins.
+    """
+    import multiprocessing
+    import time
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
     
-    for perm in permutations(items):
-        bins = first_fit(perm, bin_capacity)
-        if len(bins) < min_bins:
-            min_bins = len(bins)
-            if min_bins == 1:  
+    shards = 4 * workers
+    shared_best = multiprocessing.Value("i", len(best_bins))
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   initargs=(shared_best,))
+    tasks = {}
+    left = {}
+    try:
+        for target in range(lower, len(best_bins)):
+            left[target] = shards
+            future = executor.submit(_search_task, sizes, bin_capacity, target,
+                                     "item", None, deadline)
+            tasks[future] = (target, "item")
+            for shard in range(shards):
+                future = executor.submit(_search_task, sizes, bin_capacity, target,
+                                         "completion", (shard, shards), deadline)
+                tasks[future] = (target, "completion")
+        
+        pending = set(tasks)
+        while lower < len(best_bins) and pending:
+            timeout = None if deadline is None else max(deadline - time.time(), 0)
+            if cancel is not None:
+                timeout = 0.1 if timeout is None else min(timeout, 0.1)
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if cancel is not None and cancel.is_set():
                 break
+            if not done:
+                if deadline is None or time.time() < deadline:
+                    continue
+                break
+            bins_before, lower_before = len(best_bins), lower
+            for future in done:
+                target, method = tasks[future]
+                status, bins = future.result()
+                if status == "found" and len(bins) < len(best_bins):
+                    best_bins = bins
+                    with shared_best.get_lock():
+                        shared_best.value = min(shared_best.value, len(bins))
+                elif status == "infeasible":
+                    if method == "item":
+                        left[target] = 0
+                    elif left[target]:
+                        left[target] -= 1
+            while lower < len(best_bins) and not left[lower]:
+                lower += 1
+            if progress is not None and (len(best_bins), lower) != (bins_before, lower_before):
+                progress(best_bins, lower)
+        return best_bins, lower
+    finally:
+        # Stop the searches still running
+        shared_best.value = 0
+        executor.shutdown(wait=False, cancel_futures=True)
+
+_shared_best = None
+
+def _init_worker(shared_best):
+    global _shared_best
+    _shared_best = shared_best
+
+def _search_task(sizes, bin_capacity, target, method, shard, deadline):
+    """Run one search of _parallel_search, return (status, bins)"""
+    import sys
+    import time
     
-    return min_bins
\ No newline at end of file
+    by_completion, by_item = _searches(sizes, bin_capacity)
+    search = by_completion(target, shard) if method == "completion" else by_item(target)
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 2 * len(sizes) + 100))
+    try:
+        while True:
+            next(search)
+            # A packing with `target` bins or fewer is already known
+            if _shared_best is not None and _shared_best.value <= target:
+                return "stopped", None
+            if deadline is not None and time.time() > deadline:
+                return "stopped", None
+    except StopIteration as stop:
+        if stop.value is None:
+            return "infeasible", None
+        return "found", stop.value
+    finally:
+        search.close()
+
+def _undominated(chosen, leftover, available):
+    left = dict(available)
+    for v in chosen:
+        left[v] -= 1
+    unused = [v for v, c in left.items() if c]
+    # The bin must be maximal: no other item fits in what is left
+    if unused and unused[-1] <= leftover:
+        return False
+    # Swapping one, two or all chosen items for a single larger one is
+    # never worse
+    fill = sum(chosen)
+    if len(chosen) > 1 and any(fill <= v <= fill + leftover for v in unused):
+        return False
+    for i, a in enumerate(chosen):
+        if any(a < v <= a + leftover for v in unused):
+            return False
+        for b in chosen[i + 1:]:
+            if any(a + b <= v <= a + b + leftover for v in unused):
+                return False
+    return True
@@ -1,193 +1,200 @@
-def nfdh(rectangles, container_width, container_height):
-    sorted_rects = sorted(rectangles, key=lambda x: -x[1]) 
-    
-    shelves = []
-    current_shelf = []
-    current_y = 0
-    current_shelf_height = 0
-    
-    for rect in sorted_rects:
-        w, h = rect
-        if not current_shelf:
-            if w <= container_width and h <= container_height - current_y:
-                current_shelf.append((0, current_y, w, h))
-                current_shelf_height = h
-            else:
-                continue
-        else:
-            last_rect = current_shelf[-1]
-            next_x = last_rect[0] + last_rect[2]
-            if next_x + w <= container_width:
-                current_shelf.append((next_x, current_y, w, h))
-            else:
-                shelves.append(current_shelf)
-                current_y += current_shelf_height
-                if h <= container_height - current_y:
-                    current_shelf = [(0, current_y, w, h)]
-                    current_shelf_height = h
-                else:
-                    current_shelf = []
-                    continue
-    
-    if current_shelf:
-        shelves.append(current_shelf)
-    
-    return shelves
-
-def ffdh(rectangles, container_width, container_height):
-    sorted_rects = sorted(rectangles, key=lambda x: -x[1])  # Tri par hauteur décroissant
-    
-    shelves = []
-    
-    for rect in sorted_rects:
-        w, h = rect
-        placed = False
-        
-        for shelf in shelves:
-            shelf_height = shelf[0][3]
-            if h <= shelf_height:
-                last_rect = shelf[-1]
-                available_width = container_width - (last_rect[0] + last_rect[2])
-                if w <= available_width:
-                    shelf.append((last_rect[0] + last_rect[2], last_rect[1], w, h))
-                    placed = True
-                    break
-        
-        if not placed:
-            if not shelves:
-                if h <= container_height:
-                    shelves.append([(0, 0, w, h)])
-            else:
-                last_shelf = shelves[-1]
-                last_rect = last_shelf[-1]
-                new_y = last_rect[1] + last_rect[3]
-                if new_y + h <= container_height:
-                    shelves.append([(0, new_y, w, h)])
-    
-    return shelves
-
-def best_fit_2d(rectangles, container_width, container_height):
-    """Best-Fit algorithm for 2D packing"""
-    sorted_rects = sorted(rectangles, key=lambda x: -x[0]*x[1])  # Tri par aire décroissante
-    
-    placed_rects = []
-    free_rectangles = [(0, 0, container_width, container_height)]
-    
-    for rect in sorted_rects:
-        w, h = rect
-        best_score = float('inf')
-        best_rect = None
-        best_index = -1
-        
-        for i, free in enumerate(free_rectangles):
-            fw, fh = free[2], free[3]
-            if w <= fw and h <= fh:
-                score = min(fw - w, fh - h)
-                if score < best_score:
-                    best_score = score
-                    best_rect = (free[0], free[1], w, h)
-                    best_index = i
-            # Essayer aussi en rotation
-            if h <= fw and w <= fh:
-                score = min(fw - h, fh - w)
-                if score < best_score:
-                    best_score = score
-                    best_rect = (free[0], free[1], h, w)
-                    best_index = i
-        
-        if best_index != -1:
-            placed_rects.append(best_rect)
-            free = free_rectangles.pop(best_index)
-            
-            # Découper l'espace restant
-            if free[2] > best_rect[2]:
-                free_rectangles.append((
-                    free[0] + best_rect[2],
-                    free[1],
-                    free[2] - best_rect[2],
-                    free[3]
-                ))
-            
-            if free[3] > best_rect[3]:
-                free_rectangles.append((
-                    free[0],
-                    free[1] + best_rect[3],
-                    free[2],
-                    free[3] - best_rect[3]
-                ))
-    
-    return [placed_rects]
-
-def brute_force_2d(rectangles, container_width, container_height, max_time=10):
-    """Brute-force approach with time limit"""
-    import time
-    from itertools import permutations
-    
-    start_time = time.time()
-    best_placement = []
-    best_area = 0
-    
-    # Try different orders
-    for i, perm in enumerate(permutations(rectangles)):
-        if time.time() - start_time > max_time:
-            break
-        
-        current_placement = []
-        free_spaces = [(0, 0, container_width, container_height)]
-        placed_area = 0
-        
-        for rect in perm:
-            w, h = rect
-            placed = False
-            
-            for j, space in enumerate(free_spaces):
-                if w <= space[2] and h <= space[3]:
-                    # Place without rotation
-                    current_placement.append((space[0], space[1], w, h))
-                    placed_area += w * h
-                    placed = True
-                    
-                    # Split remaining space
-                    remaining_width = space[2] - w
-                    remaining_height = space[3] - h
-                    
-                    if remaining_width > 0 and remaining_height > 0:
-                        if remaining_width > remaining_height:
-                            free_spaces.append((space[0] + w, space[1], remaining_width, h))
-                            free_spaces.append((space[0], space[1] + h, space[2], remaining_height))
-                        else:
-                            free_spaces.append((space[0], space[1] + h, w, remaining_height))
-                            free_spaces.append((space[0] + w, space[1], remaining_width, space[3]))
-                    
-                    del free_spaces[j]
-                    break
-                
-                elif h <= space[2] and w <= space[3]:
-                    # Place with rotation
-                    current_placement.append((space[0], space[1], h, w))
-                    placed_area += w * h
-                    placed = True
-                    
-                    # Split remaining space
-                    remaining_width = space[2] - h
-                    remaining_height = space[3] - w
-                    
-                    if remaining_width > 0 and remaining_height > 0:
-                        if remaining_width > remaining_height:
-                            free_spaces.append((space[0] + h, space[1], remaining_width, w))
-                            free_spaces.append((space[0], space[1] + w, space[2], remaining_height))
-                        else:
-                            free_spaces.append((space[0], space[1] + w, h, remaining_height))
-                            free_spaces.append((space[0] + h, space[1], remaining_width, space[3]))
-                    
-                    del free_spaces[j]
-                    break
-            
-            if not placed:
-                break
-        
-        if placed_area > best_area:
-            best_area = placed_area
-            best_placement = current_placement
-    
-    return [best_placement] if best_placement else []
\ No newline at end of file
+from branch_and_bound import branch_and_bound_2d
+from maxrects import SORT_KEYS, MaxRectsBin, maxrects
+from shelf_index import PersistentShelfIndex
+
+class NFDHState:
+    """Next-Fit Decreasing Height, one rectangle at a time
+
+    Rectangles go on the current shelf while they fit, otherwise a new
+    shelf is opened on top of it. The order is the caller's, so a
+    rectangle taller than the current shelf also starts a new one.
+
+    Shelves are persistent linked lists ((item, rest) pairs that are
+    never modified), so snapshot() is O(1).
+    """
+
+    def __init__(self, container_width, container_height):
+        self.width = container_width
+        self.height = container_height
+        self.shelves = None  # Étagères fermées, la dernière en tête
+        self.current_shelf = None  # Rectangles de l'étagère courante, le dernier en tête
+        self.next_x = 0
+        self.current_y = 0
+        self.current_shelf_height = 0
+
+    def insert(self, w, h):
+        """Place a w x h rectangle, return (x, y, w, h) or None if it does not fit"""
+        if self.current_shelf is not None:
+            if self.next_x + w <= self.width and h <= self.current_shelf_height:
+                rect = (self.next_x, self.current_y, w, h)
+                self.current_shelf = (rect, self.current_shelf)
+                self.next_x += w
+                return rect
+            self.shelves = (self.current_shelf, self.shelves)
+            self.current_shelf = None
+            self.current_y += self.current_shelf_height
+        if w <= self.width and h <= self.height - self.current_y:
+            rect = (0, self.current_y, w, h)
+            self.current_shelf = (rect, None)
+            self.next_x = w
+            self.current_shelf_height = h
+            return rect
+        return None
+
+    def snapshot(self):
+        other = NFDHState.__new__(NFDHState)
+        other.__dict__.update(self.__dict__)
+        return other
+
+    def result(self):
+        shelves = _unroll(self.shelves)
+        if self.current_shelf is not None:
+            shelves.append(self.current_shelf)
+        return [_unroll(shelf) for shelf in shelves]
+
+
+class FFDHState:
+    """First-Fit Decreasing Height, one rectangle at a time
+
+    Shelf heights and used widths are indexed, so the first shelf that
+    can take a rectangle is found in O(log s) whatever the order. The
+    index is persistent and holds each shelf's y and rectangles as its
+    payload, so snapshot() is O(1) and an insertion O(log s).
+    """
+
+    def __init__(self, container_width, container_height):
+        self.width = container_width
+        self.height = container_height
+        self.index = PersistentShelfIndex()
+        self.next_y = 0
+
+    def insert(self, w, h):
+        """Place a w x h rectangle, return (x, y, w, h) or None if it does not fit"""
+        i = self.index.find(w, h, self.width)
+        if i != -1:
+            shelf_height, used, (shelf_y, rects) = self.index[i]
+            rect = (used, shelf_y, w, h)
+            self.index.set(i, shelf_height, used + w, (shelf_y, (rect, rects)))
+            return rect
+        if w > self.width or self.next_y + h > self.height:
+            return None
+        rect = (0, self.next_y, w, h)
+        self.index.set(self.index.count, h, w, (self.next_y, (rect, None)))
+        self.next_y += h
+        return rect
+
+    def free_boxes(self):
+        """(width, height) of the space left on each shelf and above the last one"""
+        boxes = [(self.width - used, shelf_height)
+                 for shelf_height, used, _ in self.index.leaves() if used < self.width]
+        if self.next_y < self.height:
+            boxes.append((self.width, self.height - self.next_y))
+        return boxes
+
+    def snapshot(self):
+        other = FFDHState.__new__(FFDHState)
+        other.__dict__.update(self.__dict__)
+        other.index = self.index.snapshot()
+        return other
+
+    def result(self):
+        return [_unroll(rects) for _, _, (_, rects) in self.index.leaves()]
+
+
+def _unroll(items):
+    """List of a persistent (item, rest) list, oldest item first"""
+    result = []
+    while items is not None:
+        item, items = items
+        result.append(item)
+    result.reverse()
+    return result
+
+
+# Placement routines that take rectangles one at a time
+PLACEMENTS = {
+    "nfdh": NFDHState,
+    "ffdh": FFDHState,
+    "best_fit": lambda width, height: MaxRectsBin(width, height, "bssf"),
+}
+
+
+class SequencePacking:
+    """Rectangles placed in the given order, with a snapshot every `step` of them
+
+    replace_tail(k, tail) packs rectangles[:k] + tail by replaying from
+    the last snapshot before k, in O(len(tail) + step) instead of O(n).
+    Snapshots are never modified, so the new packing shares the earlier
+    ones with this one.
+    """
+
+    def __init__(self, rectangles, container_width, container_height, placement="ffdh", step=16):
+        if placement not in PLACEMENTS:
+            raise ValueError(f"Unknown placement: {placement}")
+        self.rectangles = list(rectangles)
+        self.step = step
+        # (état, aire placée) après les c * step premiers rectangles
+        self.snapshots = [(PLACEMENTS[placement](container_width, container_height), 0)]
+        self._replay(0)
+
+    def replace_tail(self, k, tail):
+        other = SequencePacking.__new__(SequencePacking)
+        other.rectangles = self.rectangles[:k] + list(tail)
+        other.step = self.step
+        c = min(k // self.step, len(self.snapshots) - 1)
+        other.snapshots = self.snapshots[:c + 1]
+        other._replay(c)
+        return other
+
+    def result(self):
+        return self.state.result()
+
+    def _replay(self, c):
+        state, area = self.snapshots[c]
+        state = state.snapshot()
+        for i in range(c * self.step, len(self.rectangles)):
+            if i > c * self.step and i % self.step == 0:
+                self.snapshots.append((state.snapshot(), area))
+            w, h = self.rectangles[i]
+            if state.insert(w, h) is not None:
+                area += w * h
+        self.state = state
+        self.area = area
+
+
+def nfdh(rectangles, container_width, container_height, sort="height"):
+    # Tri par hauteur décroissante par défaut, sort=None garde l'ordre donné
+    if sort is not None:
+        rectangles = sorted(rectangles, key=SORT_KEYS[sort])
+    state = NFDHState(container_width, container_height)
+    for w, h in rectangles:
+        state.insert(w, h)
+    return state.result()
+
+def ffdh(rectangles, container_width, container_height, sort="height"):
+    # Tri par hauteur décroissante par défaut, sort=None garde l'ordre donné
+    if sort is not None:
+        rectangles = sorted(rectangles, key=SORT_KEYS[sort])
+    state = FFDHState(container_width, container_height)
+    for w, h in rectangles:
+        state.insert(w, h)
+    return state.result()
+
+def best_fit_2d(rectangles, container_width, container_height, sort="area"):
+    """Best-Fit algorithm for 2D packing (MaxRects, best short side fit)"""
+    # Tri par aire décroissante par défaut, rotation autorisée
+    return maxrects(rectangles, container_width, container_height, heuristic="bssf", sort=sort)
+
+def brute_force_2d(rectangles, container_width, container_height, max_time=10, workers=None,
+                   progress=None, cancel=None):
+    """Best packing found by branch_and_bound_2d within max_time seconds
+
+    `progress` is called with the shelves of each better packing found,
+    `cancel` stops the search early (see branch_and_bound_2d).
+    """
+    report = None
+    if progress is not None:
+        report = lambda best: progress([best["placement"]])
+    result = branch_and_bound_2d(rectangles, container_width, container_height, max_time,
+                                 workers=workers, progress=report, cancel=cancel)
+    return [result["placement"]] if result["placement"] else []
@@ -0,0 +1,102 @@
+from array import array
+from numbers import Real
+
+from algorithms import first_fit, best_fit, worst_fit
+
+# Above this size an instance goes through the indexed algorithms, below it
+# a plain scan over the bin loads is cheaper
+SCAN_LIMIT = 64
+
+ALGORITHMS = {
+    "first_fit": first_fit,
+    "best_fit": best_fit,
+    "worst_fit": worst_fit,
+}
+
+
+def pack_batch(values, offsets, capacities, algorithm="first_fit"):
+    """Pack many independent 1D instances in one call
+
+    The instances are stored back to back in `values`; instance k is
+    values[offsets[k]:offsets[k + 1]] and has capacity capacities[k] (a
+    single number applies to all of them). Returns an array with, for each
+    item, the index of its bin inside its own instance, the same bins the
+    matching function of algorithms.py would give.
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Unknown algorithm: {algorithm}")
+    count = len(offsets) - 1
+    # NumPy scalars and the like are numbers too, not sequences
+    if isinstance(capacities, Real):
+        capacities = [capacities] * count
+    elif len(capacities) != count:
+        raise ValueError("Expected one capacity per instance")
+    
+    scan = _SCANS[algorithm]
+    function = ALGORITHMS[algorithm]
+    result = array("l")
+    for k in range(count):
+        items = values[offsets[k]:offsets[k + 1]]
+        if len(items) <= SCAN_LIMIT:
+            scan(items, capacities[k], result)
+        else:
+            assignment = []
+            function(list(items), capacities[k], assignment)
+            result.extend(assignment)
+    return result
+
+
+def _first_fit_scan(items, capacity, out):
+    loads = []
+    for item in items:
+        for index, load in enumerate(loads):
+            if load + item <= capacity:
+                loads[index] = load + item
+                break
+        else:
+            index = len(loads)
+            loads.append(item)
+        out.append(index)
+
+
+def _best_fit_scan(items, capacity, out):
+    loads = []
+    for item in items:
+        best = -1
+        min_space = capacity
+        for index, load in enumerate(loads):
+            space = capacity - (load + item)
+            if 0 <= space < min_space:
+                min_space = space
+                best = index
+        if best == -1:
+            best = len(loads)
+            loads.append(item)
+        else:
+            loads[best] += item
+        out.append(best)
+
+
+def _worst_fit_scan(items, capacity, out):
+    loads = []
+    for item in items:
+        worst = -1
+        max_space = -1
+        for index, load in enumerate(loads):
+            space = capacity - (load + item)
+            if space > max_space and space >= 0:
+                max_space = space
+                worst = index
+        if worst == -1:
+            worst = len(loads)
+            loads.append(item)
+        else:
+            loads[worst] += item
+        out.append(worst)
+
+
+_SCANS = {
+    "first_fit": _first_fit_scan,
+    "best_fit": _best_fit_scan,
+    "worst_fit": _worst_fit_scan,
+}
@@ -0,0 +1,351 @@
+"""Benchmark of the packing algorithms on classic instance families
+
+    python benchmark.py --output baseline.json
+    python benchmark.py --baseline baseline.json --families hopper_turton_c1 --algorithms ffdh maxrects
+
+Instances are generated locally, reproducibly from --seed, in the style of:
+    berkey_wang_1 .. 6     Berkey and Wang (1987) classes I-VI: uniform
+                           rectangles, square containers of side 10 to 300
+    martello_vigo_1 .. 4   Martello and Vigo (1998) classes 1-4: 70% of one
+                           of four types (wide, tall, large, small)
+    hopper_turton_c1 .. 7  Hopper and Turton (2001) categories C1-C7:
+                           guillotine cuts of the container, so that the
+                           whole container is the optimum
+    falkenauer_u           1D, sizes uniform in [20, 100], capacity 150
+    falkenauer_t           1D triplets filling bins of 1000 exactly
+
+Every algorithm of cli.py runs on every instance of its kind (1D or 2D)
+and gives one result with its wall time (the median of --repeat runs),
+the time of a fixed reference work run between them (so that a change
+in the speed of the machine is told from one of the algorithm), its
+peak memory (tracemalloc, in a separate run), the utilization of the
+containers used and the gap to a bound: the optimum when the family
+knows it, else the lower bound on the bins (1D, pack_bins_2d) or the
+upper bound min(total area, container area) on the area packed in one
+container.
+
+The report is JSON. With --baseline, each result is compared with the
+same instance and algorithm there and the regressions are listed (the
+exit status is then 1).
+
+Only the algorithms of this folder are run; those of 2D_withRotation
+have their own runner there (its cli.py).
+"""
+import argparse
+import json
+import math
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+from cli import ALGORITHMS, solve
+
+# Time-limited solvers and the parameter of their limit; their wall time
+# is the limit, and how far they get in it depends on the machine load, so
+# only their proved (complete) gaps are compared with the baseline
+TIME_LIMITED = {
+    "brute_force": "max_time",
+    "brute_force_2d": "max_time",
+    "branch_and_bound_2d": "max_time",
+    "simulated_annealing": "max_time",
+    "genetic": "max_time",
+}
+
+# Randomized solvers, given a seed so that their results can be compared
+SEEDED = ("simulated_annealing", "genetic")
+
+SIZES = (20, 50, 100)
+
+
+def berkey_wang(n, rng, side, low, high):
+    return {"rectangles": [(rng.randint(low, high), rng.randint(low, high)) for _ in range(n)],
+            "width": side, "height": side}
+
+
+def martello_vigo(n, rng, main_type, side=100):
+    def draw(kind):
+        if kind == 1:
+            return rng.randint(2 * side // 3, side), rng.randint(1, side // 2)
+        if kind == 2:
+            return rng.randint(1, side // 2), rng.randint(2 * side // 3, side)
+        if kind == 3:
+            return rng.randint(side // 2, side), rng.randint(side // 2, side)
+        return rng.randint(1, side // 2), rng.randint(1, side // 2)
+
+    # 70% of the main type, 10% of each other one
+    kinds = [main_type if rng.random() < 0.7 else rng.choice([k for k in (1, 2, 3, 4) if k != main_type])
+             for _ in range(n)]
+    return {"rectangles": [draw(kind) for kind in kinds], "width": side, "height": side}
+
+
+def hopper_turton(rng, count, width, height):
+    # Guillotine cuts of the largest piece until there are `count` pieces
+    pieces = [(width, height)]
+    while len(pieces) < count:
+        pieces.sort(key=lambda piece: piece[0] * piece[1])
+        w, h = pieces.pop()
+        if w >= h and w > 1:
+            cut = rng.randint(1, w - 1)
+            pieces += [(cut, h), (w - cut, h)]
+        elif h > 1:
+            cut = rng.randint(1, h - 1)
+            pieces += [(w, cut), (w, h - cut)]
+        else:
+            pieces.append((w, h))
+            break
+    rng.shuffle(pieces)
+    return {"rectangles": pieces, "width": width, "height": height,
+            "optimum": width * height}
+
+
+def falkenauer_uniform(n, rng):
+    return {"items": [rng.randint(20, 100) for _ in range(n)], "capacity": 150}
+
+
+def falkenauer_triplets(n, rng, capacity=1000):
+    items = []
+    for _ in range(max(1, n // 3)):
+        first = rng.randint(380, 490)
+        second = rng.randint(250, capacity - first - 250)
+        items += [first, second, capacity - first - second]
+    rng.shuffle(items)
+    return {"items": items, "capacity": capacity, "optimum": len(items) // 3}
+
+
+# name: (kind, generator(n, rng)); the Hopper-Turton sizes are fixed
+FAMILIES = {
+    "berkey_wang_1": ("2d", lambda n, rng: berkey_wang(n, rng, 10, 1, 10)),
+    "berkey_wang_2": ("2d", lambda n, rng: berkey_wang(n, rng, 30, 1, 10)),
+    "berkey_wang_3": ("2d", lambda n, rng: berkey_wang(n, rng, 40, 1, 35)),
+    "berkey_wang_4": ("2d", lambda n, rng: berkey_wang(n, rng, 100, 1, 35)),
+    "berkey_wang_5": ("2d", lambda n, rng: berkey_wang(n, rng, 100, 1, 100)),
+    "berkey_wang_6": ("2d", lambda n, rng: berkey_wang(n, rng, 300, 1, 100)),
+    "martello_vigo_1": ("2d", lambda n, rng: martello_vigo(n, rng, 1)),
+    "martello_vigo_2": ("2d", lambda n, rng: martello_vigo(n, rng, 2)),
+    "martello_vigo_3": ("2d", lambda n, rng: martello_vigo(n, rng, 3)),
+    "martello_vigo_4": ("2d", lambda n, rng: martello_vigo(n, rng, 4)),
+    "hopper_turton_c1": ("2d", lambda n, rng: hopper_turton(rng, 16, 20, 20)),
+    "hopper_turton_c2": ("2d", lambda n, rng: hopper_turton(rng, 25, 40, 15)),
+    "hopper_turton_c3": ("2d", lambda n, rng: hopper_turton(rng, 28, 60, 30)),
+    "hopper_turton_c4": ("2d", lambda n, rng: hopper_turton(rng, 49, 60, 60)),
+    "hopper_turton_c5": ("2d", lambda n, rng: hopper_turton(rng, 73, 60, 90)),
+    "hopper_turton_c6": ("2d", lambda n, rng: hopper_turton(rng, 97, 80, 120)),
+    "hopper_turton_c7": ("2d", lambda n, rng: hopper_turton(rng, 196, 160, 240)),
+    "falkenauer_u": ("1d", falkenauer_uniform),
+    "falkenauer_t": ("1d", falkenauer_triplets),
+}
+
+
+def instances(families=None, sizes=SIZES, count=1, seed=0):
+    """Yield the instances of the families, `count` of each size, with their id and family"""
+    for family in families or FAMILIES:
+        if family not in FAMILIES:
+            raise ValueError(f"Unknown family: {family}")
+        generate = FAMILIES[family][1]
+        # One instance per Hopper-Turton category and sample
+        family_sizes = (None,) if family.startswith("hopper_turton") else sizes
+        for n in family_sizes:
+            for k in range(count):
+                rng = random.Random(f"{seed}/{family}/{n}/{k}")
+                instance = generate(n, rng)
+                instance["id"] = f"{family}/{n}/{k}" if n is not None else f"{family}/{k}"
+                instance["family"] = family
+                yield instance
+
+
+def run(instance, algorithm, max_time=0.2, repeat=5, memory=True, seed=0):
+    """Result of one algorithm on one instance, see the module docstring"""
+    options = {}
+    if algorithm in TIME_LIMITED:
+        options[TIME_LIMITED[algorithm]] = max_time
+    if algorithm in SEEDED:
+        options["seed"] = seed
+    result = {"instance": instance["id"], "family": instance["family"], "algorithm": algorithm,
+              "n": len(instance.get("rectangles", instance.get("items", [])))}
+    times = []
+    references = []
+    for _ in range(1 if algorithm in TIME_LIMITED else max(repeat, 1)):
+        if algorithm not in TIME_LIMITED:
+            references.append(reference())
+        record = solve(algorithm, instance, options)
+        if "error" in record:
+            result["error"] = record["error"]
+            return result
+        times.append(record["time"])
+    # The median, less thrown off than one run by the rest of the system
+    result["time"] = statistics.median(times)
+    if references:
+        result["reference"] = statistics.median(references)
+    if "complete" in record:
+        result["complete"] = record["complete"]
+    if memory:
+        tracemalloc.start()
+        try:
+            solve(algorithm, instance, options)
+            result["peak_memory"] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    result.update(evaluate(instance, record))
+    return result
+
+
+def reference():
+    """Wall time of a fixed pure Python work, a measure of the speed of the machine"""
+    start = time.perf_counter()
+    rng = random.Random(0)
+    sorted((rng.randint(1, 100), rng.randint(1, 100)) for _ in range(2000))
+    return time.perf_counter() - start
+
+
+def evaluate(instance, record):
+    """Value, bound, gap and utilization of a cli.py record on its instance"""
+    if "bins" in record:
+        from algorithms import lower_bound
+
+        items, capacity = instance["items"], instance["capacity"]
+        bins = len(record["bins"])
+        bound = instance.get("optimum") or lower_bound(items, capacity)
+        return {"value": bins, "bound": bound, "gap": (bins - bound) / bound if bound else 0.0,
+                "utilization": sum(items) / (bins * capacity) if bins else 0.0}
+
+    rectangles = instance["rectangles"]
+    capacity = instance["width"] * instance["height"]
+    if "containers" in record:
+        from multibin import lower_bound_2d
+
+        containers = len(record["containers"])
+        bound = lower_bound_2d(rectangles, instance["width"], instance["height"])
+        if "optimum" in instance:
+            bound = math.ceil(instance["optimum"] / capacity)
+        return {"value": containers, "bound": bound,
+                "gap": (containers - bound) / bound if bound else 0.0,
+                "utilization": sum(w * h for w, h in rectangles) / (containers * capacity)
+                if containers else 0.0}
+
+    # One container: area packed, against what could be
+    placed = record["placement"] if "placement" in record else \
+        [rect for shelf in record["shelves"] for rect in shelf]
+    area = sum(rect[2] * rect[3] for rect in placed)
+    bound = instance.get("optimum") or min(sum(w * h for w, h in rectangles), capacity)
+    return {"value": area, "bound": bound, "gap": (bound - area) / bound if bound else 0.0,
+            "utilization": area / capacity}
+
+
+def compare(results, baseline, time_tolerance=0.25, memory_tolerance=0.25, gap_tolerance=0.005,
+            time_floor=0.005):
+    """Regressions of `results` against the results of a baseline report
+
+    A result regresses when it fails where the baseline did not, when
+    its gap grows by more than `gap_tolerance`, when its time grows by
+    more than `time_tolerance` of the baseline plus `time_floor` seconds,
+    or when its peak memory grows by more than `memory_tolerance`. The
+    baseline time is first scaled by the ratio of the reference times,
+    the machine being slower or faster than when the baseline was made.
+
+    The time-limited solvers are only compared on their gap, and only
+    when both runs completed their search: otherwise the gap and the
+    memory depend on how far the search got before the limit.
+    """
+    previous = {(r["instance"], r["algorithm"]): r for r in baseline["results"]}
+    regressions = []
+
+    def regress(result, metric, before, after):
+        regressions.append({"instance": result["instance"], "algorithm": result["algorithm"],
+                            "metric": metric, "baseline": before, "current": after})
+
+    for result in results:
+        before = previous.get((result["instance"], result["algorithm"]))
+        if before is None or "error" in before:
+            continue
+        if "error" in result:
+            regress(result, "error", None, result["error"])
+            continue
+        if result["algorithm"] in TIME_LIMITED:
+            if (result.get("complete") and before.get("complete")
+                    and result["gap"] > before["gap"] + gap_tolerance):
+                regress(result, "gap", before["gap"], result["gap"])
+            continue
+        if result["gap"] > before["gap"] + gap_tolerance:
+            regress(result, "gap", before["gap"], result["gap"])
+        scale = result["reference"] / before["reference"] if "reference" in before else 1
+        if result["time"] > before["time"] * scale * (1 + time_tolerance) + time_floor:
+            regress(result, "time", before["time"], result["time"])
+        if ("peak_memory" in result and "peak_memory" in before
+                and result["peak_memory"] > before["peak_memory"] * (1 + memory_tolerance) + 4096):
+            regress(result, "peak_memory", before["peak_memory"], result["peak_memory"])
+    return regressions
+
+
+def summarize(results):
+    """Mean time, gap and utilization of each algorithm on each family"""
+    groups = {}
+    for result in results:
+        if "error" not in result:
+            groups.setdefault(result["algorithm"], {}).setdefault(result["family"], []).append(result)
+    summary = {}
+    for algorithm, families in groups.items():
+        summary[algorithm] = {}
+        for family, entries in families.items():
+            summary[algorithm][family] = {
+                metric: sum(entry[metric] for entry in entries) / len(entries)
+                for metric in ("time", "gap", "utilization")}
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the packing algorithms")
+    parser.add_argument("--families", nargs="+", choices=sorted(FAMILIES), help="default: all")
+    parser.add_argument("--algorithms", nargs="+", choices=sorted(ALGORITHMS), help="default: all")
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(SIZES),
+                        help="numbers of items (not used by the Hopper-Turton families)")
+    parser.add_argument("--instances", type=int, default=1, help="instances of each family and size")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-time", type=float, default=0.2, help="limit of the time-limited solvers")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="runs of each other solver, the median time is kept")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc runs")
+    parser.add_argument("--baseline", help="report to compare with")
+    parser.add_argument("--time-tolerance", type=float, default=0.25)
+    parser.add_argument("--time-floor", type=float, default=0.005,
+                        help="seconds a time may grow by on top of the tolerance")
+    parser.add_argument("--memory-tolerance", type=float, default=0.25)
+    parser.add_argument("--output", help="report file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    algorithms = args.algorithms or list(ALGORITHMS)
+    results = []
+    for instance in instances(args.families, args.sizes, args.instances, args.seed):
+        kind = FAMILIES[instance["family"]][0]
+        for algorithm in algorithms:
+            if ALGORITHMS[algorithm][2] == kind:
+                results.append(run(instance, algorithm, args.max_time, args.repeat,
+                                   not args.no_memory, args.seed))
+                print(f"{instance['id']} {algorithm}", file=sys.stderr)
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "settings": {"seed": args.seed, "sizes": args.sizes, "instances": args.instances,
+                     "max_time": args.max_time, "repeat": args.repeat},
+        "results": results,
+        "summary": summarize(results),
+    }
+    if args.baseline is not None:
+        with open(args.baseline) as stream:
+            report["regressions"] = compare(results, json.load(stream), args.time_tolerance,
+                                            args.memory_tolerance, time_floor=args.time_floor)
+    text = json.dumps(report, indent=1)
+    if args.output is None:
+        print(text)
+    else:
+        with open(args.output, "w") as stream:
+            stream.write(text + "\n")
+    return 1 if report.get("regressions") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
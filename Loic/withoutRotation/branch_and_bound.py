@@ -0,0 +1,274 @@
+"""Branch and bound for one container of rectangles
+
+The same file is vendored in withoutRotation and 2D_withRotation, which
+are run as separate script folders; withoutRotation/tests/test_vendored.py
+fails as soon as the two copies differ, so a fix goes to both.
+"""
+
+
+def branch_and_bound_2d(rectangles, container_width, container_height, max_time=10,
+                        allow_rotation=True, workers=None, shard=None, incumbent=None,
+                        progress=None, cancel=None):
+    """Anytime branch and bound maximizing the area packed in one container
+
+    Items are always placed at the left end of the lowest segment of the
+    skyline, or that segment is given up (raised to its lowest neighbour);
+    this reaches every bottom-left packing. Identical rectangles are
+    grouped so that their permutations are not explored, and a node is
+    cut when its packed area plus what can still be packed (remaining
+    items that fit, bounded by the free area above the skyline) does not
+    beat the incumbent.
+
+    Returns a dict with the best placement (x, y, w, h) found, the index
+    of each placed rectangle in `rectangles`, its area, an upper bound on
+    the optimum, the relative gap, whether the search completed and the
+    number of nodes explored.
+
+    With `workers` > 1 the tree is split between that many processes
+    (see _parallel_branch_and_bound_2d). `shard` = (j, m) limits the
+    search to the children j, j + m, j + 2m, ... of the root, and
+    `incumbent` is a shared multiprocessing.Value with the best area
+    found by any shard, used for pruning.
+
+    `progress`, if given, is called with a dict of the placement, indices
+    and area of each better packing found (in this process only). The
+    search stops, as at the deadline, once `cancel` (a threading.Event
+    or anything with is_set()) is set.
+    """
+    import sys
+    import time
+    
+    if workers is not None and workers > 1 and shard is None:
+        return _parallel_branch_and_bound_2d(rectangles, container_width, container_height,
+                                             max_time, allow_rotation, workers, cancel)
+    
+    W, H = container_width, container_height
+    deadline = None if max_time is None else time.time() + max_time
+    
+    # Rectangles identiques regroupés par type, les plus grands d'abord ;
+    # à aire égale par dimensions, pour que l'ordre donné ne change rien
+    groups = {}
+    for i, (w, h) in enumerate(rectangles):
+        key = (max(w, h), min(w, h)) if allow_rotation else (w, h)
+        groups.setdefault(key, []).append(i)
+    types = []
+    for (w, h), indices in sorted(groups.items(), key=lambda kv: (-kv[0][0] * kv[0][1], kv[0])):
+        orientations = [(w, h)]
+        if allow_rotation and w != h:
+            orientations.append((h, w))
+        orientations = [(ow, oh) for ow, oh in orientations if ow <= W and oh <= H]
+        if orientations:
+            types.append((w * h, orientations, indices))
+    
+    areas = [area for area, _, indices in types for _ in indices]
+    bound = _area_bound(areas, W * H)
+    
+    best = {"area": 0, "placement": [], "indices": []}
+    placement = []
+    placed_indices = []
+    nodes = 0
+    stopped = False
+    # Meilleure aire connue de tous les processus, relue de temps en temps
+    shared_area = 0
+    remaining = [len(indices) for _, _, indices in types]
+    
+    def upper_bound(placed_area, xs, ys, ws):
+        lowest = min(ys)
+        # Ce qui peut encore entrer au-dessus du point le plus bas
+        can_fit = 0
+        for t, (area, orientations, _) in enumerate(types):
+            if remaining[t] and any(h <= H - lowest for _, h in orientations):
+                can_fit += area * remaining[t]
+        free = W * H - sum(y * w for y, w in zip(ys, ws))
+        return placed_area + min(can_fit, free)
+    
+    def search(xs, ys, ws, placed_area, root=False):
+        nonlocal nodes, stopped, shared_area
+        nodes += 1
+        if nodes % 256 == 0:
+            if deadline is not None and time.time() > deadline:
+                stopped = True
+            if cancel is not None and cancel.is_set():
+                stopped = True
+            if incumbent is not None:
+                shared_area = incumbent.value
+                if shared_area >= bound:
+                    stopped = True
+        if stopped:
+            return
+        if placed_area > best["area"] and placed_area > shared_area:
+            best["area"] = placed_area
+            best["placement"] = list(placement)
+            best["indices"] = list(placed_indices)
+            if incumbent is not None:
+                with incumbent.get_lock():
+                    incumbent.value = max(incumbent.value, placed_area)
+            if progress is not None:
+                progress(dict(best))
+            if placed_area >= bound:
+                stopped = True
+                return
+        if upper_bound(placed_area, xs, ys, ws) <= max(best["area"], shared_area):
+            return
+        branch = -1
+        
+        # Segment le plus bas, le plus à gauche
+        i = min(range(len(ys)), key=ys.__getitem__)
+        x, y, gap = xs[i], ys[i], ws[i]
+        if y >= H:
+            return
+        
+        for t, (area, orientations, indices) in enumerate(types):
+            if not remaining[t]:
+                continue
+            for w, h in orientations:
+                if w > gap or y + h > H:
+                    continue
+                branch += 1
+                if root and shard is not None and branch % shard[1] != shard[0]:
+                    continue
+                new_xs, new_ys, new_ws = xs[:i], ys[:i], ws[:i]
+                new_xs.append(x)
+                new_ys.append(y + h)
+                new_ws.append(w)
+                if w < gap:
+                    new_xs.append(x + w)
+                    new_ys.append(y)
+                    new_ws.append(gap - w)
+                new_xs += xs[i + 1:]
+                new_ys += ys[i + 1:]
+                new_ws += ws[i + 1:]
+                _merge_segments(new_xs, new_ys, new_ws, max(i - 1, 0))
+                
+                remaining[t] -= 1
+                placement.append((x, y, w, h))
+                placed_indices.append(indices[remaining[t]])
+                search(new_xs, new_ys, new_ws, placed_area + area)
+                placement.pop()
+                placed_indices.pop()
+                remaining[t] += 1
+                if stopped:
+                    return
+        
+        # Abandonner le segment : le remonter au niveau de son voisin le plus bas
+        branch += 1
+        if root and shard is not None and branch % shard[1] != shard[0]:
+            return
+        neighbours = [ys[j] for j in (i - 1, i + 1) if 0 <= j < len(ys)]
+        new_ys = list(ys)
+        new_ys[i] = min(neighbours) if neighbours else H
+        new_xs, new_ws = list(xs), list(ws)
+        _merge_segments(new_xs, new_ys, new_ws, max(i - 1, 0))
+        search(new_xs, new_ys, new_ws, placed_area)
+    
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(limit, 4 * len(rectangles) + 100))
+    try:
+        search([0], [0], [W], 0, root=True)
+    finally:
+        sys.setrecursionlimit(limit)
+    
+    complete = not stopped or best["area"] >= bound
+    if complete:
+        bound = best["area"]
+    return {
+        "placement": best["placement"],
+        "indices": best["indices"],
+        "area": best["area"],
+        "bound": bound,
+        "gap": (bound - best["area"]) / bound if bound else 0.0,
+        "complete": complete,
+        "nodes": nodes,
+    }
+
+
+def _parallel_branch_and_bound_2d(rectangles, container_width, container_height, max_time,
+                                  allow_rotation, workers, cancel=None):
+    """branch_and_bound_2d with the children of the root shared among processes"""
+    import multiprocessing
+    import time
+    from concurrent.futures import ProcessPoolExecutor, wait
+    
+    shards = 4 * workers
+    deadline = None if max_time is None else time.time() + max_time
+    incumbent = multiprocessing.Value("d", 0)
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   initargs=(incumbent,))
+    try:
+        futures = [executor.submit(_shard_task, rectangles, container_width, container_height,
+                                   deadline, allow_rotation, (j, shards))
+                   for j in range(shards)]
+        end = None if deadline is None else deadline + 1
+        while True:
+            timeout = None if end is None else max(end - time.time(), 0)
+            if cancel is not None:
+                timeout = 0.1 if timeout is None else min(timeout, 0.1)
+            done, pending = wait(futures, timeout=timeout)
+            if not pending or (end is not None and time.time() >= end):
+                break
+            if cancel is not None and cancel.is_set():
+                # Une aire infinie arrête les recherches, qui rendent leur meilleur résultat
+                with incumbent.get_lock():
+                    incumbent.value = float("inf")
+                done, _ = wait(futures, timeout=1)
+                break
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    
+    results = [future.result() for future in done]
+    if not results:
+        # Aucun processus n'a rendu de résultat à temps : la première descente
+        # de la recherche, faite ici, donne tout de même un rangement
+        results = [branch_and_bound_2d(rectangles, container_width, container_height, 0,
+                                       allow_rotation)]
+    best = max(results, key=lambda r: r["area"])
+    bound = max(r["bound"] for r in results)
+    complete = len(results) == shards and all(r["complete"] for r in results)
+    if complete or best["area"] >= bound:
+        complete = True
+        bound = best["area"]
+    return dict(best, bound=bound, complete=complete,
+                gap=(bound - best["area"]) / bound if bound else 0.0,
+                nodes=sum(r["nodes"] for r in results))
+
+
+_shared_incumbent = None
+
+
+def _init_worker(incumbent):
+    global _shared_incumbent
+    _shared_incumbent = incumbent
+
+
+def _shard_task(rectangles, container_width, container_height, deadline, allow_rotation, shard):
+    import time
+    
+    max_time = None if deadline is None else max(deadline - time.time(), 0)
+    return branch_and_bound_2d(rectangles, container_width, container_height, max_time,
+                               allow_rotation, shard=shard, incumbent=_shared_incumbent)
+
+
+def _merge_segments(xs, ys, ws, start):
+    # Fusionne les segments voisins de même hauteur autour de `start`
+    k = start
+    while k < min(start + 3, len(xs)) - 1:
+        if ys[k] == ys[k + 1]:
+            ws[k] += ws[k + 1]
+            del xs[k + 1], ys[k + 1], ws[k + 1]
+        else:
+            k += 1
+
+
+def _area_bound(areas, capacity):
+    """Largest total of a subset of `areas` not above `capacity`"""
+    total = sum(areas)
+    if total <= capacity:
+        return total
+    if not all(isinstance(a, int) for a in areas) or capacity > 10 ** 7:
+        return capacity
+    # Sommes atteignables sous forme de bits d'un entier
+    reachable = 1
+    mask = (1 << (capacity + 1)) - 1
+    for area in areas:
+        reachable = (reachable | (reachable << area)) & mask
+    return reachable.bit_length() - 1
@@ -0,0 +1,240 @@
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+from collections import OrderedDict, defaultdict, deque
+
+from maxrects import SORT_KEYS
+
+# Exact solvers: the result only depends on the multiset of items
+EXACT = {"brute_force", "brute_force_2d", "branch_and_bound_2d"}
+
+# Functions that rotate rectangles without an allow_rotation parameter
+ROTATING = {"brute_force_2d", "simulated_annealing", "genetic"}
+
+# Parameters that change how a result is computed, not what it is
+IGNORED = {"workers", "assignment", "progress", "cancel", "stats"}
+
+
+class PackingCache:
+    """Memoize packing functions on canonicalized instances
+
+    The key of a call hashes the function name, the items in canonical
+    order, the container and the other parameters, and a miss runs the
+    function on those items, so that a hit gives what the function would
+    have given on the caller's items. The canonical order depends on the
+    function (see _canonical_order): a sorted multiset for the exact
+    solvers (rectangles as (short side, long side) when they may rotate
+    them), the order of their own sort key for the functions with a
+    `sort` parameter, and the caller's order for the others, First-Fit
+    for instance. Indices in the result (branch_and_bound_2d) are mapped
+    back to the caller's order, and placements() tells which placement
+    belongs to which item.
+
+    Results are kept in an LRU of `max_entries` in memory and, if
+    `directory` is given, in one JSON file per key there, the least
+    recently used files being removed beyond `max_bytes`. A call that can
+    be cut short (a `max_time` other than None, or a `cancel`) is only
+    stored when its result is proved optimal, so a lucky or unlucky run
+    never becomes the answer of later calls.
+    """
+
+    def __init__(self, directory=None, max_entries=1024, max_bytes=256 * 1024 * 1024):
+        self.memory = OrderedDict()
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_bytes = max_bytes
+        # Files of the disk tier, least recently used first
+        self.files = OrderedDict()
+        self.disk_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            entries = []
+            for name in os.listdir(directory):
+                if name.endswith(".json"):
+                    stat = os.stat(os.path.join(directory, name))
+                    entries.append((stat.st_mtime, name[:-len(".json")], stat.st_size))
+            for _, key, size in sorted(entries):
+                self.files[key] = size
+                self.disk_bytes += size
+
+    def call(self, function, items, *container, **params):
+        """function(items, *container, **params), from the cache when possible"""
+        assignment = params.get("assignment")
+        rotation = _rotates(function, params)
+        order = _canonical_order(function, items, params, rotation)
+        exact = function.__name__ in EXACT
+        canonical = [_canonical_item(items[i], rotation and exact) for i in order]
+        key = self.key(function, canonical, container, params)
+
+        result = self.get(key)
+        if result is None:
+            self.misses += 1
+            kwargs = {name: value for name, value in params.items() if name != "assignment"}
+            limited = _limited(function, params)
+            stats = kwargs.get("stats")
+            if limited and stats is None and "stats" in inspect.signature(function).parameters:
+                kwargs["stats"] = stats = {}
+            result = function(canonical, *container, **kwargs)
+            if not limited or _complete(result, stats):
+                self.put(key, result)
+        else:
+            self.hits += 1
+            if params.get("stats") is not None:
+                # Only complete results are stored (brute_force)
+                params["stats"].update(bound=len(result), complete=True)
+        result = _restore(result)
+        if isinstance(result, dict) and "indices" in result:
+            result = dict(result, indices=[order[k] for k in result["indices"]])
+        if assignment is not None:
+            assignment.extend(self.placements(result, items, rotation))
+        return result
+
+    def placements(self, result, items, rotation=False):
+        """For each item, in the caller's order, where `result` put it
+
+        A bin index for 1D bins, (group, x, y, w, h) for shelves or
+        containers, (x, y, w, h) for a branch_and_bound_2d result; None
+        for an item left out.
+        """
+        placed = [None] * len(items)
+        if isinstance(result, dict):
+            for index, rect in zip(result["indices"], result["placement"]):
+                placed[index] = tuple(rect)
+            return placed
+        waiting = defaultdict(deque)
+        for i, item in enumerate(items):
+            waiting[_canonical_item(item, rotation)].append(i)
+        for group, entries in enumerate(result):
+            for entry in entries:
+                if isinstance(entry, (tuple, list)):
+                    x, y, w, h = entry
+                    placed[waiting[_canonical_item((w, h), rotation)].popleft()] = (group, x, y, w, h)
+                else:
+                    placed[waiting[entry].popleft()] = group
+        return placed
+
+    def key(self, function, canonical, container, params):
+        kept = {name: value for name, value in params.items() if name not in IGNORED}
+        text = json.dumps([function.__module__, function.__name__, canonical, list(container),
+                           sorted(kept.items())], default=repr)
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def get(self, key):
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            return self.memory[key]
+        if key not in self.files:
+            return None
+        path = os.path.join(self.directory, key + ".json")
+        try:
+            with open(path) as stream:
+                result = json.load(stream)
+            os.utime(path)
+        except (OSError, ValueError):
+            # Removed or half written by another process
+            self._forget(key)
+            return None
+        self.files.move_to_end(key)
+        self._remember(key, result)
+        return result
+
+    def put(self, key, result):
+        self._remember(key, result)
+        if self.directory is None:
+            return
+        data = json.dumps(result).encode()
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(descriptor, "wb") as stream:
+            stream.write(data)
+        os.replace(temporary, os.path.join(self.directory, key + ".json"))
+        self._forget(key)
+        self.files[key] = len(data)
+        self.disk_bytes += len(data)
+        while self.disk_bytes > self.max_bytes and len(self.files) > 1:
+            oldest = next(iter(self.files))
+            try:
+                os.remove(os.path.join(self.directory, oldest + ".json"))
+            except OSError:
+                pass
+            self._forget(oldest)
+
+    def _remember(self, key, result):
+        self.memory[key] = result
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    def _forget(self, key):
+        if key in self.files:
+            self.disk_bytes -= self.files.pop(key)
+
+
+def cached(function, cache):
+    """`function` with its results memoized in `cache`"""
+    def wrapper(items, *container, **params):
+        return cache.call(function, items, *container, **params)
+    wrapper.__name__ = function.__name__
+    wrapper.__doc__ = function.__doc__
+    return wrapper
+
+
+def _rotates(function, params):
+    if function.__name__ in ROTATING:
+        return True
+    parameter = inspect.signature(function).parameters.get("allow_rotation")
+    if parameter is None:
+        return False
+    return bool(params.get("allow_rotation", parameter.default))
+
+
+def _limited(function, params):
+    """Whether a call can stop before its search is complete"""
+    if params.get("cancel") is not None:
+        return True
+    parameter = inspect.signature(function).parameters.get("max_time")
+    return parameter is not None and params.get("max_time", parameter.default) is not None
+
+
+def _complete(result, stats):
+    if isinstance(result, dict):
+        return result["complete"]
+    return bool(stats and stats["complete"])
+
+
+def _canonical_order(function, items, params, rotation):
+    """Indices of the items in canonical order
+
+    Exact solvers get a sorted multiset. A function with a `sort`
+    parameter packs by its sort key, the caller's order deciding ties:
+    it gets the items in that order, which its own stable sort leaves
+    as it is. Any other function, and sort=None, packs in the given
+    order, which is then part of the instance.
+    """
+    if function.__name__ in EXACT:
+        return sorted(range(len(items)), key=lambda i: _canonical_item(items[i], rotation))
+    parameter = inspect.signature(function).parameters.get("sort")
+    if parameter is not None:
+        sort = params.get("sort", parameter.default)
+        if sort is not None:
+            key = SORT_KEYS[sort]
+            return sorted(range(len(items)), key=lambda i: key(items[i]))
+    return list(range(len(items)))
+
+
+def _canonical_item(item, rotation):
+    if isinstance(item, (tuple, list)):
+        w, h = item
+        return (min(w, h), max(w, h)) if rotation else (w, h)
+    return item
+
+
+def _restore(result):
+    # JSON gives lists where the functions return tuples
+    if isinstance(result, dict):
+        return dict(result, placement=[tuple(rect) for rect in result["placement"]])
+    return [[tuple(entry) if isinstance(entry, list) else entry for entry in group]
+            for group in result]
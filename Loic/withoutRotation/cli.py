@@ -0,0 +1,231 @@
+"""Headless batch runner: pack instances read from files or stdin, write NDJSON
+
+Examples:
+    python cli.py first_fit items.csv --capacity 100
+    python cli.py maxrects instances.ndjson --width 200 --height 100 --jobs 4
+    cat instances.json | python cli.py pack_bins_2d --format json --option packer="skyline"
+
+An instance is a JSON object with "items" and "capacity" (1D) or
+"rectangles", "width" and "height" (2D), and an optional "id"; the
+command-line values fill in what it leaves out. A JSON file holds one
+instance or a list of them, an NDJSON file one per line. A CSV file
+has a header with "size" (1D) or "width" and "height" (2D) columns and
+one item per row; an optional "instance" column splits the rows into
+instances.
+
+Each instance gives one output line, in input order, with its id, the
+algorithm, its result and the time taken, or its error. 2D records
+also hold the container width and height, so that export.py can draw
+them.
+
+Algorithm modules are only imported in the process that runs them, so
+nothing on this path loads tkinter. The algorithms with rotation have
+their own runner, 2D_withRotation/cli.py.
+"""
+import argparse
+import csv
+import importlib
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# name: (module, function, kind)
+ALGORITHMS = {
+    "first_fit": ("algorithms", "first_fit", "1d"),
+    "best_fit": ("algorithms", "best_fit", "1d"),
+    "worst_fit": ("algorithms", "worst_fit", "1d"),
+    "brute_force": ("algorithms", "brute_force", "1d"),
+    "nfdh": ("algorithms_2d", "nfdh", "2d"),
+    "ffdh": ("algorithms_2d", "ffdh", "2d"),
+    "best_fit_2d": ("algorithms_2d", "best_fit_2d", "2d"),
+    "brute_force_2d": ("algorithms_2d", "brute_force_2d", "2d"),
+    "branch_and_bound_2d": ("algorithms_2d", "branch_and_bound_2d", "2d"),
+    "maxrects": ("maxrects", "maxrects", "2d"),
+    "skyline": ("skyline", "skyline", "2d"),
+    "pack_bins_2d": ("multibin", "pack_bins_2d", "2d"),
+    "simulated_annealing": ("metaheuristics", "simulated_annealing", "2d"),
+    "genetic": ("metaheuristics", "genetic", "2d"),
+}
+
+FORMATS = ("json", "ndjson", "csv")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a packing algorithm on batches of instances")
+    parser.add_argument("algorithm", choices=sorted(ALGORITHMS))
+    parser.add_argument("files", nargs="*", help="input files, '-' or nothing for stdin")
+    parser.add_argument("--format", choices=FORMATS,
+                        help="input format (default: from the file extension, ndjson for stdin)")
+    parser.add_argument("--capacity", type=_number, help="bin capacity (1D)")
+    parser.add_argument("--width", type=_number, help="container width (2D)")
+    parser.add_argument("--height", type=_number, help="container height (2D)")
+    parser.add_argument("--option", action="append", default=[], metavar="KEY=VALUE",
+                        help="keyword argument of the algorithm, VALUE read as JSON if it parses")
+    parser.add_argument("--jobs", type=int, default=1, help="instances solved in parallel")
+    parser.add_argument("--output", help="output file (default: stdout)")
+    # Files may come after the options as well
+    args = parser.parse_intermixed_args(argv)
+
+    options = {}
+    for option in args.option:
+        key, sep, value = option.partition("=")
+        if not sep:
+            parser.error(f"Expected KEY=VALUE, got {option}")
+        try:
+            options[key] = json.loads(value)
+        except ValueError:
+            options[key] = value
+    defaults = {"capacity": args.capacity, "width": args.width, "height": args.height}
+
+    instances = _read_all(args.files or ["-"], args.format, defaults)
+    output = sys.stdout if args.output is None else open(args.output, "w")
+    failed = False
+    try:
+        for record in run(args.algorithm, instances, options, args.jobs):
+            failed = failed or "error" in record
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+    except (OSError, ValueError) as error:
+        # Unreadable input: the records already written stay valid
+        print(f"{parser.prog}: {error}", file=sys.stderr)
+        return 2
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return 1 if failed else 0
+
+
+def run(algorithm, instances, options=None, jobs=1):
+    """Solve each instance, yielding its output record in input order
+
+    With `jobs` > 1 the instances are solved in a process pool, with at
+    most twice as many in flight, so the input is read lazily as well.
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Unknown algorithm: {algorithm}")
+    options = options or {}
+    if jobs <= 1:
+        for instance in instances:
+            yield solve(algorithm, instance, options)
+        return
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        pending = deque()
+        for instance in instances:
+            pending.append(executor.submit(solve, algorithm, instance, options))
+            if len(pending) >= 2 * jobs:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def solve(algorithm, instance, options):
+    """Output record of one instance; errors are reported in it, not raised"""
+    module_name, function_name, kind = ALGORITHMS[algorithm]
+    record = {"id": instance.get("id"), "algorithm": algorithm}
+    if "source" in instance:
+        record["source"] = instance["source"]
+    try:
+        function = getattr(importlib.import_module(module_name), function_name)
+        if kind == "1d":
+            if instance.get("capacity") is None:
+                raise ValueError("Missing capacity")
+            args = ([_number(size) for size in instance["items"]], _number(instance["capacity"]))
+        else:
+            if instance.get("width") is None or instance.get("height") is None:
+                raise ValueError("Missing container width or height")
+            args = ([(_number(w), _number(h)) for w, h in instance["rectangles"]],
+                    _number(instance["width"]), _number(instance["height"]))
+            # Lets export.py draw the record on its own
+            record["width"], record["height"] = args[1], args[2]
+        if algorithm == "brute_force":
+            # Tells a proved minimum from the best packing found in time
+            options = dict(options, stats={})
+        start = time.perf_counter()
+        result = function(*args, **options)
+        record["time"] = time.perf_counter() - start
+    except Exception as error:
+        record["error"] = f"{type(error).__name__}: {error}"
+        return record
+    if algorithm == "branch_and_bound_2d":
+        record.update(result)
+    elif algorithm == "pack_bins_2d":
+        record["containers"] = result
+    elif kind == "1d":
+        record["bins"] = result
+        record.update(options.get("stats", {}))
+    else:
+        record["shelves"] = result
+    return record
+
+
+def read_instances(stream, fmt, defaults=None, source=None):
+    """Yield the instances of an open text stream, missing fields taken from `defaults`"""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format: {fmt}")
+    if fmt == "json":
+        data = json.load(stream)
+        instances = data if isinstance(data, list) else [data]
+    elif fmt == "ndjson":
+        instances = (json.loads(line) for line in stream if line.strip())
+    else:
+        instances = _read_csv(stream)
+    for number, instance in enumerate(instances):
+        for key, value in (defaults or {}).items():
+            if instance.get(key) is None and value is not None:
+                instance[key] = value
+        if instance.get("id") is None:
+            instance["id"] = number
+        if source is not None:
+            instance["source"] = source
+        yield instance
+
+
+def _read_all(paths, fmt, defaults):
+    for path in paths:
+        if path == "-":
+            yield from read_instances(sys.stdin, fmt or "ndjson", defaults, "-")
+            continue
+        file_format = fmt or _format_of(path)
+        with open(path, newline="" if file_format == "csv" else None) as stream:
+            yield from read_instances(stream, file_format, defaults, path)
+
+
+def _format_of(path):
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    if extension in ("jsonl", "ndjson"):
+        return "ndjson"
+    if extension in FORMATS:
+        return extension
+    raise ValueError(f"Unknown format for {path}, use --format")
+
+
+def _read_csv(stream):
+    rows = csv.DictReader(stream)
+    instances = {}
+    for row in rows:
+        key = row.get("instance") or None
+        if key not in instances:
+            instances[key] = {"id": key}
+        instance = instances[key]
+        if row.get("size") not in (None, ""):
+            instance.setdefault("items", []).append(row["size"])
+        else:
+            instance.setdefault("rectangles", []).append((row["width"], row["height"]))
+    return list(instances.values())
+
+
+def _number(value):
+    # CSV fields come as text
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            return float(value)
+    return value
+
+
+if __name__ == "__main__":
+    sys.exit(main())
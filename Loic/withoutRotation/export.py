@@ -0,0 +1,405 @@
+"""Headless export of packings to PNG, SVG and PDF files
+
+    python cli.py maxrects instances.ndjson --width 200 --height 100 > results.ndjson
+    python export.py results.ndjson --format png --output report --jobs 8
+
+The input holds cli.py output records, one per line: "shelves" and
+"placement" records give one container, "containers" records
+(pack_bins_2d) one per container. The container size is read from the
+record's "width" and "height" or from the command line.
+
+Records of the 2D_withRotation algorithms are drawn too: a "placements"
+list (or shelves) of their Placement results, as JSON lists [item, kind,
+x, y, rotation, width, height] or objects with those fields. Circles,
+rectangles and isosceles triangles are drawn with their rotation; any
+other kind is an error.
+
+PNG images are rasterized in pure Python (zlib and struct), SVG and PDF
+are written as text; with several containers, PNG and SVG lay them out
+in a grid and PDF gives each its own page. Nothing here imports tkinter,
+and with `jobs` > 1 the files are rendered in a process pool. One line
+per record is printed: its id and the file written, or its error.
+"""
+import argparse
+import json
+import math
+import os
+import re
+import struct
+import sys
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from vertices import triangle_polygon
+
+# Colors of the groups (shelves, or rectangles of a container), in turn
+COLORS = ["#4a6fa5", "#166088", "#4fc3f7", "#59a5d8", "#386fa4"]
+
+FORMATS = ("png", "svg", "pdf")
+
+# Space between containers laid out in a grid, as a fraction of the
+# longest container side
+GAP = 0.05
+
+# Shape kinds of the 2D_withRotation placements
+SHAPES = ("Rectangle", "Circle", "IsoscelesTriangle")
+
+# Control point distance of the Bézier quarter circles in PDF
+KAPPA = 0.5523
+
+
+def containers_of(record):
+    """Containers of a record, each a list of (x, y, w, h, color index)
+
+    A circle or a triangle is followed by its kind and rotation index,
+    (x, y, w, h) being its bounding box.
+    """
+    if "containers" in record:
+        return [[_entry(rect, k) for k, rect in enumerate(container)]
+                for container in record["containers"]]
+    if "shelves" in record:
+        return [[_entry(rect, i) for i, shelf in enumerate(record["shelves"]) for rect in shelf]]
+    if "placement" in record:
+        return [[_entry(rect, k) for k, rect in enumerate(record["placement"])]]
+    if "placements" in record:
+        return [[_entry(placement, k) for k, placement in enumerate(record["placements"])]]
+    raise ValueError("No 2D layout in the record")
+
+
+def _entry(entry, color):
+    """Container entry of an (x, y, w, h) rectangle or of a placement"""
+    if isinstance(entry, dict):
+        fields = [entry.get(name) for name in ("kind", "x", "y", "rotation", "width", "height")]
+    elif len(entry) == 4:
+        return tuple(entry) + (color,)
+    elif len(entry) == 7:
+        fields = entry[1:]
+    else:
+        raise ValueError(f"Expected (x, y, w, h) or a placement, got {entry!r}")
+    kind, x, y, rotation, w, h = fields
+    if kind not in SHAPES:
+        raise ValueError(f"Unknown shape kind: {kind}")
+    if kind == "Rectangle":
+        return (x, y, w, h, color)
+    # Same rule as rotation_index in 2D_withRotation/shape_array.py
+    return (x, y, w, h, color, kind, round((rotation or 0) / (math.pi / 2)) % 3)
+
+
+def write_png(stream, containers, container_width, container_height, size=800):
+    """Write a PNG image of the containers to a binary stream
+
+    `size` is the longest side of one container, in pixels.
+    """
+    scale = size / max(container_width, container_height)
+    columns, cell_width, cell_height, gap = _grid(containers, container_width, container_height)
+    rows = math.ceil(len(containers) / columns)
+    width = max(1, math.ceil((columns * cell_width - gap) * scale))
+    height = max(1, math.ceil((rows * cell_height - gap) * scale))
+    pixels = bytearray(b"\xff" * (width * height * 3))
+
+    def fill(x0, y0, x1, y1, color):
+        # Pixels of [x0, x1) x [y0, y1), at least one of each, clipped to the image
+        left, top = min(max(int(x0), 0), width - 1), min(max(int(y0), 0), height - 1)
+        right = min(max(left + 1, round(x1)), width)
+        bottom = min(max(top + 1, round(y1)), height)
+        span = color * (right - left)
+        for y in range(top, bottom):
+            pixels[(y * width + left) * 3:(y * width + right) * 3] = span
+
+    def fill_spans(spans, color):
+        for y, left, right in spans:
+            pixels[(y * width + left) * 3:(y * width + right) * 3] = color * (right - left)
+
+    black = b"\x00\x00\x00"
+    colors = [bytes.fromhex(color[1:]) for color in COLORS]
+    for k, container in enumerate(containers):
+        ox = (k % columns) * cell_width * scale
+        oy = (k // columns) * cell_height * scale
+        for x, y, w, h, color, *shape in container:
+            x0, y0 = ox + x * scale, oy + y * scale
+            x1, y1 = ox + (x + w) * scale, oy + (y + h) * scale
+            if shape:
+                spans = _spans(shape, x0, y0, x1, y1, width, height)
+                if x1 - x0 >= 3 and y1 - y0 >= 3:
+                    fill_spans(spans, black)
+                    fill_spans(_inside(spans), colors[color % len(colors)])
+                else:
+                    fill_spans(spans, colors[color % len(colors)])
+            elif x1 - x0 >= 3 and y1 - y0 >= 3:
+                # Outline, then the inside
+                fill(x0, y0, x1, y1, black)
+                fill(x0 + 1, y0 + 1, x1 - 1, y1 - 1, colors[color % len(colors)])
+            else:
+                fill(x0, y0, x1, y1, colors[color % len(colors)])
+        # Container frame, two pixels wide
+        x1, y1 = ox + container_width * scale, oy + container_height * scale
+        fill(ox, oy, x1, oy + 2, black)
+        fill(ox, y1 - 2, x1, y1, black)
+        fill(ox, oy, ox + 2, y1, black)
+        fill(x1 - 2, oy, x1, y1, black)
+
+    # Filter type 0 (none) before each scanline
+    stride = width * 3
+    raw = b"".join(b"\x00" + pixels[y * stride:(y + 1) * stride] for y in range(height))
+    stream.write(b"\x89PNG\r\n\x1a\n")
+    _png_chunk(stream, b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+    _png_chunk(stream, b"IDAT", zlib.compress(raw, 6))
+    _png_chunk(stream, b"IEND", b"")
+
+
+def write_svg(stream, containers, container_width, container_height, size=800):
+    """Write an SVG drawing of the containers to a binary stream (UTF-8), in container units"""
+    scale = size / max(container_width, container_height)
+    columns, cell_width, cell_height, gap = _grid(containers, container_width, container_height)
+    rows = math.ceil(len(containers) / columns)
+    width, height = columns * cell_width - gap, rows * cell_height - gap
+    lines = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{width * scale:g}" '
+             f'height="{height * scale:g}" viewBox="0 0 {width:g} {height:g}">',
+             '<style>rect,ellipse,polygon{stroke:black;stroke-width:1;'
+             'vector-effect:non-scaling-stroke}</style>']
+    for k, container in enumerate(containers):
+        ox, oy = (k % columns) * cell_width, (k // columns) * cell_height
+        lines.append(f'<g transform="translate({ox:g} {oy:g})">')
+        for x, y, w, h, color, *shape in container:
+            fill = COLORS[color % len(COLORS)]
+            if not shape:
+                lines.append(f'<rect x="{x:g}" y="{y:g}" width="{w:g}" height="{h:g}" fill="{fill}"/>')
+            elif shape[0] == "Circle":
+                lines.append(f'<ellipse cx="{x + w / 2:g}" cy="{y + h / 2:g}" rx="{w / 2:g}" '
+                             f'ry="{h / 2:g}" fill="{fill}"/>')
+            else:
+                points = " ".join(f"{px:g},{py:g}" for px, py in triangle_polygon(x, y, w, h, shape[1]))
+                lines.append(f'<polygon points="{points}" fill="{fill}"/>')
+        lines.append(f'<rect width="{container_width:g}" height="{container_height:g}" '
+                     'fill="none" style="stroke-width:2"/>')
+        lines.append('</g>')
+    lines.append('</svg>')
+    stream.write("\n".join(lines).encode())
+
+
+def write_pdf(stream, containers, container_width, container_height, size=800):
+    """Write a PDF document to a binary stream, one page per container
+
+    `size` is the longest side of a page, in points.
+    """
+    scale = size / max(container_width, container_height)
+    page_width, page_height = container_width * scale, container_height * scale
+    colors = [" ".join(f"{int(color[i:i + 2], 16) / 255:.3f}" for i in (1, 3, 5))
+              for color in COLORS]
+    # Objects 1 and 2 are the catalog and the page tree, then a page and
+    # its content stream per container
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None]
+    pages = []
+    for container in containers or [[]]:
+        commands = ["0.5 w"]
+        for x, y, w, h, color, *shape in container:
+            # PDF has its origin at the bottom left
+            if not shape:
+                path = (f"{x * scale:.2f} {page_height - (y + h) * scale:.2f} "
+                        f"{w * scale:.2f} {h * scale:.2f} re B")
+            elif shape[0] == "Circle":
+                path = _pdf_ellipse((x + w / 2) * scale, page_height - (y + h / 2) * scale,
+                                    w / 2 * scale, h / 2 * scale)
+            else:
+                points = [(px * scale, page_height - py * scale)
+                          for px, py in triangle_polygon(x, y, w, h, shape[1])]
+                path = " ".join(f"{px:.2f} {py:.2f} {op}"
+                                for (px, py), op in zip(points, ("m", "l", "l"))) + " h B"
+            commands.append(f"{colors[color % len(colors)]} rg {path}")
+        commands.append(f"2 w 0 0 {page_width:.2f} {page_height:.2f} re S")
+        content = zlib.compress("\n".join(commands).encode())
+        pages.append(len(objects) + 1)
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {page_width:.2f} {page_height:.2f}] "
+                       f"/Contents {len(objects) + 2} 0 R >>".encode())
+        objects.append(f"<< /Length {len(content)} /Filter /FlateDecode >>\nstream\n".encode()
+                       + content + b"\nendstream")
+    kids = " ".join(f"{page} 0 R" for page in pages)
+    objects[1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode()
+
+    data = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(data))
+        data += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(data)
+    data += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        data += f"{offset:010d} 00000 n \n".encode()
+    data += (f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+             f"startxref\n{xref}\n%%EOF\n").encode()
+    stream.write(bytes(data))
+
+
+WRITERS = {"png": write_png, "svg": write_svg, "pdf": write_pdf}
+
+
+def export(record, path, fmt, size=800, defaults=None):
+    """Render one cli.py record to the file `path`"""
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown format: {fmt}")
+    if "error" in record:
+        raise ValueError(f"The record has an error: {record['error']}")
+    defaults = defaults or {}
+    container_width = record.get("width", defaults.get("width"))
+    container_height = record.get("height", defaults.get("height"))
+    if container_width is None or container_height is None:
+        raise ValueError("Missing container width or height")
+    containers = containers_of(record)
+    # Written aside then renamed, so that a report never links a half-written file
+    temporary = path + ".part"
+    with open(temporary, "wb") as stream:
+        WRITERS[fmt](stream, containers, container_width, container_height, size)
+    os.replace(temporary, path)
+    return path
+
+
+def export_all(records, directory, fmt, size=800, defaults=None, jobs=1):
+    """Export each record to `directory`, yielding its id and file (or error) in input order
+
+    With `jobs` > 1 the files are rendered in a process pool, at most
+    twice as many records in flight.
+    """
+    os.makedirs(directory, exist_ok=True)
+    names = set()
+
+    def tasks():
+        for number, record in enumerate(records):
+            name = re.sub(r"[^\w.-]", "_", str(record.get("id", number)))
+            if name in names:
+                name = f"{name}_{number}"
+            names.add(name)
+            yield record, os.path.join(directory, f"{name}.{fmt}")
+
+    if jobs <= 1:
+        for record, path in tasks():
+            yield _export_task(record, path, fmt, size, defaults)
+        return
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        pending = deque()
+        for record, path in tasks():
+            pending.append(executor.submit(_export_task, record, path, fmt, size, defaults))
+            if len(pending) >= 2 * jobs:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export packing results to PNG, SVG or PDF files")
+    parser.add_argument("files", nargs="*", help="NDJSON files of cli.py records, '-' or nothing for stdin")
+    parser.add_argument("--format", choices=FORMATS, default="png")
+    parser.add_argument("--output", default=".", help="directory of the files written")
+    parser.add_argument("--size", type=int, default=800,
+                        help="longest side of a container, in pixels (points for PDF)")
+    parser.add_argument("--width", type=float, help="container width, for records without one")
+    parser.add_argument("--height", type=float, help="container height, for records without one")
+    parser.add_argument("--jobs", type=int, default=1, help="files rendered in parallel")
+    args = parser.parse_args(argv)
+
+    defaults = {"width": args.width, "height": args.height}
+    defaults = {key: value for key, value in defaults.items() if value is not None}
+    failed = False
+    try:
+        for result in export_all(_read_records(args.files or ["-"]), args.output, args.format,
+                                 args.size, defaults, args.jobs):
+            failed = failed or "error" in result
+            print(json.dumps(result), flush=True)
+    except (OSError, ValueError) as error:
+        print(f"{parser.prog}: {error}", file=sys.stderr)
+        return 2
+    return 1 if failed else 0
+
+
+def _export_task(record, path, fmt, size, defaults):
+    result = {"id": record.get("id")}
+    try:
+        result["file"] = export(record, path, fmt, size, defaults)
+    except Exception as error:
+        result["error"] = f"{type(error).__name__}: {error}"
+    return result
+
+
+def _read_records(paths):
+    for path in paths:
+        stream = sys.stdin if path == "-" else open(path)
+        try:
+            for line in stream:
+                if line.strip():
+                    yield json.loads(line)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+
+def _grid(containers, container_width, container_height):
+    """Columns of the grid, size of a cell and gap, in container units"""
+    gap = GAP * max(container_width, container_height) if len(containers) > 1 else 0
+    columns = max(1, math.ceil(math.sqrt(len(containers))))
+    return columns, container_width + gap, container_height + gap, gap
+
+
+def _spans(shape, x0, y0, x1, y1, width, height):
+    """Pixel rows (y, left, right) covered by a circle or triangle in the pixel box, clipped to the image"""
+    kind, rotation = shape
+    if kind != "Circle":
+        polygon = triangle_polygon(x0, y0, x1 - x0, y1 - y0, rotation)
+    spans = []
+    top = min(max(int(y0), 0), height - 1)
+    for y in range(top, min(max(top + 1, math.ceil(y1)), height)):
+        # Extent of the row through the pixel centres
+        center = y + 0.5
+        if kind == "Circle":
+            rx, ry = (x1 - x0) / 2, (y1 - y0) / 2
+            t = (center - (y0 + y1) / 2) / ry if ry else 2
+            if abs(t) > 1:
+                continue
+            half = rx * math.sqrt(1 - t * t)
+            a, b = (x0 + x1) / 2 - half, (x0 + x1) / 2 + half
+        else:
+            xs = [xa + (center - ya) * (xb - xa) / (yb - ya)
+                  for (xa, ya), (xb, yb) in zip(polygon, polygon[1:] + polygon[:1])
+                  if ya != yb and min(ya, yb) <= center <= max(ya, yb)]
+            if not xs:
+                continue
+            a, b = min(xs), max(xs)
+        left, right = max(round(a), 0), min(round(b), width)
+        if right > left:
+            spans.append((y, left, right))
+    if not spans:
+        # Smaller than a pixel: still shown, as one
+        left = min(max(int(x0), 0), width - 1)
+        spans = [(top, left, left + 1)]
+    return spans
+
+
+def _inside(spans):
+    """Spans of the pixels whose four neighbours are in `spans`: all but the outline"""
+    rows = {y: (left, right) for y, left, right in spans}
+    inside = []
+    for y, left, right in spans:
+        if y - 1 in rows and y + 1 in rows:
+            left = max(left + 1, rows[y - 1][0], rows[y + 1][0])
+            right = min(right - 1, rows[y - 1][1], rows[y + 1][1])
+            if right > left:
+                inside.append((y, left, right))
+    return inside
+
+
+def _pdf_ellipse(cx, cy, rx, ry):
+    """PDF path of an ellipse, four Bézier quarters, filled and stroked"""
+    kx, ky = KAPPA * rx, KAPPA * ry
+    return (f"{cx + rx:.2f} {cy:.2f} m "
+            f"{cx + rx:.2f} {cy + ky:.2f} {cx + kx:.2f} {cy + ry:.2f} {cx:.2f} {cy + ry:.2f} c "
+            f"{cx - kx:.2f} {cy + ry:.2f} {cx - rx:.2f} {cy + ky:.2f} {cx - rx:.2f} {cy:.2f} c "
+            f"{cx - rx:.2f} {cy - ky:.2f} {cx - kx:.2f} {cy - ry:.2f} {cx:.2f} {cy - ry:.2f} c "
+            f"{cx + kx:.2f} {cy - ry:.2f} {cx + rx:.2f} {cy - ky:.2f} {cx + rx:.2f} {cy:.2f} c h B")
+
+
+def _png_chunk(stream, kind, data):
+    stream.write(struct.pack(">I", len(data)) + kind + data
+                 + struct.pack(">I", zlib.crc32(kind + data) & 0xffffffff))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,15 @@
+import queue
+import threading
 import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import ttk, messagebox, scrolledtext
 from algorithms import first_fit, best_fit, worst_fit, brute_force
 import random
 from utils import validate_input
 
+# How often the progress queue is read, in milliseconds
+POLL_INTERVAL = 50
+
 class PackingApp(tk.Tk):
     def __init__(self):
         super().__init__()
@@ -12,8 +18,16 @@ class PackingApp(tk.Tk):
         self.geometry("900x700")
         self.configure(bg="#f0f0f0")
         
+        # Algorithms run on a worker thread so that the window stays responsive
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.running = None
+        self.running_capacity = None
+        self.cancel_event = None
+        self.progress_queue = None
+        
         self.create_widgets()
         self.style_ui()
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
     
     def style_ui(self):
         self.style = ttk.Style()
@@ -58,10 +72,18 @@ class PackingApp(tk.Tk):
         algo_frame = ttk.LabelFrame(main_frame, text="Algorithms", padding=10)
         algo_frame.grid(row=1, column=1, sticky="nsew")
         
-        ttk.Button(algo_frame, text="First Fit", command=lambda: self.run_algorithm("First Fit"), style="Primary.TButton").grid(row=0, column=0, pady=5, sticky="we")
-        ttk.Button(algo_frame, text="Best Fit", command=lambda: self.run_algorithm("Best Fit"), style="Primary.TButton").grid(row=1, column=0, pady=5, sticky="we")
-        ttk.Button(algo_frame, text="Worst Fit", command=lambda: self.run_algorithm("Worst Fit"), style="Primary.TButton").grid(row=2, column=0, pady=5, sticky="we")
-        ttk.Button(algo_frame, text="Brute Force", command=lambda: self.run_algorithm("Brute Force"), style="Secondary.TButton").grid(row=3, column=0, pady=5, sticky="we")
+        self.algorithm_buttons = []
+        for row, (name, style) in enumerate([("First Fit", "Primary.TButton"), ("Best Fit", "Primary.TButton"),
+                                             ("Worst Fit", "Primary.TButton"), ("Brute Force", "Secondary.TButton")]):
+            button = ttk.Button(algo_frame, text=name, command=lambda name=name: self.run_algorithm(name), style=style)
+            button.grid(row=row, column=0, pady=5, sticky="we")
+            self.algorithm_buttons.append(button)
+        
+        self.cancel_button = ttk.Button(algo_frame, text="Cancel", command=self.cancel_algorithm, state="disabled")
+        self.cancel_button.grid(row=4, column=0, pady=5, sticky="we")
+        
+        self.status_label = ttk.Label(algo_frame, text="")
+        self.status_label.grid(row=5, column=0, pady=5, sticky="we")
         
         result_frame = ttk.LabelFrame(main_frame, text="Results", padding=10)
         result_frame.grid(row=2, column=0, columnspan=2, sticky="nsew", pady=(10, 0))
@@ -90,6 +112,8 @@ class PackingApp(tk.Tk):
         self.result_text.delete(1.0, tk.END)
     
     def run_algorithm(self, algorithm_name):
+        if self.running is not None:
+            return
         try:
             bin_capacity = validate_input(self.bin_capacity_entry.get(), "Bin capacity")
             items_str = self.items_entry.get()
@@ -98,31 +122,95 @@ class PackingApp(tk.Tk):
                 raise ValueError("Items list cannot be empty")
             
             items = [validate_input(item.strip(), f"Item {i+1}") for i, item in enumerate(items_str.split(","))]
-            
-            self.result_text.delete(1.0, tk.END)
-            self.result_text.insert(tk.END, f"Running {algorithm_name} algorithm...\n")
-            self.result_text.insert(tk.END, f"Bin capacity: {bin_capacity}\n")
-            self.result_text.insert(tk.END, f"Items: {items}\n\n")
-            
-            if algorithm_name == "First Fit":
-                bins = first_fit(items, bin_capacity)
-            elif algorithm_name == "Best Fit":
-                bins = best_fit(items, bin_capacity)
-            elif algorithm_name == "Worst Fit":
-                bins = worst_fit(items, bin_capacity)
-            elif algorithm_name == "Brute Force":
-                min_bins = brute_force(items, bin_capacity)
-                self.result_text.insert(tk.END, f"Minimum number of bins needed: {min_bins}\n")
-                return
-            
-            self.result_text.insert(tk.END, f"Number of bins used: {len(bins)}\n")
-            for i, bin in enumerate(bins, 1):
-                self.result_text.insert(tk.END, f"Bin {i}: {bin} (Total: {sum(bin)})\n")
-            
-            total_space = len(bins) * bin_capacity
-            used_space = sum(sum(bin) for bin in bins)
-            efficiency = (used_space / total_space) * 100 if total_space > 0 else 0
-            self.result_text.insert(tk.END, f"\nEfficiency: {efficiency:.2f}%")
-            
         except ValueError as e:
-            messagebox.showerror("Input Error", str(e))
\ No newline at end of file
+            messagebox.showerror("Input Error", str(e))
+            return
+        
+        self.result_text.delete(1.0, tk.END)
+        self.result_text.insert(tk.END, f"Running {algorithm_name} algorithm...\n")
+        self.result_text.insert(tk.END, f"Bin capacity: {bin_capacity}\n")
+        self.result_text.insert(tk.END, f"Items: {items}\n\n")
+        
+        self.cancel_event = threading.Event()
+        self.progress_queue = queue.Queue()
+        self.running = self.executor.submit(self.solve, algorithm_name, items, bin_capacity,
+                                            self.progress_queue, self.cancel_event)
+        self.running_capacity = bin_capacity
+        self.set_running(True)
+        self.after(POLL_INTERVAL, self.poll_progress)
+    
+    def solve(self, algorithm_name, items, bin_capacity, progress_queue, cancel_event):
+        """Run on the worker thread: no Tk call here, only the queue"""
+        def progress(bins, lower):
+            progress_queue.put((bins, lower))
+        
+        if algorithm_name == "First Fit":
+            return first_fit(items, bin_capacity), None
+        elif algorithm_name == "Best Fit":
+            return best_fit(items, bin_capacity), None
+        elif algorithm_name == "Worst Fit":
+            return worst_fit(items, bin_capacity), None
+        elif algorithm_name == "Brute Force":
+            stats = {}
+            bins = brute_force(items, bin_capacity, max_time=10, progress=progress, cancel=cancel_event,
+                               stats=stats)
+            return bins, stats
+    
+    def poll_progress(self):
+        # Only the latest update matters
+        latest = None
+        while True:
+            try:
+                latest = self.progress_queue.get_nowait()
+            except queue.Empty:
+                break
+        if latest is not None:
+            bins, lower = latest
+            self.status_label.config(text=f"Best so far: {len(bins)} bins (at least {lower})")
+        
+        if not self.running.done():
+            self.after(POLL_INTERVAL, self.poll_progress)
+            return
+        future = self.running
+        self.running = None
+        self.set_running(False)
+        try:
+            bins, stats = future.result()
+        except Exception as e:
+            messagebox.showerror("Algorithm Error", str(e))
+            return
+        if self.cancel_event.is_set():
+            self.result_text.insert(tk.END, "Cancelled, best packing found so far:\n")
+        elif stats is not None and stats["complete"]:
+            self.result_text.insert(tk.END, f"Minimum number of bins needed: {len(bins)}\n")
+        elif stats is not None:
+            # Time limit reached before the packing was proved optimal
+            self.result_text.insert(tk.END, f"Best found: {len(bins)} bins (≥ lower bound {stats['bound']})\n")
+        self.show_results(bins, self.running_capacity)
+    
+    def show_results(self, bins, bin_capacity):
+        self.result_text.insert(tk.END, f"Number of bins used: {len(bins)}\n")
+        for i, bin in enumerate(bins, 1):
+            self.result_text.insert(tk.END, f"Bin {i}: {bin} (Total: {sum(bin)})\n")
+        
+        total_space = len(bins) * bin_capacity
+        used_space = sum(sum(bin) for bin in bins)
+        efficiency = (used_space / total_space) * 100 if total_space > 0 else 0
+        self.result_text.insert(tk.END, f"\nEfficiency: {efficiency:.2f}%")
+    
+    def cancel_algorithm(self):
+        if self.running is not None:
+            self.cancel_event.set()
+            self.status_label.config(text="Cancelling...")
+    
+    def set_running(self, running):
+        for button in self.algorithm_buttons:
+            button.config(state="disabled" if running else "normal")
+        self.cancel_button.config(state="normal" if running else "disabled")
+        self.status_label.config(text="Running..." if running else "")
+    
+    def on_close(self):
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.destroy()
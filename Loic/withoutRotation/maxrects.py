@@ -0,0 +1,254 @@
+from math import ceil
+
+HEURISTICS = ("bssf", "blsf", "baf", "bl", "cp")
+
+SORT_KEYS = {
+    "area": lambda r: -r[0] * r[1],
+    "height": lambda r: -r[1],
+    "width": lambda r: -r[0],
+    "perimeter": lambda r: -(r[0] + r[1]),
+    "max_side": lambda r: -max(r[0], r[1]),
+}
+
+
+class MaxRectsBin:
+    """Container packed with the maximal rectangles method
+
+    The free space is kept as the set of maximal free rectangles (none is
+    contained in another). They are indexed twice: by grid cell, to find
+    the ones a placement cuts and to prune the pieces, and by size class
+    (bit length of width and height), so that looking for a place for an
+    item never looks at the free rectangles that are too small for it.
+
+    Heuristics:
+    - "bssf": best short side fit (smallest leftover on the short side)
+    - "blsf": best long side fit
+    - "baf": best area fit
+    - "bl": bottom-left (lowest top edge, then leftmost)
+    - "cp": contact point (longest contact with edges and placed items)
+    """
+
+    def __init__(self, width, height, heuristic="bssf", allow_rotation=True, cell_size=None):
+        if heuristic not in HEURISTICS:
+            raise ValueError(f"Unknown heuristic: {heuristic}")
+        self.width = width
+        self.height = height
+        self.heuristic = heuristic
+        self.allow_rotation = allow_rotation
+        self.cell = cell_size or max(width, height, 1) / 16
+        # Placed items are small and only the contact point score looks
+        # them up, through a finer grid of their own
+        self.placed_cell = self.cell / 4
+        self.placed = []
+        self.free = {}
+        self.free_cells = {}
+        self.free_sizes = {}
+        self.placed_cells = {}
+        # (table name, key) of the sets this bin may change in place,
+        # the others may be shared with a snapshot
+        self.owned = set()
+        self.next_id = 0
+        self._add_free((0, 0, width, height))
+
+    def insert(self, w, h):
+        """Place a w x h rectangle, return (x, y, w, h) or None if it does not fit"""
+        best_score = None
+        best_rect = None
+        orientations = [(w, h)]
+        if self.allow_rotation and w != h:
+            orientations.append((h, w))
+        for rw, rh in orientations:
+            for fid in self._fitting_free(rw, rh):
+                fx, fy, fw, fh = self.free[fid]
+                score = self._score(fx, fy, fw, fh, rw, rh)
+                if best_score is None or score < best_score:
+                    best_score = score
+                    best_rect = (fx, fy, rw, rh)
+        if best_rect is not None:
+            self.place(best_rect)
+        return best_rect
+
+    def place(self, rect):
+        """Mark `rect` as used and update the maximal free rectangles"""
+        x, y, w, h = rect
+        pieces = []
+        for fid in self._overlapping_free(rect):
+            fx, fy, fw, fh = self.free[fid]
+            self._remove_free(fid)
+            # Up to four maximal pieces around the placed rectangle
+            if x > fx:
+                pieces.append((fx, fy, x - fx, fh))
+            if x + w < fx + fw:
+                pieces.append((x + w, fy, fx + fw - x - w, fh))
+            if y > fy:
+                pieces.append((fx, fy, fw, y - fy))
+            if y + h < fy + fh:
+                pieces.append((fx, y + h, fw, fy + fh - y - h))
+
+        # Only the new pieces can be contained in another free rectangle
+        kept = []
+        for i, piece in enumerate(pieces):
+            if any(_contains(other, piece) and (other != piece or j < i)
+                   for j, other in enumerate(pieces) if j != i):
+                continue
+            # A free rectangle containing the piece covers its corner cell
+            corner = (int(piece[0] // self.cell), int(piece[1] // self.cell))
+            if any(_contains(self.free[fid], piece) for fid in self.free_cells.get(corner, ())):
+                continue
+            kept.append(piece)
+        for piece in kept:
+            self._add_free(piece)
+
+        if self.heuristic == "cp":
+            for cell in self._cells(x, y, w, h, self.placed_cell):
+                self._own("placed_cells", cell, list).append(len(self.placed))
+        self.placed.append(rect)
+
+    def snapshot(self):
+        """Copy of the bin; the cell and size sets are shared until either side changes one"""
+        other = MaxRectsBin.__new__(MaxRectsBin)
+        other.__dict__.update(self.__dict__)
+        other.placed = list(self.placed)
+        other.free = dict(self.free)
+        other.free_cells = dict(self.free_cells)
+        other.free_sizes = dict(self.free_sizes)
+        other.placed_cells = dict(self.placed_cells)
+        # Neither side owns the shared sets any more
+        other.owned = set()
+        self.owned = set()
+        return other
+
+    def result(self):
+        return [list(self.placed)]
+
+    def free_boxes(self):
+        """(width, height) of every maximal free rectangle"""
+        return [(fw, fh) for _, _, fw, fh in self.free.values()]
+
+    def occupancy(self):
+        used = sum(w * h for _, _, w, h in self.placed)
+        return used / (self.width * self.height)
+
+    def _score(self, fx, fy, fw, fh, w, h):
+        heuristic = self.heuristic
+        if heuristic == "bl":
+            return (fy + h, fx)
+        if heuristic == "cp":
+            return (-self._contact(fx, fy, w, h), fy, fx)
+        leftover_w = fw - w
+        leftover_h = fh - h
+        short = min(leftover_w, leftover_h)
+        long = max(leftover_w, leftover_h)
+        if heuristic == "bssf":
+            return (short, long, fy, fx)
+        if heuristic == "blsf":
+            return (long, short, fy, fx)
+        return (fw * fh - w * h, short, fy, fx)
+
+    def _contact(self, x, y, w, h):
+        score = 0
+        if x == 0 or x + w == self.width:
+            score += h
+        if y == 0 or y + h == self.height:
+            score += w
+        seen = set()
+        # Placed rectangles touching an edge share at least one cell with it
+        for cell in self._cells(x - 1e-9, y - 1e-9, w + 2e-9, h + 2e-9, self.placed_cell):
+            for index in self.placed_cells.get(cell, ()):
+                if index in seen:
+                    continue
+                seen.add(index)
+                px, py, pw, ph = self.placed[index]
+                if px == x + w or px + pw == x:
+                    score += max(0, min(y + h, py + ph) - max(y, py))
+                if py == y + h or py + ph == y:
+                    score += max(0, min(x + w, px + pw) - max(x, px))
+        return score
+
+    def _cells(self, x, y, w, h, cell=None):
+        cell = cell or self.cell
+        x0 = int(x // cell)
+        y0 = int(y // cell)
+        x1 = max(x0, ceil((x + w) / cell) - 1)
+        y1 = max(y0, ceil((y + h) / cell) - 1)
+        for i in range(x0, x1 + 1):
+            for j in range(y0, y1 + 1):
+                yield (i, j)
+
+    def _size_class(self, w, h):
+        return (int(w).bit_length(), int(h).bit_length())
+
+    def _add_free(self, rect):
+        fid = self.next_id
+        self.next_id += 1
+        self.free[fid] = rect
+        for cell in self._cells(*rect):
+            self._own("free_cells", cell, set).add(fid)
+        self._own("free_sizes", self._size_class(rect[2], rect[3]), set).add(fid)
+
+    def _remove_free(self, fid):
+        rect = self.free.pop(fid)
+        for cell in self._cells(*rect):
+            ids = self._own("free_cells", cell, set)
+            ids.discard(fid)
+            if not ids:
+                del self.free_cells[cell]
+        size = self._size_class(rect[2], rect[3])
+        ids = self._own("free_sizes", size, set)
+        ids.discard(fid)
+        if not ids:
+            del self.free_sizes[size]
+
+    def _own(self, name, key, kind):
+        """The container under `key` in table `name`, copied first if it may be shared"""
+        table = getattr(self, name)
+        if key not in table or (name, key) not in self.owned:
+            table[key] = kind(table.get(key, ()))
+            self.owned.add((name, key))
+        return table[key]
+
+    def _overlapping_free(self, rect):
+        x, y, w, h = rect
+        found = set()
+        for cell in self._cells(x, y, w, h):
+            found.update(self.free_cells.get(cell, ()))
+        result = []
+        for fid in found:
+            fx, fy, fw, fh = self.free[fid]
+            if fx < x + w and x < fx + fw and fy < y + h and y < fy + fh:
+                result.append(fid)
+        return result
+
+    def _fitting_free(self, w, h):
+        wc, hc = self._size_class(w, h)
+        for (fwc, fhc), ids in self.free_sizes.items():
+            if fwc < wc or fhc < hc:
+                continue
+            for fid in ids:
+                fw, fh = self.free[fid][2], self.free[fid][3]
+                if w <= fw and h <= fh:
+                    yield fid
+
+
+def _contains(outer, inner):
+    ox, oy, ow, oh = outer
+    ix, iy, iw, ih = inner
+    return ox <= ix and oy <= iy and ix + iw <= ox + ow and iy + ih <= oy + oh
+
+
+def maxrects(rectangles, container_width, container_height, heuristic="bssf",
+             sort="area", allow_rotation=True):
+    """MaxRects packing of (w, h) rectangles, returns [placed_rects] like best_fit_2d"""
+    if sort is not None:
+        rectangles = sorted(rectangles, key=SORT_KEYS[sort])
+    # Cells a few items wide keep both the cell lists and the queries short,
+    # with at most 16 cells along a side of the container
+    cell_size = max(container_width, container_height, 1) / 16
+    if rectangles:
+        mean_area = sum(w * h for w, h in rectangles) / len(rectangles)
+        cell_size = max(cell_size, 2 * mean_area ** 0.5)
+    container = MaxRectsBin(container_width, container_height, heuristic,
+                            allow_rotation, cell_size)
+    for w, h in rectangles:
+        container.insert(w, h)
+    return [container.placed]
@@ -0,0 +1,157 @@
+import math
+import random
+import time
+
+from algorithms_2d import PLACEMENTS, SequencePacking
+from maxrects import SORT_KEYS
+
+# Order each placement routine sorts by on its own, the starting point of
+# the search. With best_fit MaxRects tries both orientations itself, the
+# rotation flag only changes which one it tries first
+START_SORTS = {"nfdh": "height", "ffdh": "height", "best_fit": "area"}
+
+
+class Solution:
+    """A sequence of (rectangle index, rotated) and its packing"""
+
+    def __init__(self, sequence, packing):
+        self.sequence = sequence
+        self.packing = packing
+        self.area = packing.area
+
+
+class Decoder:
+    """Decode sequences with a placement routine, replaying only what changed"""
+
+    def __init__(self, rectangles, container_width, container_height, placement="best_fit",
+                 step=None):
+        if placement not in PLACEMENTS:
+            raise ValueError(f"Unknown placement: {placement}")
+        self.rectangles = rectangles
+        self.width = container_width
+        self.height = container_height
+        self.placement = placement
+        # Snapshots are O(1) or close to it, the replay after one is what costs
+        self.step = step or max(4, int(math.sqrt(len(rectangles))) // 2)
+
+    def decode(self, sequence, base=None):
+        """Decode `sequence`, replaying from the first position where it differs from `base`"""
+        k = 0 if base is None else _first_difference(sequence, base.sequence)
+        dims = []
+        for index, rotated in sequence[k:]:
+            w, h = self.rectangles[index]
+            dims.append((h, w) if rotated else (w, h))
+        if base is None:
+            packing = SequencePacking(dims, self.width, self.height, self.placement, self.step)
+        else:
+            packing = base.packing.replace_tail(k, dims)
+        return Solution(sequence, packing)
+
+
+def simulated_annealing(rectangles, container_width, container_height, placement="best_fit",
+                        max_time=1.0, seed=None):
+    """Simulated annealing over the order and rotation of the rectangles, returns shelves
+
+    The search starts from the order the placement routine sorts by. A
+    neighbour swaps two rectangles or rotates one. The temperature goes
+    down geometrically with the time spent, from the mean rectangle area
+    to a thousandth of it.
+    """
+    if not rectangles:
+        return []
+    rng = random.Random(seed)
+    decoder = Decoder(rectangles, container_width, container_height, placement)
+    key = SORT_KEYS[START_SORTS[placement]]
+    order = sorted(range(len(rectangles)), key=lambda i: key(rectangles[i]))
+    current = decoder.decode([(i, False) for i in order])
+    best = current
+
+    start_temperature = sum(w * h for w, h in rectangles) / len(rectangles)
+    start = time.time()
+    while True:
+        elapsed = (time.time() - start) / max_time if max_time > 0 else 1
+        if elapsed >= 1:
+            break
+        temperature = start_temperature * 0.001 ** elapsed
+        candidate = decoder.decode(_neighbour(current.sequence, rng), current)
+        delta = candidate.area - current.area
+        if delta >= 0 or rng.random() < math.exp(delta / temperature):
+            current = candidate
+            if current.area > best.area:
+                best = current
+    return best.packing.result()
+
+
+def genetic(rectangles, container_width, container_height, placement="best_fit",
+            max_time=1.0, population_size=30, mutation_rate=0.2, seed=None):
+    """Steady-state genetic algorithm with order crossover, returns shelves
+
+    The population starts from the sorted orders and random ones. Each
+    child of two tournament winners replaces the worst individual if it
+    is better; it is decoded from the parent it shares the longest prefix
+    with.
+    """
+    if not rectangles:
+        return []
+    rng = random.Random(seed)
+    decoder = Decoder(rectangles, container_width, container_height, placement)
+    n = len(rectangles)
+    population = []
+    for key in SORT_KEYS.values():
+        order = sorted(range(n), key=lambda i: key(rectangles[i]))
+        population.append(decoder.decode([(i, False) for i in order]))
+    while len(population) < population_size:
+        order = list(range(n))
+        rng.shuffle(order)
+        population.append(decoder.decode([(i, rng.random() < 0.5) for i in order]))
+
+    start = time.time()
+    while time.time() - start < max_time:
+        first = _tournament(population, rng)
+        second = _tournament(population, rng)
+        sequence = _order_crossover(first.sequence, second.sequence, rng)
+        if rng.random() < mutation_rate:
+            sequence = _neighbour(sequence, rng)
+        base = max((first, second), key=lambda p: _first_difference(sequence, p.sequence))
+        child = decoder.decode(sequence, base)
+        worst = min(range(len(population)), key=lambda k: population[k].area)
+        if child.area > population[worst].area:
+            population[worst] = child
+    return max(population, key=lambda p: p.area).packing.result()
+
+
+def _neighbour(sequence, rng):
+    sequence = list(sequence)
+    i = rng.randrange(len(sequence))
+    if len(sequence) > 1 and rng.random() < 0.5:
+        j = rng.randrange(len(sequence))
+        sequence[i], sequence[j] = sequence[j], sequence[i]
+    else:
+        index, rotated = sequence[i]
+        sequence[i] = (index, not rotated)
+    return sequence
+
+
+def _order_crossover(first, second, rng):
+    """OX: a slice of `first` in place, the other rectangles in the order of `second`"""
+    n = len(first)
+    a, b = sorted(rng.sample(range(n + 1), 2)) if n > 1 else (0, n)
+    kept = first[a:b]
+    taken = {index for index, _ in kept}
+    rest = [gene for gene in second if gene[0] not in taken]
+    return rest[:a] + kept + rest[a:]
+
+
+def _tournament(population, rng, size=3):
+    return max(rng.sample(population, min(size, len(population))), key=lambda p: p.area)
+
+
+def _first_difference(a, b):
+    # Block comparisons run at C speed up to the block that differs
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i:i + 64] == b[i:i + 64]:
+        i += 64
+    while i < n and a[i] == b[i]:
+        i += 1
+    return min(i, n)
@@ -0,0 +1,148 @@
+import bisect
+import math
+
+from algorithms_2d import FFDHState
+from maxrects import MaxRectsBin, SORT_KEYS
+from skyline import SkylineBin
+
+# Container packers that open as many containers as needed
+PACKERS = {
+    "maxrects": lambda width, height, rotation: MaxRectsBin(width, height, "bssf", rotation),
+    "skyline": lambda width, height, rotation: SkylineBin(width, height, "bottom_left", rotation),
+    "shelf": lambda width, height, rotation: FFDHState(width, height),
+}
+
+# Most width thresholds a BinIndex keeps
+CHANNELS = 64
+
+
+class BinIndex:
+    """Max segment trees over the free space of each container
+
+    Channel j keeps, for every container, the height of its tallest free
+    box at least thresholds[j] wide (see free_boxes). A w x h rectangle
+    is looked up in the channel of the largest threshold <= w: the
+    heights there are upper bounds, so no container that can take it is
+    skipped, and the containers that are too full are skipped whole
+    ranges at a time. The thresholds are taken among the widths that
+    will be looked up, so with few distinct widths the bounds are exact.
+    """
+
+    def __init__(self, widths, channels=CHANNELS, size=16):
+        widths = sorted(set(widths))
+        if len(widths) > channels:
+            widths = [widths[k * len(widths) // channels] for k in range(channels)]
+        self.thresholds = sorted(set(widths) | {0})
+        self.size = 1
+        while self.size < max(size, 1):
+            self.size *= 2
+        self.trees = [[0] * (2 * self.size) for _ in self.thresholds]
+
+    def set(self, index, boxes):
+        """Record the free boxes (width, height) of container `index`"""
+        while index >= self.size:
+            self._grow()
+        heights = [0] * len(self.thresholds)
+        for fw, fh in boxes:
+            j = bisect.bisect_right(self.thresholds, fw) - 1
+            while j >= 0 and heights[j] < fh:
+                heights[j] = fh
+                j -= 1
+        for tree, height in zip(self.trees, heights):
+            i = self.size + index
+            if tree[i] == height:
+                continue
+            tree[i] = height
+            i //= 2
+            # Stop once an ancestor keeps its maximum
+            while i:
+                value = max(tree[2 * i], tree[2 * i + 1])
+                if tree[i] == value:
+                    break
+                tree[i] = value
+                i //= 2
+
+    def find(self, w, h, start=0, rotation=False):
+        """Leftmost container >= start that may take a w x h rectangle, or -1"""
+        # Every width is >= thresholds[0] = 0
+        tree = self.trees[bisect.bisect_right(self.thresholds, w) - 1]
+        rotated = self.trees[bisect.bisect_right(self.thresholds, h) - 1] if rotation else None
+        stack = [(1, 0, self.size)]
+        while stack:
+            i, lo, hi = stack.pop()
+            if hi <= start:
+                continue
+            if tree[i] < h and (rotated is None or rotated[i] < w):
+                continue
+            if i >= self.size:
+                return lo
+            mid = (lo + hi) // 2
+            stack.append((2 * i + 1, mid, hi))
+            stack.append((2 * i, lo, mid))
+        return -1
+
+    def _grow(self):
+        old_size = self.size
+        self.size *= 2
+        for k, old in enumerate(self.trees):
+            tree = [0] * (2 * self.size)
+            tree[self.size:self.size + old_size] = old[old_size:2 * old_size]
+            for i in range(self.size - 1, 0, -1):
+                tree[i] = max(tree[2 * i], tree[2 * i + 1])
+            self.trees[k] = tree
+
+
+def pack_bins_2d(rectangles, container_width, container_height, packer="maxrects",
+                 sort="area", allow_rotation=True):
+    """Pack every rectangle, opening new containers as needed; returns one layout per container
+
+    Each rectangle goes to the first container that takes it (first fit),
+    found through a BinIndex of the free space left in each container.
+    A rectangle that does not fit in an empty container raises ValueError.
+    """
+    if packer not in PACKERS:
+        raise ValueError(f"Unknown packer: {packer}")
+    for w, h in rectangles:
+        fits = w <= container_width and h <= container_height
+        if allow_rotation:
+            fits = fits or (h <= container_width and w <= container_height)
+        if not fits:
+            raise ValueError(f"Rectangle {w}x{h} does not fit in a "
+                             f"{container_width}x{container_height} container")
+    if sort is not None:
+        rectangles = sorted(rectangles, key=SORT_KEYS[sort])
+
+    bins = []
+    widths = [w for w, _ in rectangles]
+    if allow_rotation:
+        widths += [h for _, h in rectangles]
+    index = BinIndex(widths)
+    for w, h in rectangles:
+        i = index.find(w, h, rotation=allow_rotation)
+        while i != -1:
+            if _insert(bins[i], w, h, packer, allow_rotation) is not None:
+                break
+            i = index.find(w, h, i + 1, allow_rotation)
+        if i == -1:
+            i = len(bins)
+            bins.append(PACKERS[packer](container_width, container_height, allow_rotation))
+            _insert(bins[i], w, h, packer, allow_rotation)
+        index.set(i, bins[i].free_boxes())
+
+    if packer == "shelf":
+        return [[rect for shelf in container.result() for rect in shelf] for container in bins]
+    return [container.placed for container in bins]
+
+
+def _insert(container, w, h, packer, allow_rotation):
+    rect = container.insert(w, h)
+    # Shelves never rotate rectangles on their own
+    if rect is None and packer == "shelf" and allow_rotation and w != h:
+        rect = container.insert(h, w)
+    return rect
+
+
+def lower_bound_2d(rectangles, container_width, container_height):
+    """Containers needed at least, by area"""
+    area = sum(w * h for w, h in rectangles)
+    return math.ceil(area / (container_width * container_height) - 1e-9)
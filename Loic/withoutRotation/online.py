@@ -0,0 +1,266 @@
+from collections import deque
+from math import inf
+
+from load_index import LoadHeap, LoadOrder
+from multibin import PACKERS, BinIndex
+from segment_tree import LoadTree
+
+ALGORITHMS = ("first_fit", "best_fit", "worst_fit")
+
+# Width thresholds of the 2D index; the widths to come are not known, so
+# they are spread evenly over the container width
+CHANNELS = 32
+
+
+class OnlinePacker:
+    """1D bin packing of a stream of items, one at a time
+
+    add(item) places the item at once and returns the id of its bin (ids
+    grow with the opening order). A bin is closed when it is full, that
+    is when no item of at least `min_item` can fit any more, and, if
+    `max_open` is given, the oldest open bin is closed whenever there
+    are more open bins than that, which bounds the memory used. Closed
+    bins are handed out by closed() as (id, items).
+
+    Every algorithm finds its bin in O(log n) of the open bins, with the
+    index the offline function of algorithms.py uses, so that a stream
+    gets the same bins as the list would:
+    - "first_fit": oldest bin that fits (LoadTree over the bin slots)
+    - "best_fit": fullest bin that fits (LoadOrder)
+    - "worst_fit": emptiest bin (LoadHeap)
+    """
+
+    def __init__(self, bin_capacity, algorithm="first_fit", min_item=0, max_open=None):
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown algorithm: {algorithm}")
+        self.capacity = bin_capacity
+        self.algorithm = algorithm
+        self.min_item = min_item
+        self.max_open = max_open
+        self.bins = {}  # Open bins, oldest first
+        self.loads = {}
+        self.next_id = 0
+        self.done = deque()
+        # first_fit: slot of each open bin in the LoadTree
+        self.tree = LoadTree(16)
+        self.slots = []
+        self.slot_of = {}
+        # best_fit and worst_fit: the open bins by load
+        self.order = LoadOrder()
+        self.heap = LoadHeap()
+
+    def add(self, item):
+        """Place `item`, return the id of its bin"""
+        if item > self.capacity:
+            raise ValueError(f"Item {item} does not fit in a bin of capacity {self.capacity}")
+        index = self._find(item)
+        if index is None:
+            index = self.next_id
+            self.next_id += 1
+            self.bins[index] = []
+            self.loads[index] = 0
+        else:
+            self._drop(index)
+        self.bins[index].append(item)
+        self.loads[index] += item
+        load = self.loads[index]
+        if load >= self.capacity or load + self.min_item > self.capacity:
+            self._close(index)
+        else:
+            self._put(index)
+        if self.max_open is not None and len(self.bins) > self.max_open:
+            oldest = next(iter(self.bins))
+            self._drop(oldest)
+            self._close(oldest)
+        return index
+
+    def closed(self):
+        """Yield the bins closed since the last call, as (id, items)"""
+        while self.done:
+            yield self.done.popleft()
+
+    def flush(self):
+        """Close every open bin"""
+        for index in list(self.bins):
+            self._drop(index)
+            self._close(index)
+
+    def pack(self, items):
+        """Add every item of an iterable, yielding the bins as they close (all of them at the end)"""
+        for item in items:
+            self.add(item)
+            yield from self.closed()
+        self.flush()
+        yield from self.closed()
+
+    def _find(self, item):
+        capacity = self.capacity
+        if self.algorithm == "first_fit":
+            # Unused slots have a zero load, the leftmost of them is the next one to open
+            slot = self.tree.find(item, capacity)
+            if slot == -1 or slot >= len(self.slots):
+                return None
+            return self.slots[slot]
+        index = (self.order if self.algorithm == "best_fit" else self.heap).find(item, capacity)
+        return None if index == -1 else index
+
+    def _put(self, index):
+        """Enter bin `index` in the search structure at its current load"""
+        load = self.loads[index]
+        if self.algorithm == "first_fit":
+            if index not in self.slot_of:
+                if len(self.slots) == self.tree.size:
+                    self._compact()
+                self.slot_of[index] = len(self.slots)
+                self.slots.append(index)
+            self.tree.set(self.slot_of[index], load)
+        elif self.algorithm == "best_fit":
+            self.order.add(index, load)
+        else:
+            self.heap.add(index, load)
+
+    def _drop(self, index):
+        """Take bin `index` out of the search structure, before its load changes"""
+        if self.algorithm == "first_fit":
+            self.tree.set(self.slot_of[index], inf)
+        elif self.algorithm == "best_fit":
+            self.order.remove(index, self.loads[index])
+        else:
+            self.heap.remove(index, self.loads[index])
+
+    def _close(self, index):
+        if index in self.slot_of:
+            self.slots[self.slot_of.pop(index)] = None
+        del self.loads[index]
+        self.done.append((index, self.bins.pop(index)))
+
+    def _compact(self):
+        # Renumber the slots of the open bins, in the same order, in a
+        # tree with room for as many again
+        self.slots = [index for index in self.slots if index is not None]
+        self.tree = LoadTree(max(16, 2 * len(self.slots)))
+        self.slot_of = {}
+        for slot, index in enumerate(self.slots):
+            self.slot_of[index] = slot
+            self.tree.set(slot, self.loads[index])
+
+
+class OnlinePacker2D:
+    """2D packing of a stream of rectangles into as many containers as needed
+
+    add((w, h)) places the rectangle at once in the first open container
+    that takes it (found through a BinIndex, see multibin) and returns
+    (id, x, y, w, h). A container is closed when no rectangle of at least
+    `min_size` fits any more or, if `max_open` is given, when it is the
+    oldest of too many open containers. Closed containers are handed out
+    by closed() as (id, placed rectangles).
+    """
+
+    def __init__(self, container_width, container_height, packer="shelf", allow_rotation=True,
+                 min_size=(0, 0), max_open=None):
+        if packer not in PACKERS:
+            raise ValueError(f"Unknown packer: {packer}")
+        self.width = container_width
+        self.height = container_height
+        self.packer = packer
+        self.allow_rotation = allow_rotation
+        self.min_size = min_size
+        self.max_open = max_open
+        self.bins = {}
+        self.next_id = 0
+        self.done = deque()
+        self.index = BinIndex([container_width * j / CHANNELS for j in range(CHANNELS)])
+        self.slots = []
+        self.slot_of = {}
+
+    def add(self, rectangle):
+        """Place a (w, h) rectangle, return (id, x, y, w, h)"""
+        w, h = rectangle
+        fits = w <= self.width and h <= self.height
+        if self.allow_rotation:
+            fits = fits or (h <= self.width and w <= self.height)
+        if not fits:
+            raise ValueError(f"Rectangle {w}x{h} does not fit in a "
+                             f"{self.width}x{self.height} container")
+        rect = None
+        slot = self.index.find(w, h, rotation=self.allow_rotation)
+        while slot != -1:
+            index = self.slots[slot]
+            # Closed slots only match empty rectangles
+            if index is not None:
+                rect = self._insert(self.bins[index], w, h)
+                if rect is not None:
+                    break
+            slot = self.index.find(w, h, slot + 1, self.allow_rotation)
+        if rect is None:
+            index = self.next_id
+            self.next_id += 1
+            self.bins[index] = PACKERS[self.packer](self.width, self.height, self.allow_rotation)
+            if len(self.slots) >= 2 * len(self.bins) + 16:
+                self._compact()
+            self.slot_of[index] = len(self.slots)
+            self.slots.append(index)
+            rect = self._insert(self.bins[index], w, h)
+
+        boxes = self.bins[index].free_boxes()
+        if self._full(boxes):
+            self._close(index)
+        else:
+            self.index.set(self.slot_of[index], boxes)
+        if self.max_open is not None and len(self.bins) > self.max_open:
+            self._close(next(iter(self.bins)))
+        return (index,) + rect
+
+    def closed(self):
+        """Yield the containers closed since the last call, as (id, placed rectangles)"""
+        while self.done:
+            yield self.done.popleft()
+
+    def flush(self):
+        """Close every open container"""
+        for index in list(self.bins):
+            self._close(index)
+
+    def pack(self, rectangles):
+        """Add every rectangle of an iterable, yielding the containers as they close"""
+        for rectangle in rectangles:
+            self.add(rectangle)
+            yield from self.closed()
+        self.flush()
+        yield from self.closed()
+
+    def _insert(self, container, w, h):
+        rect = container.insert(w, h)
+        # Shelves never rotate rectangles on their own
+        if rect is None and self.packer == "shelf" and self.allow_rotation and w != h:
+            rect = container.insert(h, w)
+        return rect
+
+    def _full(self, boxes):
+        min_w, min_h = self.min_size
+        for fw, fh in boxes:
+            if fw >= min_w and fh >= min_h:
+                return False
+            if self.allow_rotation and fw >= min_h and fh >= min_w:
+                return False
+        return True
+
+    def _close(self, index):
+        slot = self.slot_of.pop(index)
+        self.index.set(slot, [])
+        self.slots[slot] = None
+        container = self.bins.pop(index)
+        if self.packer == "shelf":
+            placed = [rect for shelf in container.result() for rect in shelf]
+        else:
+            placed = container.placed
+        self.done.append((index, placed))
+
+    def _compact(self):
+        # Renumber the slots of the open containers, in the same order
+        self.slots = [index for index in self.slots if index is not None]
+        self.index = BinIndex(self.index.thresholds, size=2 * len(self.slots))
+        self.slot_of = {}
+        for slot, index in enumerate(self.slots):
+            self.slot_of[index] = slot
+            self.index.set(slot, self.bins[index].free_boxes())
@@ -0,0 +1,96 @@
+import multiprocessing
+import time
+
+from algorithms_2d import nfdh, ffdh, brute_force_2d
+from maxrects import maxrects
+from skyline import skyline
+
+SORTS = ("area", "max_side", "height")
+
+
+def default_strategies():
+    """(name, function, keyword arguments) of every strategy raced by run_portfolio"""
+    strategies = [("nfdh", nfdh, {}), ("ffdh", ffdh, {})]
+    for heuristic in ("bssf", "blsf", "baf", "bl"):
+        for sort in SORTS:
+            for rotation in (True, False):
+                name = f"maxrects-{heuristic}-{sort}" + ("-rot" if rotation else "")
+                strategies.append((name, maxrects, {"heuristic": heuristic, "sort": sort,
+                                                    "allow_rotation": rotation}))
+    for heuristic in ("bottom_left", "min_waste"):
+        for sort in SORTS:
+            for rotation in (True, False):
+                name = f"skyline-{heuristic}-{sort}" + ("-rot" if rotation else "")
+                strategies.append((name, skyline, {"heuristic": heuristic, "sort": sort,
+                                                   "allow_rotation": rotation}))
+    strategies.append(("brute_force", brute_force_2d, {}))
+    return strategies
+
+
+def run_portfolio(rectangles, container_width, container_height, time_limit=1.0,
+                  workers=None, strategies=None, cancel=None):
+    """Run every strategy in a process pool and keep the packing with the best utilization
+
+    Strategies still running at the deadline are dropped: the pool is
+    terminated, which stops its worker processes. The brute force is
+    given the time left as its own limit so that it answers in time.
+
+    Setting `cancel` (a threading.Event) ends the race early, like the
+    deadline.
+
+    Returns a dict with the best strategy name, its shelves and
+    utilization, the utilization and time of each strategy that finished,
+    and the names of those that did not.
+    """
+    if strategies is None:
+        strategies = default_strategies()
+    start = time.perf_counter()
+    pool = multiprocessing.Pool(workers)
+    runs = []
+    try:
+        for name, function, kwargs in strategies:
+            if function is brute_force_2d and "max_time" not in kwargs:
+                # Marge pour le démarrage des processus et le retour du résultat
+                kwargs = dict(kwargs, max_time=max(time_limit * 0.8 - (time.perf_counter() - start), 0))
+            runs.append((name, pool.apply_async(_run, (function, kwargs, rectangles,
+                                                       container_width, container_height))))
+        while True:
+            left = max(time_limit - (time.perf_counter() - start), 0)
+            pending = [run for _, run in runs if not run.ready()]
+            if not pending or not left or (cancel is not None and cancel.is_set()):
+                break
+            pending[0].wait(left if cancel is None else min(left, 0.1))
+    finally:
+        if all(run.ready() for _, run in runs):
+            pool.close()
+        else:
+            # Personne n'attend plus ces résultats : les stratégies encore en
+            # cours sont arrêtées, sinon elles occupent le processeur et
+            # retardent la sortie de l'interpréteur
+            pool.terminate()
+        pool.join()
+
+    total_area = container_width * container_height
+    best = {"name": None, "shelves": [], "utilization": 0.0}
+    results = {}
+    timed_out = []
+    for name, run in runs:
+        if not run.ready():
+            timed_out.append(name)
+            continue
+        if not run.successful():
+            continue
+        shelves, elapsed = run.get()
+        utilization = sum(w * h for shelf in shelves for _, _, w, h in shelf) / total_area
+        results[name] = {"utilization": utilization, "time": elapsed}
+        if best["name"] is None or utilization > best["utilization"]:
+            best = {"name": name, "shelves": shelves, "utilization": utilization}
+    best["results"] = results
+    best["timed_out"] = timed_out
+    return best
+
+
+def _run(function, kwargs, rectangles, container_width, container_height):
+    start = time.perf_counter()
+    shelves = function(rectangles, container_width, container_height, **kwargs)
+    return shelves, time.perf_counter() - start
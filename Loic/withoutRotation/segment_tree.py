@@ -0,0 +1,41 @@
+class LoadTree:
+    """Min segment tree over bin loads, used to find the first bin an item fits in.
+
+    Storing loads (and not residual capacities) lets the search test
+    `load + item <= capacity` exactly like the linear first-fit loop,
+    so float inputs give the same assignment as well.
+    """
+
+    def __init__(self, size):
+        self.size = 1
+        while self.size < max(size, 1):
+            self.size *= 2
+        self.tree = [0] * (2 * self.size)
+
+    def __getitem__(self, index):
+        return self.tree[self.size + index]
+
+    def set(self, index, value):
+        i = self.size + index
+        self.tree[i] = value
+        i //= 2
+        while i:
+            left = self.tree[2 * i]
+            right = self.tree[2 * i + 1]
+            self.tree[i] = left if left < right else right
+            i //= 2
+
+    def add(self, index, amount):
+        self.set(index, self.tree[self.size + index] + amount)
+
+    def find(self, item, capacity):
+        """Return the leftmost index whose load can take `item`, or -1"""
+        tree = self.tree
+        if tree[1] + item > capacity:
+            return -1
+        i = 1
+        while i < self.size:
+            i *= 2
+            if tree[i] + item > capacity:
+                i += 1
+        return i - self.size
@@ -0,0 +1,315 @@
+"""Local HTTP packing service
+
+    python server.py --port 8080 --workers 4
+
+Endpoints (JSON in, JSON out):
+    POST /pack/<algorithm>   body: the instance, as for cli.py, plus
+                             optional "options" (keyword arguments) and
+                             "deadline" (seconds)
+    GET  /health             number of requests in progress
+
+Small 1D requests to first_fit, best_fit or worst_fit are gathered for
+a few milliseconds and packed together by one batch.pack_batch call, in
+a thread of its own. Every other request runs in a process pool, so that the event loop
+stays free and a request that misses its deadline gets 504 on time;
+above `max_pending` requests in progress, new ones get 503 at once.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from cli import ALGORITHMS, solve
+
+BATCHED = ("first_fit", "best_fit", "worst_fit")
+
+# Above this many items a 1D instance is packed on its own, in the pool
+BATCH_ITEM_LIMIT = 4096
+
+# Time limit option of the solvers that have one, given the time left
+# before the deadline
+TIME_LIMITS = {
+    "brute_force": "max_time",
+    "brute_force_2d": "max_time",
+    "branch_and_bound_2d": "max_time",
+    "simulated_annealing": "max_time",
+    "genetic": "max_time",
+}
+
+STATUS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+          413: "Payload Too Large", 422: "Unprocessable Entity", 500: "Internal Server Error",
+          503: "Service Unavailable", 504: "Gateway Timeout"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class Batcher:
+    """Gather the 1D requests of one algorithm and pack them in one pack_batch call
+
+    A batch is packed `delay` seconds after its first request, or as soon
+    as it holds `max_items` items. pack_batch runs in `executor` (the
+    loop's default one if None), so that a large batch does not hold up
+    the other connections.
+    """
+
+    def __init__(self, algorithm, delay=0.002, max_items=65536, executor=None):
+        self.algorithm = algorithm
+        self.delay = delay
+        self.max_items = max_items
+        self.executor = executor
+        self.pending = []
+        self.items = 0
+        self.timer = None
+        # Batches being packed, referenced until they are done
+        self.tasks = set()
+
+    def submit(self, items, capacity):
+        """Future of the bin index of each item"""
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((items, capacity, future))
+        self.items += len(items)
+        if self.items >= self.max_items:
+            self.flush()
+        elif self.timer is None:
+            self.timer = asyncio.get_running_loop().call_later(self.delay, self.flush)
+        return future
+
+    def flush(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        # Requests given up on (deadline exceeded) are left out
+        pending = [entry for entry in self.pending if not entry[2].done()]
+        self.pending = []
+        self.items = 0
+        if not pending:
+            return
+        task = asyncio.get_running_loop().create_task(self._pack(pending))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def _pack(self, pending):
+        from batch import pack_batch
+
+        values = []
+        offsets = [0]
+        capacities = []
+        for items, capacity, _ in pending:
+            values.extend(items)
+            offsets.append(len(values))
+            capacities.append(capacity)
+        loop = asyncio.get_running_loop()
+        try:
+            assignment = await loop.run_in_executor(self.executor, pack_batch, values, offsets,
+                                                    capacities, self.algorithm)
+        except Exception as error:
+            for _, _, future in pending:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        for k, (_, _, future) in enumerate(pending):
+            # Its deadline may have passed while the batch was packed
+            if not future.done():
+                future.set_result((list(assignment[offsets[k]:offsets[k + 1]]), len(pending)))
+
+
+class PackingServer:
+    """asyncio HTTP/1.1 server for the packing algorithms, see the module docstring"""
+
+    def __init__(self, host="127.0.0.1", port=8080, workers=None, max_pending=256,
+                 default_deadline=30.0, max_body=16 * 1024 * 1024, batch_delay=0.002):
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.max_pending = max_pending
+        self.default_deadline = default_deadline
+        self.max_body = max_body
+        # One thread packs the batches, in turn
+        self.batch_executor = ThreadPoolExecutor(max_workers=1)
+        self.batchers = {algorithm: Batcher(algorithm, batch_delay, executor=self.batch_executor)
+                         for algorithm in BATCHED}
+        self.pending = 0
+        self.executor = None
+        self.server = None
+
+    async def start(self):
+        # Workers forked from this process would inherit the open client
+        # sockets and keep closed connections from reaching their end
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+        self.server = await asyncio.start_server(self._connection, self.host, self.port)
+        # Port 0 asks for a free port
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.batch_executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader, self.max_body)
+                except HTTPError as error:
+                    await _respond(writer, error.status, {"error": str(error)}, close=True)
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+                status, payload = await self._dispatch(method, path, body)
+                close = headers.get("connection", "").lower() == "close"
+                await _respond(writer, status, payload, close)
+                if close:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method, path, body):
+        if path == "/health":
+            return 200, {"status": "ok", "pending": self.pending}
+        if not path.startswith("/pack/"):
+            return 404, {"error": f"Unknown path: {path}"}
+        algorithm = path[len("/pack/"):]
+        if algorithm not in ALGORITHMS:
+            return 404, {"error": f"Unknown algorithm: {algorithm}"}
+        if method != "POST":
+            return 405, {"error": "Use POST"}
+        # Backpressure: refuse rather than queue without bound
+        if self.pending >= self.max_pending:
+            return 503, {"error": "Too many requests in progress, retry later"}
+        try:
+            instance = json.loads(body)
+            if not isinstance(instance, dict):
+                raise ValueError("Expected a JSON object")
+        except ValueError as error:
+            return 400, {"error": f"Invalid JSON: {error}"}
+        deadline = instance.pop("deadline", None)
+        if deadline is None:
+            deadline = self.default_deadline
+        elif not _all_numbers([deadline]) or deadline <= 0:
+            return 400, {"error": "deadline must be a positive number of seconds"}
+        self.pending += 1
+        try:
+            record = await asyncio.wait_for(self._pack(algorithm, instance, deadline), deadline)
+        except asyncio.TimeoutError:
+            return 504, {"error": f"Deadline of {deadline} s exceeded"}
+        except HTTPError as error:
+            return error.status, {"error": str(error)}
+        except Exception as error:
+            # A worker process that died, for instance
+            return 500, {"error": f"{type(error).__name__}: {error}"}
+        finally:
+            self.pending -= 1
+        return (422 if "error" in record else 200), record
+
+    async def _pack(self, algorithm, instance, deadline):
+        options = instance.pop("options", None) or {}
+        if not isinstance(options, dict):
+            raise HTTPError(400, "options must be a JSON object")
+        items = instance.get("items")
+        if (algorithm in BATCHED and not options and isinstance(items, list)
+                and len(items) <= BATCH_ITEM_LIMIT):
+            capacity = instance.get("capacity")
+            if not _all_numbers(items + [capacity]):
+                raise HTTPError(400, "items and capacity must be numbers")
+            start = time.perf_counter()
+            assignment, batch_size = await self.batchers[algorithm].submit(items, capacity)
+            bins = [[] for _ in range(max(assignment, default=-1) + 1)]
+            for item, index in zip(items, assignment):
+                bins[index].append(item)
+            return {"id": instance.get("id"), "algorithm": algorithm,
+                    "time": time.perf_counter() - start, "bins": bins, "batch": batch_size}
+
+        limit = TIME_LIMITS.get(algorithm)
+        if limit is not None and limit not in options:
+            # Leave time to send the result back
+            options = dict(options, **{limit: deadline * 0.8})
+        # Even the fast algorithms go to the pool: run here, they would
+        # block every connection and wait_for could not stop them
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, solve, algorithm, instance, options)
+
+
+async def _read_request(reader, max_body):
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, _ = line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise HTTPError(400, "Malformed request line")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise HTTPError(400, "Invalid Content-Length")
+    if length > max_body:
+        raise HTTPError(413, f"Body larger than {max_body} bytes")
+    body = await reader.readexactly(length) if length else b""
+    return method, target.split("?", 1)[0], headers, body
+
+
+async def _respond(writer, status, payload, close=False):
+    body = json.dumps(payload).encode()
+    head = (f"HTTP/1.1 {status} {STATUS[status]}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n")
+    if status == 503:
+        head += "Retry-After: 1\r\n"
+    if close:
+        head += "Connection: close\r\n"
+    writer.write(head.encode("latin-1") + b"\r\n" + body)
+    await writer.drain()
+
+
+def _all_numbers(values):
+    return all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the packing algorithms over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, help="processes for the heavy solvers")
+    parser.add_argument("--max-pending", type=int, default=256,
+                        help="requests in progress above which new ones get 503")
+    parser.add_argument("--deadline", type=float, default=30.0,
+                        help="default deadline of a request, in seconds")
+    args = parser.parse_args(argv)
+
+    async def serve():
+        server = await PackingServer(args.host, args.port, args.workers, args.max_pending,
+                                     args.deadline).start()
+        print(f"Serving on http://{server.host}:{server.port}")
+        await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Shelf index of the FFDH algorithms
+
+The same file is vendored in withoutRotation and 2D_withRotation, which
+are run as separate script folders; withoutRotation/tests/test_vendored.py
+fails as soon as the two copies differ, so a fix goes to both.
+"""
+import math
+
+
+class PersistentShelfIndex:
+    """Persistent segment tree over shelves, used to find the first shelf a rectangle fits on.
+
+    Nodes are tuples that are never modified: set() copies the path to
+    the changed leaf, so snapshot() is a copy of the root reference and
+    older snapshots stay valid while the packing goes on. A leaf is
+    (height, used width, payload), an inner node (max height, min used
+    width, left, right), which lets find() skip ranges of shelves that
+    are all too low or all too full. Shelves not set yet never match.
+    The 2D_withRotation ffdh uses it too, without snapshots.
+    """
+
+    EMPTY = (-math.inf, math.inf, None)
+
+    def __init__(self):
+        self.depth = 0
+        self.root = self.EMPTY
+        self.count = 0
+
+    def snapshot(self):
+        other = PersistentShelfIndex.__new__(PersistentShelfIndex)
+        other.depth = self.depth
+        other.root = self.root
+        other.count = self.count
+        return other
+
+    def __getitem__(self, index):
+        node = self.root
+        for level in range(self.depth - 1, -1, -1):
+            node = node[3] if index >> level & 1 else node[2]
+        return node
+
+    def set(self, index, height, used, payload):
+        while index >= 1 << self.depth:
+            # Nouvelle racine, la moitié droite vide
+            empty = self._empty(self.depth)
+            self.root = (max(self.root[0], empty[0]), min(self.root[1], empty[1]),
+                         self.root, empty)
+            self.depth += 1
+        self.root = self._set(self.root, self.depth, index, (height, used, payload))
+        self.count = max(self.count, index + 1)
+
+    def find(self, w, h, capacity, start=0):
+        """Return the leftmost shelf >= start that can take a w x h rectangle, or -1"""
+        stack = [(self.root, self.depth, 0)]
+        while stack:
+            node, depth, index = stack.pop()
+            if index + (1 << depth) <= start or node[0] < h or node[1] + w > capacity:
+                continue
+            if depth == 0:
+                return index
+            stack.append((node[3], depth - 1, index | 1 << (depth - 1)))
+            stack.append((node[2], depth - 1, index))
+        return -1
+
+    def leaves(self):
+        """Leaves of the opened shelves, in order"""
+        return [self[i] for i in range(self.count)]
+
+    def _set(self, node, depth, index, leaf):
+        if depth == 0:
+            return leaf
+        if index >> (depth - 1) & 1:
+            left, right = node[2], self._set(node[3], depth - 1, index, leaf)
+        else:
+            left, right = self._set(node[2], depth - 1, index, leaf), node[3]
+        return (max(left[0], right[0]), min(left[1], right[1]), left, right)
+
+    _empty_trees = [EMPTY]
+
+    def _empty(self, depth):
+        trees = PersistentShelfIndex._empty_trees
+        while len(trees) <= depth:
+            below = trees[-1]
+            trees.append((below[0], below[1], below, below))
+        return trees[depth]
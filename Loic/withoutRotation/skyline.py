@@ -0,0 +1,317 @@
+from bisect import bisect_left, insort
+from collections import deque
+
+from maxrects import SORT_KEYS
+
+HEURISTICS = ("bottom_left", "min_waste")
+
+# Most waste rectangles kept per size class
+WASTE_PER_CLASS = 8
+
+
+class SkylineBin:
+    """Container packed along its skyline (the top contour of placed items)
+
+    The skyline is kept as three parallel lists (x, y and width of each
+    horizontal segment, left to right). Items sit on top of it, so the
+    space under an item that is wider than the segment it starts on is
+    lost to the skyline; it goes to the waste map instead, free rectangles
+    grouped by size class (bit length of width and height) that are tried
+    first for the next items. A class keeps its WASTE_PER_CLASS largest
+    rectangles, so a lookup goes through a bounded number of them.
+
+    The segments are also indexed by width class, each class sorted by
+    (y, x): with "min_waste", an item that fits on a single segment loses
+    nothing under it, so the lowest such segment is looked up there and
+    the whole skyline is only scanned when there is none.
+
+    Heuristics:
+    - "bottom_left": lowest top edge, then narrowest segment
+    - "min_waste": least area lost under the item, then lowest top edge
+    """
+
+    def __init__(self, width, height, heuristic="bottom_left", allow_rotation=False,
+                 use_waste_map=True, min_size=(0, 0)):
+        if heuristic not in HEURISTICS:
+            raise ValueError(f"Unknown heuristic: {heuristic}")
+        self.width = width
+        self.height = height
+        self.heuristic = heuristic
+        self.allow_rotation = allow_rotation
+        self.use_waste_map = use_waste_map
+        # Waste rectangles below this size can never be used again
+        self.min_size = min_size
+        self.xs = [0]
+        self.ys = [0]
+        self.ws = [width]
+        self.waste = {}
+        self.placed = []
+        # Width class -> sorted (y, x, w) of the segments
+        self.levels = {}
+        self._index(0, 1, True)
+
+    def insert(self, w, h):
+        """Place a w x h rectangle, return (x, y, w, h) or None if it does not fit"""
+        orientations = [(w, h)]
+        if self.allow_rotation and w != h:
+            orientations.append((h, w))
+
+        if self.waste:
+            rect = self._insert_waste(orientations)
+            if rect is not None:
+                return rect
+
+        best = None
+        if self.heuristic == "min_waste":
+            best = self._flat_fit(orientations)
+        if best is None:
+            best = self._scan(orientations)
+        if best is None:
+            return None
+        i, x, y, rw, rh = best
+        self._add_segment(i, x, y, rw, rh)
+        rect = (x, y, rw, rh)
+        self.placed.append(rect)
+        return rect
+
+    def free_boxes(self):
+        """(width, height) of the largest free boxes, one per segment and waste rectangle
+
+        The box of a segment spans the neighbours no higher than it; any
+        box above a span of segments fits in the one of its highest segment.
+        """
+        xs, ys, ws = self.xs, self.ys, self.ws
+        n = len(xs)
+        # First segment of each span, then its end from the right
+        left = [0] * n
+        stack = []
+        for k in range(n):
+            while stack and ys[stack[-1]] <= ys[k]:
+                stack.pop()
+            left[k] = stack[-1] + 1 if stack else 0
+            stack.append(k)
+        boxes = []
+        stack = []
+        for k in range(n - 1, -1, -1):
+            while stack and ys[stack[-1]] <= ys[k]:
+                stack.pop()
+            end = stack[-1] if stack else n
+            stack.append(k)
+            if ys[k] < self.height:
+                boxes.append((xs[end - 1] + ws[end - 1] - xs[left[k]], self.height - ys[k]))
+        for rects in self.waste.values():
+            boxes.extend((fw, fh) for _, _, fw, fh in rects)
+        return boxes
+
+    def occupancy(self):
+        used = sum(w * h for _, _, w, h in self.placed)
+        return used / (self.width * self.height)
+
+    def _fits(self, w, h):
+        """(i, y, waste) for each segment i a w x h item can start on
+
+        y is the lowest the item can go and waste the area lost under it.
+        One sweep: the segments under the item form a window sliding
+        right, with its highest one kept in a monotonic deque and its area
+        taken from prefix sums.
+        """
+        xs, ys, ws = self.xs, self.ys, self.ws
+        n = len(xs)
+        area = [0] * (n + 1)
+        for k in range(n):
+            area[k + 1] = area[k] + ys[k] * ws[k]
+        window = deque()
+        j = 0
+        for i in range(n):
+            right = xs[i] + w
+            if right > self.width:
+                break
+            while j < n and xs[j] < right:
+                while window and ys[window[-1]] <= ys[j]:
+                    window.pop()
+                window.append(j)
+                j += 1
+            while window and window[0] < i:
+                window.popleft()
+            if j == i:
+                # Nothing under an item of width 0
+                yield i, 0, 0
+                continue
+            y = ys[window[0]]
+            if y + h > self.height:
+                continue
+            last = j - 1
+            under = area[last] - area[i] + ys[last] * (right - xs[last])
+            yield i, y, y * w - under
+
+    def _scan(self, orientations):
+        """(i, x, y, w, h) of the best position on the skyline, or None"""
+        best_score = None
+        best = None
+        for rw, rh in orientations:
+            for i, y, waste in self._fits(rw, rh):
+                if self.heuristic == "bottom_left":
+                    score = (y + rh, self.ws[i])
+                else:
+                    score = (waste, y + rh)
+                if best_score is None or score < best_score:
+                    best_score = score
+                    best = (i, self.xs[i], y, rw, rh)
+        return best
+
+    def _flat_fit(self, orientations):
+        """_scan for "min_waste" when an orientation fits on a single segment, else None
+
+        Such a position loses nothing under the item, so the best one is the
+        lowest (then leftmost) segment wide enough, found in the width classes.
+        """
+        best = None
+        for rw, rh in orientations:
+            c = int(rw).bit_length()
+            lowest = None
+            # Wider classes first: their segments are all at least 2^c > rw wide
+            for level, entries in self.levels.items():
+                if level > c and (lowest is None or entries[0] < lowest):
+                    lowest = entries[0]
+            for entry in self.levels.get(c, ()):
+                if lowest is not None and entry >= lowest:
+                    break
+                if entry[2] >= rw:
+                    lowest = entry
+                    break
+            if lowest is None or lowest[0] + rh > self.height:
+                continue
+            y, x, _ = lowest
+            if best is None or y + rh < best[2] + best[4]:
+                best = (bisect_left(self.xs, x), x, y, rw, rh)
+        return best
+
+    def _index(self, start, stop, add):
+        """Add segments start to stop - 1 to the width classes, or remove them"""
+        for k in range(start, stop):
+            entry = (self.ys[k], self.xs[k], self.ws[k])
+            level = int(entry[2]).bit_length()
+            if add:
+                insort(self.levels.setdefault(level, []), entry)
+            else:
+                entries = self.levels[level]
+                del entries[bisect_left(entries, entry)]
+                if not entries:
+                    del self.levels[level]
+
+    def _add_segment(self, i, x, y, w, h):
+        xs, ys, ws = self.xs, self.ys, self.ws
+        right = x + w
+        j = i
+        while j < len(xs) and xs[j] < right:
+            covered = min(xs[j] + ws[j], right) - xs[j]
+            if self.use_waste_map and ys[j] < y:
+                self._add_waste((xs[j], ys[j], covered, y - ys[j]))
+            j += 1
+        # The segments that can change, their neighbours merged in included
+        lo, hi = max(i - 1, 0), min(j + 1, len(xs))
+        stop = xs[hi - 1] + ws[hi - 1]
+        self._index(lo, hi, False)
+        # Segment j - 1 may stick out on the right of the new one
+        end = xs[j - 1] + ws[j - 1]
+        tail = None
+        if end > right:
+            tail = (right, ys[j - 1], end - right)
+        new_x, new_y, new_w = [x], [y + h], [w]
+        if tail is not None:
+            new_x.append(tail[0])
+            new_y.append(tail[1])
+            new_w.append(tail[2])
+        xs[i:j] = new_x
+        ys[i:j] = new_y
+        ws[i:j] = new_w
+        self._merge(max(i - 1, 0), min(i + 2, len(xs)))
+        hi = lo
+        while hi < len(xs) and xs[hi] < stop:
+            hi += 1
+        self._index(lo, hi, True)
+
+    def _merge(self, start, stop):
+        xs, ys, ws = self.xs, self.ys, self.ws
+        k = start
+        while k < min(stop, len(xs)) - 1:
+            if ys[k] == ys[k + 1]:
+                ws[k] += ws[k + 1]
+                del xs[k + 1], ys[k + 1], ws[k + 1]
+                stop -= 1
+            else:
+                k += 1
+
+    def _add_waste(self, rect):
+        if rect[2] > 0 and rect[3] > 0 and rect[2] >= self.min_size[0] and rect[3] >= self.min_size[1]:
+            size = (int(rect[2]).bit_length(), int(rect[3]).bit_length())
+            rects = self.waste.setdefault(size, [])
+            if len(rects) < WASTE_PER_CLASS:
+                rects.append(rect)
+                return
+            # A full class gives up its smallest rectangle for a larger one
+            k = min(range(len(rects)), key=lambda k: rects[k][2] * rects[k][3])
+            if rects[k][2] * rects[k][3] < rect[2] * rect[3]:
+                rects[k] = rect
+
+    def _insert_waste(self, orientations):
+        # Best short side fit among the waste rectangles large enough
+        best_score = None
+        best = None
+        for rw, rh in orientations:
+            wc, hc = int(rw).bit_length(), int(rh).bit_length()
+            for (fwc, fhc), rects in self.waste.items():
+                if fwc < wc or fhc < hc:
+                    continue
+                # Rectangles of the class are at least 2^(c - 1) on a side
+                if best_score is not None and min(_floor(fwc) - rw, _floor(fhc) - rh) >= best_score:
+                    continue
+                for index, (fx, fy, fw, fh) in enumerate(rects):
+                    if rw <= fw and rh <= fh:
+                        score = min(fw - rw, fh - rh)
+                        if best_score is None or score < best_score:
+                            best_score = score
+                            best = ((fwc, fhc), index, rw, rh)
+        if best is None:
+            return None
+        size, index, rw, rh = best
+        rects = self.waste[size]
+        fx, fy, fw, fh = rects[index]
+        rects[index] = rects[-1]
+        rects.pop()
+        if not rects:
+            del self.waste[size]
+        # Guillotine split along the shorter leftover
+        if fw - rw < fh - rh:
+            self._add_waste((fx + rw, fy, fw - rw, rh))
+            self._add_waste((fx, fy + rh, fw, fh - rh))
+        else:
+            self._add_waste((fx + rw, fy, fw - rw, fh))
+            self._add_waste((fx, fy + rh, rw, fh - rh))
+        rect = (fx, fy, rw, rh)
+        self.placed.append(rect)
+        return rect
+
+
+def _floor(size_class):
+    """Smallest side of a size class"""
+    return 2 ** (size_class - 1) if size_class else 0
+
+
+def skyline(rectangles, container_width, container_height, heuristic="bottom_left",
+            sort="height", allow_rotation=False):
+    """Skyline packing of (w, h) rectangles, returns [placed_rects] like best_fit_2d"""
+    if sort is not None:
+        rectangles = sorted(rectangles, key=SORT_KEYS[sort])
+    min_size = (0, 0)
+    if rectangles:
+        min_w = min(w for w, _ in rectangles)
+        min_h = min(h for _, h in rectangles)
+        if allow_rotation:
+            min_w = min_h = min(min_w, min_h)
+        min_size = (min_w, min_h)
+    container = SkylineBin(container_width, container_height, heuristic,
+                           allow_rotation, min_size=min_size)
+    for w, h in rectangles:
+        container.insert(w, h)
+    return [container.placed]
@@ -0,0 +1,62 @@
+"""pack_batch against the functions of algorithms.py, instance by instance"""
+import random
+from fractions import Fraction
+
+import pytest
+
+from algorithms import best_fit, first_fit, worst_fit
+from batch import SCAN_LIMIT, pack_batch
+
+FUNCTIONS = {"first_fit": first_fit, "best_fit": best_fit, "worst_fit": worst_fit}
+
+
+def instances(rng):
+    """Sizes on both sides of SCAN_LIMIT, with ties and oversized items"""
+    result = []
+    for count in [0, 1, SCAN_LIMIT, SCAN_LIMIT + 1] + [rng.randint(1, 4 * SCAN_LIMIT) for _ in range(20)]:
+        if rng.random() < 0.5:
+            items = [rng.randint(1, 110) for _ in range(count)]
+        else:
+            items = [rng.choice([0.1, 0.2, 0.3, 0.4, 0.6, 0.7]) * 100 for _ in range(count)]
+        result.append(items)
+    return result
+
+
+def split(values, offsets, assignment):
+    return [list(assignment[offsets[k]:offsets[k + 1]]) for k in range(len(offsets) - 1)]
+
+
+@pytest.mark.parametrize("algorithm", sorted(FUNCTIONS))
+def test_same_assignment_as_the_functions(algorithm):
+    rng = random.Random(algorithm)
+    batch = instances(rng)
+    values, offsets, capacities = [], [0], []
+    for items in batch:
+        values.extend(items)
+        offsets.append(len(values))
+        capacities.append(rng.choice([100, 100.0, 150]))
+    assignment = pack_batch(values, offsets, capacities, algorithm)
+    for items, capacity, got in zip(batch, capacities, split(values, offsets, assignment)):
+        expected = []
+        FUNCTIONS[algorithm](items, capacity, expected)
+        assert got == expected
+
+
+@pytest.mark.parametrize("capacity", [100, 100.0, Fraction(100)])
+def test_one_capacity_for_all(capacity):
+    # Any numbers.Real, NumPy scalars included, is one capacity, not a sequence
+    batch = [[60, 50, 40], list(range(1, SCAN_LIMIT + 10))]
+    values = batch[0] + batch[1]
+    offsets = [0, 3, len(values)]
+    got = split(values, offsets, pack_batch(values, offsets, capacity, "best_fit"))
+    for items, assignment in zip(batch, got):
+        expected = []
+        best_fit(items, capacity, expected)
+        assert assignment == expected
+
+
+def test_errors():
+    with pytest.raises(ValueError):
+        pack_batch([1, 2], [0, 1, 2], [10], "first_fit")
+    with pytest.raises(ValueError):
+        pack_batch([1], [0, 1], 10, "next_fit")
@@ -0,0 +1,34 @@
+"""compare only reports the changes a rerun on the same code cannot make"""
+from benchmark import compare
+
+
+def result(algorithm="maxrects", **fields):
+    return dict({"instance": "berkey_wang_1/20/0", "algorithm": algorithm, "gap": 0.1,
+                 "time": 0.02, "reference": 0.002, "peak_memory": 100000}, **fields)
+
+
+def metrics(current, before):
+    return [regression["metric"] for regression in compare([current], {"results": [before]})]
+
+
+def test_time_is_scaled_by_the_speed_of_the_machine():
+    # Twice slower, the machine too
+    assert metrics(result(time=0.04, reference=0.004), result()) == []
+    assert metrics(result(time=0.04), result()) == ["time"]
+    # Below the floor
+    assert metrics(result(time=0.0004), result(time=0.0001)) == []
+
+
+def test_regressions_of_gap_memory_and_errors():
+    assert metrics(result(gap=0.2), result()) == ["gap"]
+    assert metrics(result(peak_memory=200000), result()) == ["peak_memory"]
+    assert metrics(result(error="ValueError: no"), result()) == ["error"]
+    assert compare([result(peak_memory=200000)], {"results": [result()]}, memory_tolerance=1.5) == []
+
+
+def test_time_limited_solvers_are_compared_on_proved_gaps_only():
+    before = result("branch_and_bound_2d", complete=False, time=0.2, peak_memory=1000)
+    assert metrics(result("branch_and_bound_2d", complete=False, gap=0.5, time=0.9,
+                          peak_memory=10 ** 6), before) == []
+    before["complete"] = True
+    assert metrics(result("branch_and_bound_2d", complete=True, gap=0.5), before) == ["gap"]
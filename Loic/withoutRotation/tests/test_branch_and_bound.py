@@ -0,0 +1,31 @@
+"""branch_and_bound_2d over a process pool"""
+import random
+import time
+
+import branch_and_bound
+from branch_and_bound import branch_and_bound_2d
+
+
+def rectangles():
+    rng = random.Random(0)
+    return [(rng.randint(5, 30), rng.randint(5, 30)) for _ in range(60)]
+
+
+def late_shard(*args):
+    time.sleep(3)
+
+
+def test_no_shard_in_time_gives_an_incomplete_result(monkeypatch):
+    # Forked workers see the patched task
+    monkeypatch.setattr(branch_and_bound, "_shard_task", late_shard)
+    result = branch_and_bound_2d(rectangles(), 100, 100, max_time=0, workers=2)
+    assert not result["complete"]
+    assert 0 < result["area"] <= result["bound"]
+    assert len(result["placement"]) == len(result["indices"]) > 0
+
+
+def test_shards_agree_with_serial_search():
+    serial = branch_and_bound_2d(rectangles()[:8], 60, 60, max_time=None)
+    parallel = branch_and_bound_2d(rectangles()[:8], 60, 60, max_time=None, workers=2)
+    assert serial["complete"] and parallel["complete"]
+    assert parallel["area"] == serial["area"]
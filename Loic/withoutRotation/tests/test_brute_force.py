@@ -0,0 +1,32 @@
+"""Lower bound and completeness reported by brute_force"""
+import random
+
+from algorithms import brute_force, lower_bound
+
+
+def instance(count, seed=0):
+    # First-Fit needs more bins than L2 on these, so the search has work left
+    rng = random.Random(seed)
+    return [rng.randint(20, 50) if count > 40 else rng.randint(25, 45) for _ in range(count)]
+
+
+def test_proved_minimum_is_complete():
+    stats = {}
+    bins = brute_force(instance(40), 100, stats=stats)
+    assert stats == {"bound": len(bins), "complete": True}
+
+
+def test_time_limit_leaves_it_incomplete():
+    # Not solved within seconds
+    items = instance(80)
+    stats = {}
+    bins = brute_force(items, 100, max_time=0.1, stats=stats)
+    assert not stats["complete"]
+    assert lower_bound(items, 100) <= stats["bound"] < len(bins)
+
+
+def test_oversized_items_count_in_the_bound():
+    stats = {}
+    bins = brute_force([150, 60, 50, 40], 100, stats=stats)
+    assert len(bins) == 3
+    assert stats == {"bound": 3, "complete": True}
@@ -0,0 +1,69 @@
+"""A PackingCache hit gives what the function gives on the caller's items"""
+import importlib
+import random
+
+import pytest
+
+from algorithms import brute_force
+from branch_and_bound import branch_and_bound_2d
+from cache import EXACT, PackingCache
+from cli import ALGORITHMS
+from metaheuristics import simulated_annealing
+
+# Small enough for the exact solvers to complete, and deterministic
+OPTIONS = {
+    "brute_force_2d": {"max_time": None},
+    "branch_and_bound_2d": {"max_time": None},
+    "simulated_annealing": {"max_time": 0, "seed": 1},
+    "genetic": {"max_time": 0, "seed": 1},
+}
+
+
+def instance(kind, rng):
+    if kind == "1d":
+        # Items too large for a bin now and then
+        return [rng.randint(1, 10) for _ in range(10)] + rng.sample([4, 11, 12], 2), (10,)
+    # Few distinct sides, so that sort keys and areas tie
+    return [rng.choice([(2, 3), (3, 2), (2, 2), (4, 3), (3, 4), (1, 4), (4, 1)])
+            for _ in range(9)], (8, 7)
+
+
+@pytest.mark.parametrize("algorithm", sorted(ALGORITHMS))
+def test_cached_equals_uncached(algorithm):
+    module, name, kind = ALGORITHMS[algorithm]
+    function = getattr(importlib.import_module(module), name)
+    options = OPTIONS.get(algorithm, {})
+    rng = random.Random(algorithm)
+    for _ in range(10):
+        items, container = instance(kind, rng)
+        cache = PackingCache()
+        for _ in range(4):
+            rng.shuffle(items)
+            expected = function(list(items), *container, **options)
+            assert cache.call(function, list(items), *container, **options) == expected
+        if name in EXACT:
+            # Any order of the same multiset is a hit
+            assert cache.hits == 3
+
+
+def test_incomplete_results_are_not_stored():
+    rng = random.Random(0)
+    rectangles = [(rng.randint(5, 30), rng.randint(5, 30)) for _ in range(60)]
+    cache = PackingCache()
+    # Stopped at once, far from proved
+    assert not cache.call(branch_and_bound_2d, rectangles, 100, 100, max_time=0)["complete"]
+    cache.call(simulated_annealing, rectangles, 100, 100, max_time=0.01, seed=1)
+    items = [rng.randint(20, 50) for _ in range(80)]
+    stats = {}
+    cache.call(brute_force, items, 100, max_time=0.1, stats=stats)
+    assert not stats["complete"]
+    assert not cache.memory
+
+
+def test_proved_results_are_stored_despite_a_time_limit():
+    cache = PackingCache()
+    first = cache.call(brute_force, [6, 4, 5, 5, 3], 10, max_time=5)
+    stats = {}
+    assert cache.call(brute_force, [3, 5, 5, 4, 6], 10, max_time=5, stats=stats) == first
+    assert cache.hits == 1
+    assert stats == {"bound": 3, "complete": True}
@@ -0,0 +1,91 @@
+"""The indexed First/Best/Worst-Fit engines against the plain O(n²) scans"""
+import random
+
+import pytest
+
+from algorithms import best_fit, first_fit, worst_fit
+
+
+def reference_first_fit(items, bin_capacity):
+    bins = []
+    for item in items:
+        for bin in bins:
+            if sum(bin) + item <= bin_capacity:
+                bin.append(item)
+                break
+        else:
+            bins.append([item])
+    return bins
+
+
+def reference_best_fit(items, bin_capacity):
+    bins = []
+    for item in items:
+        best_bin = None
+        min_space = bin_capacity
+        for bin in bins:
+            space = bin_capacity - (sum(bin) + item)
+            if 0 <= space < min_space:
+                min_space = space
+                best_bin = bin
+        if best_bin is not None:
+            best_bin.append(item)
+        else:
+            bins.append([item])
+    return bins
+
+
+def reference_worst_fit(items, bin_capacity):
+    bins = []
+    for item in items:
+        max_space = -1
+        worst_bin = None
+        for bin in bins:
+            space = bin_capacity - (sum(bin) + item)
+            if space > max_space and space >= 0:
+                max_space = space
+                worst_bin = bin
+        if worst_bin is not None:
+            worst_bin.append(item)
+        else:
+            bins.append([item])
+    return bins
+
+
+PAIRS = [(first_fit, reference_first_fit), (best_fit, reference_best_fit),
+         (worst_fit, reference_worst_fit)]
+
+
+def integer_items(rng):
+    return [rng.randint(1, 100) for _ in range(rng.randint(0, 200))], 100
+
+
+def float_items(rng):
+    return [rng.uniform(0.01, 1.0) for _ in range(rng.randint(0, 200))], 1.0
+
+
+def tie_items(rng):
+    # Tenths and their sums round differently (0.1 + 0.2 > 0.3), so loads
+    # meet the capacity and each other within an ulp
+    return [rng.choice([0.1, 0.2, 0.3, 0.4, 0.6, 0.7]) for _ in range(rng.randint(0, 200))], 1.0
+
+
+@pytest.mark.parametrize("engine, reference", PAIRS, ids=lambda f: getattr(f, "__name__", ""))
+@pytest.mark.parametrize("generate", [integer_items, float_items, tie_items])
+def test_same_bins_as_reference(engine, reference, generate):
+    rng = random.Random(f"{engine.__name__}-{generate.__name__}")
+    for _ in range(200):
+        items, capacity = generate(rng)
+        assert engine(items, capacity) == reference(items, capacity)
+
+
+@pytest.mark.parametrize("engine", [first_fit, best_fit, worst_fit])
+def test_assignment_matches_bins(engine):
+    rng = random.Random(engine.__name__)
+    items, capacity = tie_items(rng)
+    assignment = []
+    bins = engine(items, capacity, assignment)
+    rebuilt = [[] for _ in bins]
+    for item, index in zip(items, assignment):
+        rebuilt[index].append(item)
+    assert rebuilt == bins
@@ -0,0 +1,32 @@
+"""OnlinePacker against the offline functions of algorithms.py"""
+import random
+
+import pytest
+
+from algorithms import best_fit, first_fit, worst_fit
+from online import OnlinePacker
+
+OFFLINE = {"first_fit": first_fit, "best_fit": best_fit, "worst_fit": worst_fit}
+
+
+def float_stream(rng):
+    return [rng.uniform(0.01, 1.0) for _ in range(rng.randint(1, 300))]
+
+
+def tie_stream(rng):
+    # Tenths sum to loads that meet the capacity, and each other, within an ulp
+    return [rng.choice([0.1, 0.2, 0.3, 0.4, 0.6, 0.7]) for _ in range(rng.randint(1, 300))]
+
+
+@pytest.mark.parametrize("algorithm", sorted(OFFLINE))
+@pytest.mark.parametrize("generate", [float_stream, tie_stream])
+def test_same_assignment_as_offline(algorithm, generate):
+    rng = random.Random(f"{algorithm}-{generate.__name__}")
+    for _ in range(200):
+        items = generate(rng)
+        expected = []
+        bins = OFFLINE[algorithm](items, 1.0, expected)
+        packer = OnlinePacker(1.0, algorithm)
+        assert [packer.add(item) for item in items] == expected
+        packer.flush()
+        assert [items for _, items in sorted(packer.closed())] == bins
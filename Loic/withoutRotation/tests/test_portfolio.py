@@ -0,0 +1,41 @@
+"""run_portfolio deadlines and cancellation"""
+import multiprocessing
+import threading
+import time
+
+from algorithms_2d import ffdh
+from portfolio import run_portfolio
+
+RECTANGLES = [(10, 20), (30, 5), (15, 15), (25, 10), (5, 40)] * 4
+
+
+def sleeper(rectangles, container_width, container_height):
+    time.sleep(30)
+    return []
+
+
+def failing(rectangles, container_width, container_height):
+    raise RuntimeError("no packing")
+
+
+def test_slow_strategies_are_stopped_at_the_deadline():
+    start = time.perf_counter()
+    result = run_portfolio(RECTANGLES, 100, 100, time_limit=0.5, workers=2,
+                           strategies=[("ffdh", ffdh, {}), ("sleeper", sleeper, {}),
+                                       ("failing", failing, {})])
+    assert time.perf_counter() - start < 5
+    assert result["name"] == "ffdh"
+    assert set(result["results"]) == {"ffdh"}
+    assert result["timed_out"] == ["sleeper"]
+    # The pool was terminated, not left running
+    assert not multiprocessing.active_children()
+
+
+def test_cancel_ends_the_race():
+    cancel = threading.Event()
+    threading.Timer(0.2, cancel.set).start()
+    start = time.perf_counter()
+    result = run_portfolio(RECTANGLES, 100, 100, time_limit=30, workers=1,
+                           strategies=[("sleeper", sleeper, {})], cancel=cancel)
+    assert time.perf_counter() - start < 5
+    assert result["name"] is None and result["timed_out"] == ["sleeper"]
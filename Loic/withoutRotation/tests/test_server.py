@@ -0,0 +1,81 @@
+"""PackingServer over localhost, on a free port"""
+import asyncio
+import json
+
+from algorithms import first_fit
+from server import PackingServer
+
+# Not proved within seconds, so brute_force runs until its time limit
+# (of 2 s when set explicitly, past the deadline of the request)
+HARD = [31, 46, 27, 38, 44, 21, 35, 49, 26, 33, 41, 29, 37, 24, 45, 32, 48, 23, 39, 28,
+        42, 36, 25, 47, 30, 43, 34, 22, 40, 31, 46, 27, 38, 44, 21, 35, 49, 26, 33, 41,
+        29, 37, 24, 45, 32, 48, 23, 39, 28, 42, 36, 25, 47, 30, 43, 34, 22, 40, 50, 20] * 2
+
+
+async def request(port, method, path, body=b""):
+    """(status, JSON payload) of one request on a connection of its own"""
+    if not isinstance(body, bytes):
+        body = json.dumps(body).encode()
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n"
+                 "Connection: close\r\n\r\n".encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b"\r\n\r\n")
+    return int(head.split(b" ", 2)[1]), json.loads(payload)
+
+
+def serve(test, **options):
+    """Run the coroutine function `test` with a started server"""
+    async def main():
+        server = await PackingServer(port=0, workers=1, **options).start()
+        try:
+            return await test(server)
+        finally:
+            await server.close()
+    return asyncio.run(main())
+
+
+def test_small_1d_requests_are_batched():
+    instances = [[(7 * k + 3 * i) % 10 + 1 for i in range(20)] for k in range(8)]
+
+    async def test(server):
+        return await asyncio.gather(*(request(server.port, "POST", "/pack/first_fit",
+                                              {"items": items, "capacity": 10})
+                                      for items in instances))
+
+    responses = serve(test, batch_delay=0.05)
+    for items, (status, record) in zip(instances, responses):
+        assert status == 200
+        assert record["bins"] == first_fit(items, 10)
+    assert max(record["batch"] for _, record in responses) > 1
+
+
+def test_bad_requests():
+    async def test(server):
+        return [await request(server.port, "POST", "/pack/first_fit", b"{not json"),
+                await request(server.port, "POST", "/pack/first_fit", {"items": ["a"], "capacity": 10}),
+                await request(server.port, "POST", "/pack/first_fit", {"items": [1], "deadline": -1}),
+                await request(server.port, "POST", "/pack/unknown", {}),
+                await request(server.port, "GET", "/elsewhere"),
+                await request(server.port, "GET", "/pack/first_fit")]
+
+    statuses = [status for status, _ in serve(test)]
+    assert statuses == [400, 400, 400, 404, 404, 405]
+
+
+def test_backpressure_and_deadline():
+    async def test(server):
+        slow = asyncio.ensure_future(request(server.port, "POST", "/pack/brute_force",
+                                             {"items": HARD, "capacity": 100, "deadline": 0.5,
+                                              "options": {"max_time": 2}}))
+        # Wait for the slow request to be in progress
+        while (await request(server.port, "GET", "/health"))[1]["pending"] == 0:
+            await asyncio.sleep(0.01)
+        refused = await request(server.port, "POST", "/pack/first_fit", {"items": [1], "capacity": 10})
+        return refused, await slow
+
+    (refused, _), (late, payload) = serve(test, max_pending=1)
+    assert refused == 503
+    assert late == 504 and "Deadline" in payload["error"]
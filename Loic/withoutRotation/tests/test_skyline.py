@@ -0,0 +1,68 @@
+"""SkylineBin placements, free boxes and scaling"""
+import random
+import time
+
+import pytest
+
+from skyline import WASTE_PER_CLASS, SkylineBin, skyline
+
+
+def random_rectangles(rng, count, largest=40):
+    return [(rng.randint(1, largest), rng.randint(1, largest)) for _ in range(count)]
+
+
+def overlap(a, b):
+    return a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and a[1] < b[1] + b[3] and b[1] < a[1] + a[3]
+
+
+@pytest.mark.parametrize("heuristic", ["bottom_left", "min_waste"])
+@pytest.mark.parametrize("allow_rotation", [False, True])
+def test_placements_are_disjoint_and_inside(heuristic, allow_rotation):
+    rng = random.Random(f"{heuristic}-{allow_rotation}")
+    for _ in range(30):
+        width, height = rng.randint(40, 120), rng.randint(40, 120)
+        placed = skyline(random_rectangles(rng, 60), width, height, heuristic,
+                         allow_rotation=allow_rotation)[0]
+        for k, (x, y, w, h) in enumerate(placed):
+            assert 0 <= x and x + w <= width and 0 <= y and y + h <= height
+            assert not any(overlap((x, y, w, h), other) for other in placed[:k])
+
+
+def test_free_boxes_are_the_maximal_boxes_over_spans():
+    rng = random.Random(0)
+    for _ in range(30):
+        container = SkylineBin(rng.randint(40, 120), 100, "min_waste", use_waste_map=False)
+        for w, h in random_rectangles(rng, 30, 20):
+            container.insert(w, h)
+            # Every span of segments, as the quadratic loop listed them
+            xs, ys, ws = container.xs, container.ys, container.ws
+            spans = set()
+            for i in range(len(xs)):
+                for j in range(i, len(xs)):
+                    top = max(ys[i:j + 1])
+                    if top < container.height:
+                        spans.add((xs[j] + ws[j] - xs[i], container.height - top))
+            boxes = set(container.free_boxes())
+            assert boxes <= spans
+            assert all(any(bw >= sw and bh >= sh for bw, bh in boxes) for sw, sh in spans)
+
+
+def test_waste_map_is_bounded():
+    rng = random.Random(1)
+    container = SkylineBin(1000, 10 ** 9, "min_waste")
+    for w, h in random_rectangles(rng, 5000, 100):
+        container.insert(w, h)
+    assert all(len(rects) <= WASTE_PER_CLASS for rects in container.waste.values())
+
+
+def test_min_waste_keeps_up_with_bottom_left_on_a_strip():
+    # The waste map and the scan of every start segment made min_waste
+    # quadratic: 36 times slower than bottom_left on this instance
+    rng = random.Random(2)
+    rectangles = random_rectangles(rng, 16000, 100)
+    times = {}
+    for heuristic in ("bottom_left", "min_waste"):
+        start = time.perf_counter()
+        assert len(skyline(rectangles, 1000, 10 ** 9, heuristic)[0]) == len(rectangles)
+        times[heuristic] = time.perf_counter() - start
+    assert times["min_waste"] < 10 * times["bottom_left"]
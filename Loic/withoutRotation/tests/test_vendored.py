@@ -0,0 +1,13 @@
+"""Modules vendored in both script folders must stay identical"""
+import os
+
+import pytest
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROTATION = os.path.join(os.path.dirname(HERE), "2D_withRotation")
+
+
+@pytest.mark.parametrize("name", ["branch_and_bound.py", "shelf_index.py", "vertices.py", "load_index.py"])
+def test_same_file_in_both_folders(name):
+    with open(os.path.join(HERE, name), "rb") as ours, open(os.path.join(ROTATION, name), "rb") as theirs:
+        assert ours.read() == theirs.read(), f"2D_withRotation/{name} differs, copy it over"
@@ -0,0 +1,19 @@
+"""Vertices of the shapes drawn as polygons
+
+The same file is vendored in withoutRotation and 2D_withRotation, which
+are run as separate script folders; withoutRotation/tests/test_vendored.py
+fails as soon as the two copies differ, so a fix goes to both.
+"""
+
+
+def triangle_polygon(x, y, w, h, quarter):
+    """Vertices (y pointing down) of an isosceles triangle in its (x, y, w, h) bounding box
+
+    `quarter` is the rotation in quarter turns: 0 apex up, 1 apex left
+    with the base vertical on the right, 2 apex down.
+    """
+    if quarter == 0:
+        return [(x, y + h), (x + w, y + h), (x + w / 2, y)]
+    if quarter == 1:
+        return [(x, y + h / 2), (x + w, y), (x + w, y + h)]
+    return [(x, y), (x + w, y), (x + w / 2, y + h)]
@@ -1,50 +1,234 @@
+import math
+import tkinter as tk
+import weakref
+from collections import defaultdict
+
+# Colors of the shelves, in turn
+COLORS = ["#4a6fa5", "#166088", "#4fc3f7", "#59a5d8", "#386fa4"]
+
+# Side of the raster tiles, in pixels
+TILE = 64
+
+# Above this many rectangles with their corner in one tile, they are
+# painted into the tile rather than drawn as canvas items
+DENSE = 256
+
+# Above this many rectangles to draw as items, the densest tiles are
+# painted until they are fewer
+MAX_ITEMS = 4096
+
+# Room right of the container for the legend, in pixels
+LEGEND_WIDTH = 180
+
+_renderers = weakref.WeakKeyDictionary()
+
+
+class PackingRenderer:
+    """Retained-mode drawing of a packing on a Tk canvas
+
+    draw() keeps the layout, redraw() maps it to the current size of the
+    canvas. The canvas items of the previous drawing are reused: they
+    are moved with coords() and hidden when not needed, never deleted
+    and created again. Rectangles smaller than a pixel, and those of
+    tiles holding more than DENSE of them (or the densest tiles when
+    there are more than MAX_ITEMS in all), are painted (without outline)
+    into PhotoImage tiles of TILE pixels; dimensions are only written on
+    rectangles large enough to show them. A resize of the canvas redraws
+    the same layout at the new scale.
+    """
+
+    def __init__(self, canvas, padding=10):
+        self.canvas = canvas
+        self.padding = padding
+        self.shelves = []
+        self.container = None
+        self.size = None
+        self.pending = None
+        self._reset()
+        canvas.bind("<Configure>", self._on_configure, add="+")
+
+    def draw(self, shelves, container_width, container_height):
+        """Show `shelves` (lists of (x, y, w, h)) in a container of the given size"""
+        self.shelves = shelves
+        self.container = (container_width, container_height)
+        self.redraw()
+
+    def clear(self):
+        self.shelves = []
+        self.container = None
+        self.redraw()
+
+    def redraw(self):
+        canvas = self.canvas
+        if self.pending is not None:
+            canvas.after_cancel(self.pending)
+            self.pending = None
+        if self.frame is not None and not canvas.find_withtag(self.frame):
+            # The items were deleted behind our back (canvas.delete("all"))
+            self._reset()
+        if self.container is None:
+            for pool in ("rects", "labels", "tiles", "legend"):
+                self._hide(pool, 0)
+            if self.frame is not None:
+                canvas.itemconfigure(self.frame, state="hidden")
+            return
+
+        width, height = self._canvas_size()
+        self.size = (width, height)
+        container_width, container_height = self.container
+        padding = self.padding
+        scale = min((width - 2 * padding - LEGEND_WIDTH) / container_width,
+                    (height - 2 * padding) / container_height)
+        scale = max(scale, 1e-6)
+
+        # Rectangles to draw as items, and their count per tile
+        drawn = []
+        counts = defaultdict(int)
+        painted = []
+        for i, shelf in enumerate(self.shelves):
+            color = COLORS[i % len(COLORS)]
+            for x, y, w, h in shelf:
+                x0, y0 = x * scale, y * scale
+                x1, y1 = (x + w) * scale, (y + h) * scale
+                if x1 - x0 < 1 or y1 - y0 < 1:
+                    painted.append((x0, y0, x1, y1, color))
+                    continue
+                tile = (int(x0 // TILE), int(y0 // TILE))
+                counts[tile] += 1
+                drawn.append((tile, x0, y0, x1, y1, color, w, h))
+
+        dense = {tile for tile, count in counts.items() if count > DENSE}
+        remaining = len(drawn) - sum(counts[tile] for tile in dense)
+        for tile in sorted(counts, key=counts.get, reverse=True):
+            if remaining <= MAX_ITEMS:
+                break
+            if tile not in dense:
+                dense.add(tile)
+                remaining -= counts[tile]
+
+        rects = labels = 0
+        for tile, x0, y0, x1, y1, color, w, h in drawn:
+            if tile in dense:
+                painted.append((x0, y0, x1, y1, color))
+                continue
+            coords = (padding + x0, padding + y0, padding + x1, padding + y1)
+            if rects < len(self.rects):
+                item = self.rects[rects]
+                canvas.coords(item, *coords)
+                canvas.itemconfigure(item, fill=color, state="normal")
+            else:
+                self.rects.append(canvas.create_rectangle(*coords, fill=color, outline="black",
+                                                          tags="packing"))
+            rects += 1
+            text = f"{w}x{h}"
+            if x1 - x0 < 7 * len(text) + 4 or y1 - y0 < 14:
+                continue
+            center = (padding + (x0 + x1) / 2, padding + (y0 + y1) / 2)
+            if labels < len(self.labels):
+                item = self.labels[labels]
+                canvas.coords(item, *center)
+                canvas.itemconfigure(item, text=text, state="normal")
+            else:
+                self.labels.append(canvas.create_text(*center, text=text, fill="white",
+                                                      tags=("packing", "packing_label")))
+            labels += 1
+        self._hide("rects", rects)
+        self._hide("labels", labels)
+        self._paint(painted, math.ceil(container_width * scale), math.ceil(container_height * scale))
+
+        frame = (padding, padding, padding + container_width * scale, padding + container_height * scale)
+        if self.frame is None:
+            self.frame = canvas.create_rectangle(*frame, outline="black", width=2, tags="packing")
+        else:
+            canvas.coords(self.frame, *frame)
+            canvas.itemconfigure(self.frame, state="normal")
+
+        packed_count = sum(len(shelf) for shelf in self.shelves)
+        legend = [f"Container: {container_width}x{container_height}",
+                  f"Packed: {packed_count} rectangles"]
+        for k, text in enumerate(legend):
+            position = (padding + container_width * scale + 20, padding + 20 + 20 * k)
+            if k < len(self.legend):
+                canvas.coords(self.legend[k], *position)
+                canvas.itemconfigure(self.legend[k], text=text, state="normal")
+            else:
+                self.legend.append(canvas.create_text(*position, text=text, anchor="w",
+                                                      font=("Arial", 10), tags="packing"))
+        self.shown["legend"] = len(legend)
+        # Tiles under the rectangles, labels and frame over them
+        canvas.tag_lower("packing_tile")
+        canvas.tag_raise("packing_label")
+        canvas.tag_raise(self.frame)
+
+    def _paint(self, painted, width, height):
+        """Paint the rectangles of `painted` into the tiles they cover"""
+        pixels = {}
+        for x0, y0, x1, y1, color in painted:
+            # At least one pixel, inside the container
+            left = min(int(x0), width - 1)
+            top = min(int(y0), height - 1)
+            right = min(max(left + 1, math.ceil(x1)), width)
+            bottom = min(max(top + 1, math.ceil(y1)), height)
+            for tx in range(left // TILE, (right - 1) // TILE + 1):
+                for ty in range(top // TILE, (bottom - 1) // TILE + 1):
+                    rows = pixels.get((tx, ty))
+                    if rows is None:
+                        tile_width = min(TILE, width - tx * TILE)
+                        tile_height = min(TILE, height - ty * TILE)
+                        rows = pixels[(tx, ty)] = [["#ffffff"] * tile_width for _ in range(tile_height)]
+                    a = max(left - tx * TILE, 0)
+                    b = min(right - tx * TILE, len(rows[0]))
+                    for row in rows[max(top - ty * TILE, 0):bottom - ty * TILE]:
+                        row[a:b] = [color] * (b - a)
+
+        canvas = self.canvas
+        for k, ((tx, ty), rows) in enumerate(pixels.items()):
+            if k == len(self.tiles):
+                self.images.append(tk.PhotoImage(master=canvas))
+                self.tiles.append(canvas.create_image(0, 0, anchor="nw", image=self.images[k],
+                                                      tags=("packing", "packing_tile")))
+            image = self.images[k]
+            image.configure(width=len(rows[0]), height=len(rows))
+            image.put(" ".join("{" + " ".join(row) + "}" for row in rows), to=(0, 0))
+            canvas.coords(self.tiles[k], self.padding + tx * TILE, self.padding + ty * TILE)
+            canvas.itemconfigure(self.tiles[k], state="normal")
+        self._hide("tiles", len(pixels))
+
+    def _hide(self, name, used):
+        # Only the items shown by the previous drawing need hiding
+        pool = getattr(self, name)
+        for item in pool[used:self.shown.get(name, len(pool))]:
+            self.canvas.itemconfigure(item, state="hidden")
+        self.shown[name] = used
+
+    def _reset(self):
+        self.rects = []
+        self.labels = []
+        self.tiles = []
+        self.images = []
+        self.legend = []
+        self.frame = None
+        self.shown = {}
+
+    def _canvas_size(self):
+        width, height = self.canvas.winfo_width(), self.canvas.winfo_height()
+        # Not mapped yet
+        if width <= 1 or height <= 1:
+            width, height = self.canvas.winfo_reqwidth(), self.canvas.winfo_reqheight()
+        return width, height
+
+    def _on_configure(self, event):
+        if self.container is None or (event.width, event.height) == self.size:
+            return
+        # A resize sends many events, the drawing is redone once they stop
+        if self.pending is None:
+            self.pending = self.canvas.after_idle(self.redraw)
+
+
 def draw_packing(canvas, shelves, container_width, container_height):
-    """Draw the packing solution on the canvas"""
-    scale = 15  # Scaling factor for visualization
-    
-    # Draw container
-    canvas.create_rectangle(
-        10, 10, 
-        10 + container_width * scale, 
-        10 + container_height * scale,
-        outline="black", width=2
-    )
-    
-    # Draw packed rectangles
-    colors = ["#4a6fa5", "#166088", "#4fc3f7", "#59a5d8", "#386fa4"]
-    
-    for i, shelf in enumerate(shelves):
-        for rect in shelf:
-            x, y, w, h = rect
-            color = colors[i % len(colors)]
-            
-            canvas.create_rectangle(
-                10 + x * scale, 
-                10 + y * scale,
-                10 + (x + w) * scale,
-                10 + (y + h) * scale,
-                fill=color, outline="black"
-            )
-            
-            # Display rectangle dimensions
-            canvas.create_text(
-                10 + (x + w/2) * scale,
-                10 + (y + h/2) * scale,
-                text=f"{w}x{h}", fill="white"
-            )
-    
-    # Add legend
-    canvas.create_text(
-        10 + container_width * scale + 20,
-        30,
-        text=f"Container: {container_width}x{container_height}",
-        anchor="w", font=("Arial", 10)
-    )
-    
-    packed_count = sum(len(shelf) for shelf in shelves)
-    canvas.create_text(
-        10 + container_width * scale + 20,
-        50,
-        text=f"Packed: {packed_count} rectangles",
-        anchor="w", font=("Arial", 10)
-    )
\ No newline at end of file
+    """Draw the packing solution on the canvas, reusing the items of the previous drawing"""
+    renderer = _renderers.get(canvas)
+    if renderer is None:
+        renderer = _renderers[canvas] = PackingRenderer(canvas)
+    renderer.draw(shelves, container_width, container_height)
+    return renderer